@@ -1,7 +1,22 @@
-import random
-from typing import List, Dict, Optional
+import html
+import io
+import os
+from typing import Optional
 import streamlit as st
-import pandas as pd
+
+from planner import (
+    _norm_equip, _contra_from_constraints, goal_key_from_label, generate_week, plan_fingerprint,
+    summarize_day, POOL_CACHE, EQUIPMENT_LABELS, EXPERIENCES, FOCUS_LABELS, GOAL_LABELS, LIMITATION_LABELS,
+)
+from edits import PlanEdits, PlanSpec, apply_edits, build_day, format_plan_code, parse_plan_code, swap_item
+from metrics import METRICS, configure_logging, stage_table
+from exporters import PlanExports, plan_to_dataframe, write_program_csv, write_program_markdown
+from periodization import adapt_week, adapted_base_week, program, program_week
+from plancode import decode_adapted_code, encode_adapted_code, encode_plan_code, is_extended_code
+from plan_store import DEFAULT_MAXSIZE, DEFAULT_PATH as PLAN_STORE_PATH, PlanStore, StoredPlan
+from quota import DEFAULT_DAILY_UNITS, QuotaGovernor
+from streams import CURRENT
+from videos import VideoResolver, YouTubeClient, search_url, watch_url
 
 # App Config and Global Styles
 st.set_page_config(page_title="Custom Workout Planner", page_icon="💪", layout="wide")
@@ -46,645 +61,530 @@ st.markdown(
 st.write("")
 
 
-# Exercise Library
-
-# pattern: 'squat' | 'hinge' | 'lunge' | 'push' | 'vertical_push' | 'pull' | 'vertical_pull' | 'core' | 'carry' | 'mobility'
-# equipment: 'bodyweight', 'dumbbells', 'barbell', 'kettlebell', 'bands', 'pullup_bar', 'machines'
-# contraindications: 'knee', 'shoulder_overhead', 'lumbar_flexion', 'wrist', 'impact'
-EXERCISES: List[Dict] = [
-    # Lower body
-    {"name": "Back Squat", "pattern": "squat", "equipment": ["barbell"], "level_min": "intermediate",
-     "contra": ["knee"], "goal_tags": ["strength", "hypertrophy"]},
-    {"name": "Goblet Squat", "pattern": "squat", "equipment": ["dumbbells"], "level_min": "beginner",
-     "contra": ["knee"], "goal_tags": ["strength", "hypertrophy", "general"]},
-    {"name": "Bodyweight Squat", "pattern": "squat", "equipment": ["bodyweight"], "level_min": "beginner",
-      "contra": ["knee"], "goal_tags": ["general", "fatloss", "endurance"]},
-    {"name": "Romanian Deadlift", "pattern": "hinge", "equipment": ["barbell", "dumbbells"], "level_min": "beginner",
-     "contra": ["lumbar_flexion"], "goal_tags": ["strength", "hypertrophy", "general"]},
-    {"name": "Conventional Deadlift", "pattern": "hinge", "equipment": ["barbell"], "level_min": "intermediate",
-     "contra": ["lumbar_flexion"], "goal_tags": ["strength", "hypertrophy"]},
-    {"name": "Hip Thrust", "pattern": "hinge", "equipment": ["barbell", "dumbbells"], "level_min": "beginner",
-     "contra": [], "goal_tags": ["hypertrophy", "general"]},
-    {"name": "Kettlebell Swing", "pattern": "hinge", "equipment": ["kettlebell"], "level_min": "beginner",
-     "contra": ["lumbar_flexion", "impact"], "goal_tags": ["fatloss", "endurance", "general"]},
-    {"name": "Walking Lunge", "pattern": "lunge", "equipment": ["bodyweight", "dumbbells"], "level_min": "beginner",
-     "contra": ["knee", "impact"], "goal_tags": ["hypertrophy", "general", "fatloss"]},
-    {"name": "Bulgarian Split Squat", "pattern": "lunge", "equipment": ["bodyweight", "dumbbells"], "level_min": "intermediate",
-     "contra": ["knee"], "goal_tags": ["hypertrophy", "general"]},
-    {"name": "Step-up", "pattern": "lunge", "equipment": ["bodyweight", "dumbbells"], "level_min": "beginner",
-     "contra": ["knee", "impact"], "goal_tags": ["general", "hypertrophy"]},
-
-    # Push
-    {"name": "Bench Press", "pattern": "push", "equipment": ["barbell"], "level_min": "intermediate",
-     "contra": ["wrist"], "goal_tags": ["strength", "hypertrophy"]},
-    {"name": "Dumbbell Bench Press", "pattern": "push", "equipment": ["dumbbells"], "level_min": "beginner",
-      "contra": ["wrist"], "goal_tags": ["strength", "hypertrophy", "general"]},
-    {"name": "Push-up", "pattern": "push", "equipment": ["bodyweight"], "level_min": "beginner",
-     "contra": ["wrist"], "goal_tags": ["general", "fatloss", "endurance"]},
-    {"name": "Overhead Press", "pattern": "vertical_push", "equipment": ["barbell"], "level_min": "intermediate",
-     "contra": ["shoulder_overhead", "wrist"], "goal_tags": ["strength", "hypertrophy"]},
-    {"name": "Dumbbell Shoulder Press", "pattern": "vertical_push", "equipment": ["dumbbells"], "level_min": "beginner",
-     "contra": ["shoulder_overhead", "wrist"], "goal_tags": ["strength", "hypertrophy", "general"]},
-    {"name": "Incline Dumbbell Press", "pattern": "push", "equipment": ["dumbbells"], "level_min": "beginner",
-     "contra": ["wrist"], "goal_tags": ["hypertrophy", "general"]},
-
-    # Pull
-    {"name": "Pull-up", "pattern": "vertical_pull", "equipment": ["pullup_bar"], "level_min": "intermediate",
-     "contra": [], "goal_tags": ["strength", "hypertrophy", "general"]},
-    {"name": "Chin-up", "pattern": "vertical_pull", "equipment": ["pullup_bar"], "level_min": "intermediate",
-     "contra": [], "goal_tags": ["strength", "hypertrophy", "general"]},
-    {"name": "One-arm Dumbbell Row", "pattern": "pull", "equipment": ["dumbbells"], "level_min": "beginner",
-     "contra": ["lumbar_flexion", "wrist"], "goal_tags": ["strength", "hypertrophy", "general"]},
-    {"name": "Barbell Row", "pattern": "pull", "equipment": ["barbell"], "level_min": "intermediate",
-     "contra": ["lumbar_flexion"], "goal_tags": ["strength", "hypertrophy"]},
-    {"name": "Face Pull (Band)", "pattern": "pull", "equipment": ["bands"], "level_min": "beginner",
-     "contra": [], "goal_tags": ["hypertrophy", "general"]},
-
-    # Arms / Shoulders
-    {"name": "Dumbbell Lateral Raise", "pattern": "push", "equipment": ["dumbbells"], "level_min": "beginner",
-     "contra": ["shoulder_overhead"], "goal_tags": ["hypertrophy", "general"]},
-    {"name": "Dumbbell Biceps Curl", "pattern": "pull", "equipment": ["dumbbells"], "level_min": "beginner",
-     "contra": ["wrist"], "goal_tags": ["hypertrophy", "general"]},
-    {"name": "Triceps Rope Pushdown (Band)", "pattern": "push", "equipment": ["bands"], "level_min": "beginner",
-     "contra": ["wrist"], "goal_tags": ["hypertrophy", "general"]},
-
-    # Core
-    {"name": "Plank", "pattern": "core", "equipment": ["bodyweight"], "level_min": "beginner",
-     "contra": [], "goal_tags": ["general", "fatloss", "endurance"]},
-    {"name": "Side Plank", "pattern": "core", "equipment": ["bodyweight"], "level_min": "beginner",
-     "contra": [], "goal_tags": ["general", "fatloss", "endurance"]},
-    {"name": "Dead Bug", "pattern": "core", "equipment": ["bodyweight"], "level_min": "beginner",
-     "contra": [], "goal_tags": ["general"]},
-    {"name": "Hollow Body Hold", "pattern": "core", "equipment": ["bodyweight"], "level_min": "intermediate",
-     "contra": [], "goal_tags": ["general"]},
-    {"name": "Russian Twist", "pattern": "core", "equipment": ["bodyweight", "dumbbells"], "level_min": "beginner",
-     "contra": ["lumbar_flexion"], "goal_tags": ["general", "fatloss"]},
-
-    # Carries / Conditioning
-    {"name": "Farmer Carry", "pattern": "carry", "equipment": ["dumbbells", "kettlebell"], "level_min": "beginner",
-     "contra": [], "goal_tags": ["general", "fatloss", "endurance"]},
-    {"name": "Jump Rope", "pattern": "carry", "equipment": ["bodyweight"], "level_min": "beginner",
-     "contra": ["impact"], "goal_tags": ["fatloss", "endurance"]},
-
-    # Mobility
-    {"name": "World's Greatest Stretch", "pattern": "mobility", "equipment": ["bodyweight"], "level_min": "beginner",
-     "contra": [], "goal_tags": ["mobility", "general"]},
-    {"name": "90/90 Hip Switches", "pattern": "mobility", "equipment": ["bodyweight"], "level_min": "beginner",
-     "contra": [], "goal_tags": ["mobility"]},
-    {"name": "Cat-Cow", "pattern": "mobility", "equipment": ["bodyweight"], "level_min": "beginner",
-     "contra": [], "goal_tags": ["mobility"]},
-    {"name": "Thoracic Rotations", "pattern": "mobility", "equipment": ["bodyweight"], "level_min": "beginner",
-     "contra": [], "goal_tags": ["mobility"]},
-    {"name": "Ankle Dorsiflexion Mobilization", "pattern": "mobility", "equipment": ["bodyweight"], "level_min": "beginner",
-     "contra": [], "goal_tags": ["mobility"]},
-]
-
-LEVEL_ORDER = {"beginner": 0, "intermediate": 1, "advanced": 2}
+# Instrumentation (see metrics.py): WORKOUT_METRICS=1 or DEBUG_METRICS in secrets turns on
+# stage timers, a JSON log line per run and a debug panel at the bottom of the sidebar
+
+@st.cache_resource(show_spinner=False)
+def metrics_enabled() -> bool:
+    if st.secrets.get("DEBUG_METRICS"):
+        METRICS.enable()
+    if METRICS.enabled:
+        configure_logging()
+        METRICS.register("pool_cache", POOL_CACHE.stats)
+    return METRICS.enabled
+
+metrics_enabled()
+METRICS.begin_trace("run")
+
+
+# Video Lookups
+
+# Demo videos embedded per day (non-warm-up exercises, in order). Lookups run in the
+# background and only fill placeholders, so this no longer costs page latency.
+AUTO_VIDEOS_PER_DAY = 8
+
+@st.cache_resource(show_spinner=False)
+def video_resolver(api_key: Optional[str]) -> VideoResolver:
+    """One client, cache, lookup pool and quota budget per process (shared by all sessions)."""
+    daily_units = int(st.secrets.get("YT_DAILY_QUOTA", DEFAULT_DAILY_UNITS))
+    resolver = VideoResolver(YouTubeClient(api_key) if api_key else None,
+                             governor=QuotaGovernor(capacity=daily_units, reserve=0.1 * daily_units))
+    METRICS.register("videos", resolver.stats)
+    return resolver
+
+
+# Plan Store
+
+# Sidebar inputs in extended Plan Codes, by widget key, with their defaults
+SIDEBAR_DEFAULTS = {"goal": GOAL_LABELS[0], "days": 3, "minutes": 45, "experience": "Beginner",
+                    "equipment": ["Bodyweight", "Dumbbells"], "constraints": [], "focus": ["Full Body"]}
+CODE_INPUTS = tuple(SIDEBAR_DEFAULTS)
+PLAN_STORE_WARM = 64
+
+@st.cache_resource(show_spinner=False)
+def plan_store() -> PlanStore:
+    """Plans by extended Plan Code, shared by all sessions; the disk tier keeps popular ones across restarts."""
+    store = PlanStore(maxsize=int(st.secrets.get("PLAN_STORE_SIZE", DEFAULT_MAXSIZE)),
+                      path=os.environ.get("PLAN_STORE_PATH", PLAN_STORE_PATH) or None)
+    store.warm(PLAN_STORE_WARM)
+    METRICS.register("plan_store", store.stats)
+    return store
+
+
+def spec_for(inputs: dict, seed: int, streams: int) -> PlanSpec:
+    return PlanSpec(goal_key_from_label(inputs["goal"]), inputs["days"], inputs["minutes"], inputs["experience"],
+                    tuple(_norm_equip(inputs["equipment"])), tuple(_contra_from_constraints(inputs["constraints"])),
+                    tuple(inputs["focus"]), seed, streams)
+
+
+def load_extended_code(code: str) -> bool:
+    """Put an extended code's inputs into the sidebar and queue its plan; False if the code is invalid."""
+    try:
+        inputs, seed, edits, adaptations = decode_adapted_code(code)
+    except ValueError:
+        return False
+    if adaptations:
+        # the sidebar gets the adapted setup; the plan is replayed from the code (see build_adapted)
+        inputs, edits = adaptations[-1]
+        st.session_state.adapted_code = code
+    for key in CODE_INPUTS:
+        st.session_state[key] = inputs[key]
+    st.session_state.plan_code = format_plan_code(seed, edits)
+    st.session_state.load_plan = True
+    return True
+
+
+def on_plan_code_change() -> None:
+    # a valid extended code is swapped for its plain form; an invalid one stays and shows an error
+    if is_extended_code(st.session_state.plan_code):
+        load_extended_code(st.session_state.plan_code)
+
+
+def share_plan(stored: dict) -> None:
+    """Store the session's current plan under its extended code and put that code in the URL."""
+    inputs = {k: stored["inputs"][k] for k in CODE_INPUTS}
+    if stored.get("adapted_from"):
+        stored["share"] = encode_adapted_code(stored["adapted_from"], inputs, stored["edits"])
+    else:
+        stored["share"] = encode_plan_code(inputs, stored["spec"].seed, stored["edits"])
+    plan_store().put(stored["share"], StoredPlan(stored["week_plan"], stored["cols"], stored["summaries"]))
+    st.session_state.shared_link = stored["share"]
+    st.query_params["plan"] = stored["share"]
+
+
+# Plan Edits
+
+def patch_days(stored: dict, days: dict) -> None:
+    """Swap changed days into the stored plan; columns, summaries and exports are patched per day."""
+    videos = stored["videos"]
+    if videos is not None and any(it["name"] not in videos.ids for items in days.values() for it in items):
+        # an exercise new to the plan needs a lookup: don't wait for it here, let the next render
+        # submit the plan's lookups and fill placeholders as they land, as for a new plan (the
+        # ones already found come straight from the resolver's cache)
+        stored["videos"] = stored["exports"] = None
+
+    summaries = list(stored["summaries"])
+    for day, items in days.items():
+        stored["cols"] = stored["cols"].with_day(day, items)
+        summaries[day] = summarize_day(items)
+        if stored["exports"] is not None:
+            stored["exports"].replace_day(day, items)
+    stored["summaries"] = summaries
+    stored["week_plan"] = {**stored["week_plan"], **days}
+    stored.pop("program", None)
+    for day in days:
+        stored.get("cards", {}).pop(day, None)
+
+
+def edit_plan(day: int, slot: Optional[int] = None) -> None:
+    """Button callback: reroll `day` (slot None) or swap one card, patching only that day."""
+    stored = st.session_state.get("plan")
+    if stored is None:
+        return
+    spec, edits = stored["spec"], stored["edits"]
+    if slot is None:
+        edits = edits.with_reroll(day)
+        items = build_day(spec, day, edits.reroll_of(day))
+    else:
+        edits = edits.with_swap(day, slot)
+        items = swap_item(spec, day, stored["week_plan"][day], slot, edits.swaps_of(day, slot))
+
+    patch_days(stored, {day: items})
+    stored["edits"] = edits
+    stored["code"] = format_plan_code(spec.seed, edits)
+    stored["fingerprint"] = plan_fingerprint(**stored["inputs"], plan_code=stored["code"])
+    st.session_state.plan_code = stored["code"]
+    if stored.get("share"):
+        share_plan(stored)
+
+
+def swap_picked(day: int) -> None:
+    """Button callback: swap the card picked in the day's "Swap an exercise" box."""
+    slot = st.session_state.get(f"swap_pick_{day}")
+    if slot is not None:
+        edit_plan(day, slot)
+
+
+def adapt_stored_plan(inputs: dict) -> None:
+    """Button callback: fit the stored plan to new equipment/limitations via the substitution graph."""
+    stored = st.session_state.get("plan")
+    if stored is None:
+        return
+    spec = spec_for(inputs, stored["spec"].seed, stored["spec"].streams)
+    if not spec.pool():
+        st.error("No exercises matched your filters. Try adding more equipment or removing limitations.")
+        return
+    result = adapt_week(stored["week_plan"], stored["edits"], spec)
+    patch_days(stored, {d: items for d, items in result.week_plan.items() if items is not stored["week_plan"][d]})
+    # an adapted plan isn't what its new inputs generate: its code is the one it was adapted
+    # from plus the new setup, and the edits made from now on build on the adapted days
+    stored["adapted_from"] = stored["share"]
+    stored["spec"] = spec
+    stored["inputs"] = inputs
+    stored["adaptation"] = result
+    stored["edits"] = PlanEdits(streams=spec.streams)
+    stored["code"] = format_plan_code(spec.seed, stored["edits"])
+    stored["fingerprint"] = plan_fingerprint(**inputs, plan_code=stored["code"])
+    st.session_state.plan_code = stored["code"]
+    share_plan(stored)
+
+
+def adapted_source(code: str) -> str:
+    """The code an adapted plan code was (last) adapted from, in canonical form."""
+    inputs, seed, edits, adaptations = decode_adapted_code(code)
+    source = encode_plan_code(inputs, seed, edits)
+    for later_inputs, later_edits in adaptations[:-1]:
+        source = encode_adapted_code(source, later_inputs, later_edits)
+    return source
+
+
+def build_adapted(code: str):
+    """Week 1 of an adapted plan code, replayed from the plan it was first adapted from."""
+    inputs, seed, edits, adaptations = decode_adapted_code(code)
+    later = [(spec_for(later_inputs, seed, edits.streams), later_edits) for later_inputs, later_edits in adaptations]
+    return adapted_base_week(spec_for(inputs, seed, edits.streams), edits, later)[0]
+
+
+# Day Cards
+
+def card_html(j: int, it) -> str:
+    if it["type"] == "sets_reps":
+        scheme_txt = f"{it['sets']} × {it['reps']} · Rest {it['rest_sec']}s"
+    elif it["type"] == "timed":
+        scheme_txt = f"Circuit: {it['sets']} rounds — {it['time_sec']}s work / {it['rest_sec']}s rest"
+    else:
+        scheme_txt = f"Holds: {it['sets']} × {it['time_sec']}s · Rest {it['rest_sec']}s"
+    extra = []
+    if it.get("tempo"):
+        extra.append(f"Tempo {it['tempo']}")
+    if it.get("rir") is not None:
+        extra.append(f"RIR {it['rir']}")
+    extras = " · ".join(extra)
+    name = html.escape(it["name"])
+    link = "" if it["name"] == "Warm-up" else \
+        f'<div><a href="{html.escape(search_url(it["name"]))}" target="_blank">Search on YouTube for demo</a></div>'
+    # no blank lines: the whole day has to stay one HTML block for the Markdown renderer
+    return (f'<div class="card">\n<h4>{j}. {name} · <small>{html.escape(it["pattern"])}</small></h4>\n'
+            f'<div>{scheme_txt}{(" · " + extras) if extras else ""}</div>\n'
+            f'<small>{html.escape(it.get("notes", ""))}</small>\n{link}</div>')
+
+
+def day_cards_html(items) -> str:
+    """Every card of a day as one HTML block: one element (and one delta) instead of two per exercise."""
+    return "\n".join(card_html(j, it) for j, it in enumerate(items, start=1))
+
 
 # Sidebar Inputs
 
+# A shared or bookmarked link (?plan=<extended code>) fills the sidebar before it is drawn
+link = st.query_params.get("plan")
+if link and link != st.session_state.get("shared_link"):
+    st.session_state.shared_link = link
+    if not load_extended_code(link):
+        st.session_state.bad_link = link
+
+for key, value in SIDEBAR_DEFAULTS.items():
+    st.session_state.setdefault(key, value)
+
 with st.sidebar:
     st.markdown("### Your Setup")
     st.caption("Tell us about your training. We’ll build the plan.")
 
-    goal = st.selectbox(
-        "Primary goal",
-        ["Build Muscle (Hypertrophy)", "Get Stronger (Strength)", "Fat Loss / Conditioning", "General Fitness / Health", "Mobility / Flexibility"],
-        index=0
-    )
-    days = st.slider("Days per week", 1, 6, 3)
-    minutes = st.slider("Minutes per session", 20, 90, 45, 5)
-    experience = st.selectbox("Training experience", ["Beginner", "Intermediate", "Advanced"], index=0)
-    equip = st.multiselect(
-        "Available equipment",
-        ["Bodyweight", "Dumbbells", "Barbell", "Kettlebell", "Resistance Bands", "Pull-up Bar", "Machines"],
-        default=["Bodyweight", "Dumbbells"]
-    )
-    constraints = st.multiselect(
-        "Any limitations? (optional)",
-        ["No deep knee flexion", "No overhead pressing", "No spinal flexion", "Avoid high impact", "Wrist pain", "Shoulder sensitive", "Lower back sensitive"],
-        default=[]
-    )
-    focus = st.multiselect(
-        "Emphasis (optional)",
-        ["Full Body", "Upper Body", "Lower Body", "Glutes", "Core", "Arms", "Shoulders", "Back", "Chest"],
-        default=["Full Body"]
-    )
-    seed = st.number_input(
+    goal = st.selectbox("Primary goal", GOAL_LABELS, key="goal")
+    days = st.slider("Days per week", 1, 6, key="days")
+    minutes = st.slider("Minutes per session", 20, 90, step=5, key="minutes")
+    program_weeks = st.slider("Program length (weeks)", 1, 16, 1,
+                              help="More than one week adds a Program tab: progressive overload, a deload every 4th week and exercise rotation per block.")
+    experience = st.selectbox("Training experience", EXPERIENCES, key="experience")
+    equip = st.multiselect("Available equipment", EQUIPMENT_LABELS, key="equipment")
+    constraints = st.multiselect("Any limitations? (optional)", LIMITATION_LABELS, key="constraints")
+    focus = st.multiselect("Emphasis (optional)", FOCUS_LABELS, key="focus")
+    if "plan_code" not in st.session_state:
+        # new plans use the current streams; codes typed without a marker keep the legacy ones
+        st.session_state.plan_code = format_plan_code(42, PlanEdits(streams=CURRENT))
+    plan_code = st.text_input(
         "Plan Code",
-        min_value=0, max_value=10_000, value=42, step=1,
-        help="Enter this code to recreate a previous plan. Leave as-is for a new plan."
+        key="plan_code",
+        on_change=on_plan_code_change,
+        help="Enter a code to recreate a previous plan (including rerolled days and swapped exercises). "
+             "Codes starting with p also restore every setting above. Leave as-is for a new plan."
     )
+    if "bad_link" in st.session_state:
+        st.error(f"The link's Plan Code {st.session_state.pop('bad_link')} isn't valid (typo?).")
+    try:
+        seed, plan_edits = parse_plan_code(plan_code)
+        if seed > 10_000:
+            raise ValueError(plan_code)
+        plan_code = format_plan_code(seed, plan_edits)
+    except ValueError:
+        seed = None
+        if is_extended_code(plan_code):
+            st.error(f"Plan Code {plan_code} isn't valid (typo?).")
+        else:
+            st.error("Plan Code should be a number from 0 to 10000, optionally followed by edits like +d2r1.")
 
     # --- YouTube key + toggle + cache refresh ---
     YT_KEY = st.secrets.get("YT_API_KEY")
     has_key = bool(YT_KEY)
     include_videos = st.toggle("Show demo videos", value=False) if has_key else False
     if st.button("🔁 Refresh videos cache"):
-        st.cache_data.clear()
-        st.success("Cleared cached video lookups.")
+        dropped = video_resolver(YT_KEY).invalidate()
+        st.success(f"Cleared {dropped} cached video lookups.")
 
     st.markdown("---")
     generate = st.button("🚀 Generate my plan", type="primary")
-
-
-# Helper Functions
-
-def _norm_equip(e: List[str]) -> List[str]:
-    m = {
-        "Bodyweight": "bodyweight", "Dumbbells": "dumbbells", "Barbell": "barbell",
-        "Kettlebell": "kettlebell", "Resistance Bands": "bands", "Pull-up Bar": "pullup_bar", "Machines": "machines"
-    }
-    return [m[x] for x in e]
-
-def _contra_from_constraints(c: List[str]) -> List[str]:
-    mapping = {
-        "No deep knee flexion": "knee",
-        "No overhead pressing": "shoulder_overhead",
-        "No spinal flexion": "lumbar_flexion",
-        "Avoid high impact": "impact",
-        "Wrist pain": "wrist",
-        "Shoulder sensitive": "shoulder_overhead",
-        "Lower back sensitive": "lumbar_flexion"
-    }
-    return list({mapping[x] for x in c})
-
-def filter_exercises(goal_key: str, equip_norm: List[str], min_level: str, avoid: List[str]) -> List[Dict]:
-    """Fix: Enforce level/equipment/contra + goal intent (except allow 'general'/'mobility' always)."""
-    level_min = LEVEL_ORDER[min_level]
-    out = []
-    for ex in EXERCISES:
-        if LEVEL_ORDER[ex["level_min"]] > level_min:
-            continue
-        if not any(e in equip_norm for e in ex["equipment"]):
-            continue
-        if any(a in ex["contra"] for a in avoid):
-            continue
-        if goal_key not in ["general", "mobility"] and goal_key not in ex["goal_tags"]:
-            continue
-        out.append(ex)
-    return out
-
-def difficulty_weight(ex: Dict, experience: str) -> int:
-    """Weight exercises by appropriateness for the user's level."""
-    w = 1
-    lvl = LEVEL_ORDER[ex["level_min"]]
-    if experience == "Beginner":
-        w += 2 if lvl == 0 else 0
-        w -= 1 if lvl >= 1 else 0
-    elif experience == "Intermediate":
-        w += 1 if lvl == 1 else 0
-    else:  # Advanced
-        w += 2 if lvl >= 1 else 0
-        if "barbell" in ex["equipment"] and ex["pattern"] in ["squat", "hinge", "push", "pull", "vertical_push", "vertical_pull"]:
-            w += 1
-    return max(1, w)
-
-def emphasize(exs: List[Dict], focus: List[str], experience: str) -> List[Dict]:
-    """Compose difficulty weighting with user emphasis."""
-    weighted = []
-    for e in exs:
-        w = difficulty_weight(e, experience)
-        if "Lower Body" in focus and e["pattern"] in ["squat", "hinge", "lunge"]:
-            w += 1
-        if "Upper Body" in focus and e["pattern"] in ["push", "vertical_push", "pull", "vertical_pull"]:
-            w += 1
-        if "Core" in focus and e["pattern"] == "core":
-            w += 1
-        if "Glutes" in focus and e["pattern"] in ["hinge", "lunge", "squat"]:
-            w += 1
-        if "Arms" in focus and (e["name"].lower().endswith("curl") or "tricep" in e["name"].lower()):
-            w += 1
-        if "Shoulders" in focus and (e["pattern"] in ["vertical_push", "push"] or "lateral raise" in e["name"].lower()):
-            w += 1
-        if "Back" in focus and e["pattern"] in ["pull", "vertical_pull"]:
-            w += 1
-        if "Chest" in focus and e["pattern"] == "push":
-            w += 1
-        weighted.extend([e] * max(1, w))
-    return weighted
-
-def patterns_for_week(days: int, goal_key: str) -> List[List[str]]:
-    """Goal-aware daily pattern lists with deduping."""
-    base_map = {
-        1: [["squat", "hinge", "push", "pull", "core"]],
-        2: [["squat", "push", "pull", "core"], ["hinge", "push", "pull", "core"]],
-        3: [["squat", "push", "pull", "core"], ["hinge", "push", "pull", "core"], ["lunge", "push", "pull", "core"]],
-        4: [["upper"], ["lower"], ["upper"], ["lower"]],
-        5: [["upper"], ["lower"], ["push"], ["pull"], ["legs"]],
-        6: [["push"], ["pull"], ["legs"], ["upper"], ["lower"], ["core"]],
-    }
-    base = base_map[days][:]
-
-    expanded = []
-    for day in base:
-        day_patterns = []
-        for p in day:
-            if p == "upper":
-                day_patterns += ["push", "pull", "vertical_push", "vertical_pull", "core"]
-            elif p == "lower":
-                day_patterns += ["squat", "hinge", "lunge", "core"]
-            elif p == "legs":
-                day_patterns += ["squat", "hinge", "lunge"]
-            elif p == "core":
-                day_patterns += ["core", "carry"]
-            else:
-                day_patterns.append(p)
-
-        # goal bias
-        if goal_key == "strength":
-            day_patterns += ["carry"]  # bracing
-        elif goal_key == "hypertrophy":
-            day_patterns += ["push", "pull"]  # extra pump
-        elif goal_key in ["fatloss", "endurance"]:
-            day_patterns += ["carry", "core"]  # circuit-friendly
-        elif goal_key == "mobility":
-            day_patterns = ["mobility", "core", "hinge", "squat"]
-
-        uniq = []
-        for x in day_patterns:
-            if x not in uniq:
-                uniq.append(x)
-        expanded.append(uniq)
-    return expanded
-
-def scheme_for(goal_key: str, pattern: str, experience: str, minutes: int) -> Dict:
-    """Different schemes by goal + level with Tempo & RIR."""
-    notes = ""
-    tempo = "2-0-2"
-    rir = 2
-    rest = 75
-    sets = 3
-    reps = "8–10"
-
-    if goal_key == "strength":
-        if pattern in ["squat", "hinge", "push", "pull", "vertical_push", "vertical_pull"]:
-            sets, reps, rest = 4, "3–5", 150
-            tempo, rir = "2-1-1", 2
-            notes = "Power focus, crisp technique."
-        else:
-            sets, reps, rest = 3, "5–6", 120
-            tempo, rir = "2-1-1", 1
-    elif goal_key == "hypertrophy":
-        sets, reps, rest = 3, "8–12", 75
-        tempo, rir = "3-1-2", 1
-        notes = "Challenging last reps, full range."
-    elif goal_key in ["fatloss", "endurance"]:
-        return {
-            "type": "timed", "time_sec": 40, "rest_sec": 20, "sets": 3, "reps": None,
-            "tempo": "constant", "rir": None,
-            "notes": "Circuit pace; keep moving between exercises."
-        }
-    elif goal_key == "mobility":
-        return {
-            "type": "hold", "time_sec": 45, "rest_sec": 15, "sets": 2, "reps": None,
-            "tempo": "slow", "rir": None,
-            "notes": "Controlled range, breathe into end positions."
-        }
-    else:  # general
-        sets, reps, rest = 3, "6–10", 90
-        tempo, rir = "2-1-2", 2
-        notes = "Smooth reps, own the range."
-
-    # Level-based adjustments
-    if experience == "Beginner":
-        sets = max(2, sets - 1)
-        rest = max(60, rest - 15)
-        if isinstance(reps, str) and "–" in reps:
-            lo, hi = [int(x) for x in reps.split("–")]
-            reps = f"{lo+1}–{hi+2}"
-        tempo = "2-0-2"
-        rir = 2
-        notes = (notes + " Leave 2–3 reps in reserve.").strip()
-    elif experience == "Advanced":
-        sets += 1
-        rest += 15
-        if isinstance(reps, str) and "–" in reps:
-            lo, hi = [int(x) for x in reps.split("–")]
-            reps = f"{max(3, lo-1)}–{max(lo, hi-1)}"
-        tempo = "3-1-1" if goal_key in ["hypertrophy", "general"] else "2-1-1"
-        rir = 1
-        notes = (notes + " Optionally add a final hard set.").strip()
-
-    # Time-pressure adjustment
-    if minutes < 35:
-        sets = max(2, sets - 1)
-    elif minutes > 60:
-        sets += 1
-
-    return {
-        "type": "sets_reps",
-        "sets": sets,
-        "reps": reps,
-        "time_sec": None,
-        "rest_sec": rest,
-        "tempo": tempo,
-        "rir": rir,
-        "notes": notes
-    }
-
-def _avg_reps(reps_field) -> int:
-    if isinstance(reps_field, int):
-        return reps_field
-    if isinstance(reps_field, str) and "–" in reps_field:
-        lo, hi = [int(x) for x in reps_field.split("–")]
-        return (lo + hi) // 2
-    return 10
-
-def estimate_exercise_time_sec(item: Dict) -> int:
-    """Estimate work + rest + overhead per exercise (more realistic)."""
-    if item["type"] == "timed":
-        return (item["time_sec"] + item["rest_sec"]) * item["sets"] + 45
-    if item["type"] == "hold":
-        return (item["time_sec"] + item["rest_sec"]) * item["sets"] + 45
-
-    reps = _avg_reps(item["reps"])
-    try:
-        ecc, pause, con = [int(x) for x in str(item.get("tempo", "2-0-2")).split("-")]
-    except Exception:
-        ecc, pause, con = 2, 0, 2
-
-    time_per_rep = ecc + pause + con
-    per_set_overhead = 12
-    transition_between_exercises = 45
-
-    work = (reps * time_per_rep + per_set_overhead) * item["sets"]
-    rest_total = max(0, item["sets"] - 1) * item.get("rest_sec", 75)
-
-    return work + rest_total + transition_between_exercises
-
-@st.cache_data(show_spinner=False)
-def get_youtube_id(query: str, api_key: Optional[str]) -> Optional[str]:
-    """Return a YouTube videoId or None. Cached per (query, api_key)."""
-    if not api_key:
-        return None
-    try:
-        from googleapiclient.discovery import build
-    except ModuleNotFoundError:
-        st.info("YouTube client not installed on this deploy (check requirements.txt).")
-        return None
-    try:
-        yt = build("youtube", "v3", developerKey=api_key)
-        req = yt.search().list(
-            q=query, part="id", type="video", maxResults=1, videoEmbeddable="true"
-        )
-        res = req.execute()
-        items = res.get("items", [])
-        if items:
-            return items[0]["id"]["videoId"]
-    except Exception:
-        st.info("Couldn't fetch YouTube video automatically. You can still use the search links.")
-    return None
-
-def pick_for_pattern(candidates: List[Dict], pattern: str, used: set, rng: random.Random) -> Optional[Dict]:
-    pool = [e for e in candidates if e["pattern"] == pattern and e["name"] not in used]
-    if not pool:
-        pool = [e for e in candidates if e["name"] not in used]
-    if not pool:
-        return None
-    choice = rng.choice(pool)
-    used.add(choice["name"])
-    return choice
-
-def build_day_plan(candidates: List[Dict], patterns: List[str], rng: random.Random,
-                   goal_key: str, experience: str, minutes: int):
-    """Time-aware builder with per-level min/max exercise caps (warm-up not counted)."""
-    used = set()
-    day_exercises = []
-    time_budget = minutes * 60
-    time_used = 0
-
-    caps = {
-        "Beginner":      {"min": 4, "max": 6},
-        "Intermediate":  {"min": 5, "max": 7},
-        "Advanced":      {"min": 5, "max": 8},
-    }
-    cap = caps.get(experience, {"min": 5, "max": 7})
-
-    def count_main(exs):
-        return sum(1 for x in exs if x.get("name") != "Warm-up")
-
-    # Warm-up block (~5 min)
-    warmup = {
-        "name": "Warm-up",
-        "pattern": "mobility",
-        "type": "hold",
-        "time_sec": 30,
-        "rest_sec": 15,
-        "sets": 6,
-        "tempo": "easy",
-        "rir": None,
-        "notes": "3–5 min: light cardio + dynamic mobility (hips, T-spine, shoulders). Add 2 ramp sets for your first big lift."
-    }
-    time_used += estimate_exercise_time_sec(warmup)
-    day_exercises.append(warmup)
-
-    # Cover core patterns first
-    for p in patterns:
-        if count_main(day_exercises) >= cap["max"]:
-            break
-        ex = pick_for_pattern(candidates, p, used, rng)
-        if not ex:
-            continue
-        scheme = scheme_for(goal_key, ex["pattern"], experience, minutes)
-        item = {**ex, **scheme}
-        t = estimate_exercise_time_sec(item)
-
-        must_have = (goal_key in ["strength", "hypertrophy", "general"]) and \
-                    (sum(1 for x in day_exercises if x.get("type") == "sets_reps") < 3)
-
-        if must_have or time_used + t <= time_budget:
-            day_exercises.append(item)
-            time_used += t
-        if count_main(day_exercises) >= cap["max"]:
-            break
-
-    # Fill remaining time up to caps
-    tries = 0
-    while time_used <= time_budget and tries < 30 and count_main(day_exercises) < cap["max"]:
-        ex = pick_for_pattern(candidates, rng.choice(patterns), used, rng)
-        if not ex:
-            break
-        item = {**ex, **scheme_for(goal_key, ex["pattern"], experience, minutes)}
-        t = estimate_exercise_time_sec(item)
-        if time_used + t > time_budget:
-            break
-        day_exercises.append(item)
-        time_used += t
-        tries += 1
-
-    # Ensure minimum count if possible
-    tries = 0
-    while count_main(day_exercises) < cap["min"] and tries < 10:
-        ex = pick_for_pattern(candidates, rng.choice(patterns), used, rng)
-        if not ex:
-            break
-        item = {**ex, **scheme_for(goal_key, ex["pattern"], experience, minutes)}
-        t = estimate_exercise_time_sec(item)
-        if time_used + t > time_budget and count_main(day_exercises) >= (cap["min"] - 1):
-            day_exercises.append(item)
-            break
-        if time_used + t <= time_budget:
-            day_exercises.append(item)
-            time_used += t
-        tries += 1
-
-    return day_exercises
-
-def goal_key_from_label(lbl: str) -> str:
-    m = {
-        "Build Muscle (Hypertrophy)": "hypertrophy",
-        "Get Stronger (Strength)": "strength",
-        "Fat Loss / Conditioning": "fatloss",
-        "General Fitness / Health": "general",
-        "Mobility / Flexibility": "mobility",
-    }
-    return m[lbl]
-
-def plan_to_dataframe(week_plan: Dict[int, List[Dict]], include_video_urls: bool) -> pd.DataFrame:
-    rows = []
-    for day_idx, items in week_plan.items():
-        day_name = f"Day {day_idx+1}"
-        for it in items:
-            if it["type"] == "sets_reps":
-                scheme = f'{it["sets"]} x {it["reps"]}'
-                rest = it["rest_sec"]
-            elif it["type"] == "timed":
-                scheme = f'{it["sets"]} rounds of {it["time_sec"]}s work / {it["rest_sec"]}s rest'
-                rest = it["rest_sec"]
-            else:
-                scheme = f'{it["sets"]} x {it["time_sec"]}s'
-                rest = it["rest_sec"]
-            video = ""
-            if include_video_urls and it["name"] != "Warm-up":
-                vid = get_youtube_id(f"{it['name']} exercise proper form tutorial", YT_KEY)
-                if vid:
-                    video = f"https://www.youtube.com/watch?v={vid}"
-            rows.append({
-                "Day": day_name,
-                "Exercise": it["name"],
-                "Pattern": it["pattern"],
-                "Scheme": scheme,
-                "Rest (s)": rest,
-                "Tempo": it.get("tempo", ""),
-                "RIR": it.get("rir", ""),
-                "Notes": it.get("notes", ""),
-                "Video": video
-            })
-    return pd.DataFrame(rows)
-
-def markdown_plan(week_plan: Dict[int, List[Dict]], include_videos: bool) -> str:
-    lines = ["# Weekly Workout Plan"]
-    for day_idx, items in week_plan.items():
-        lines.append(f"\n## Day {day_idx+1}\n")
-        for it in items:
-            if it["type"] == "sets_reps":
-                scheme = f'{it["sets"]} x {it["reps"]} — rest {it["rest_sec"]}s'
-            elif it["type"] == "timed":
-                scheme = f'{it["sets"]} rounds — {it["time_sec"]}s work / {it["rest_sec"]}s rest'
-            else:
-                scheme = f'{it["sets"]} x {it["time_sec"]}s — rest {it["rest_sec"]}s'
-            vid = ""
-            if include_videos and it["name"] != "Warm-up":
-                v = get_youtube_id(f"{it['name']} exercise proper form tutorial", YT_KEY)
-                if v:
-                    vid = f"  \n[Demo](https://www.youtube.com/watch?v={v})"
-            extras = []
-            if it.get("tempo"): extras.append(f"Tempo {it['tempo']}")
-            if it.get("rir") is not None: extras.append(f"RIR {it['rir']}")
-            extras_txt = (" — " + " · ".join(extras)) if extras else ""
-            lines.append(f"- **{it['name']}** ({it['pattern']}) — {scheme}.{extras_txt} {it.get('notes','')}{vid}")
-    return "\n".join(lines)
-
-def summarize_day(day_items: List[Dict]) -> Dict:
-    total_sets = sum(x["sets"] for x in day_items if x["type"] == "sets_reps")
-    est_time = sum(estimate_exercise_time_sec(x) for x in day_items)
-    patterns = [x["pattern"] for x in day_items if x.get("pattern")]
-    return {"total_sets": total_sets, "est_min": round(est_time/60), "patterns": ", ".join(sorted(set(patterns)))}
+    generate = st.session_state.pop("load_plan", False) or generate
+    adapted_code = st.session_state.pop("adapted_code", None)
 
 
 # UI Flow
 
+# The plan lives in session_state under a fingerprint of every input, so reruns from other
+# widgets (tab switches, downloads, toggles) re-render it without rebuilding anything
+plan_inputs = dict(goal=goal, days=days, minutes=minutes, experience=experience, equipment=equip,
+                   constraints=constraints, focus=focus, include_videos=include_videos)
+plan_key = plan_fingerprint(**plan_inputs, plan_code=plan_code)
+stored = st.session_state.get("plan")
+adaptable = False
+if stored is not None and stored["fingerprint"] != plan_key:
+    canon = lambda v: sorted(v) if isinstance(v, list) else v
+    changed = {k for k, v in plan_inputs.items() if canon(v) != canon(stored["inputs"][k])}
+    # only equipment/limitations changed: the plan can be adapted in place instead of rebuilt
+    adaptable = plan_code == stored["code"] and bool(changed) and changed <= {"equipment", "constraints"}
+    if not adaptable:
+        # an input changed since this plan was built; it (and its exports) no longer apply
+        del st.session_state["plan"]
+    stored = None
+
 if 'generated_once' not in st.session_state:
     st.info("Use the panel on the left to set your goal and schedule, then hit **Generate my plan**.")
 
-if generate:
+if adaptable and not generate:
+    st.info("Your equipment or limitations changed. Adapt the current plan (only affected exercises are swapped), "
+            "or hit **Generate my plan** for a new one.")
+    st.button("♻️ Adapt my current plan", on_click=adapt_stored_plan, args=(plan_inputs,))
+
+if generate and seed is not None:
     st.session_state.generated_once = True
-    rng = random.Random(seed)
     goal_key = goal_key_from_label(goal)
     equip_norm = _norm_equip(equip)
     avoid = _contra_from_constraints(constraints)
-    min_level = experience.lower()
 
-    candidates = filter_exercises(goal_key, equip_norm, min_level, avoid)
-    if not candidates:
+    spec = PlanSpec(goal_key, days, minutes, experience, tuple(equip_norm), tuple(avoid), tuple(focus), seed,
+                    plan_edits.streams)
+    code_inputs = {k: plan_inputs[k] for k in CODE_INPUTS}
+    adapted_from = adapted_source(adapted_code) if adapted_code else None
+    if adapted_from:
+        share_code = encode_adapted_code(adapted_from, code_inputs, plan_edits)
+    else:
+        share_code = encode_plan_code(code_inputs, seed, plan_edits)
+
+    def build():
+        with METRICS.stage("generate"):
+            if adapted_from:
+                return build_adapted(share_code)
+            week_plan = generate_week(goal_key, days, minutes, experience, equip_norm, avoid, focus, seed,
+                                      streams=spec.streams)
+            if week_plan is not None and plan_edits:
+                week_plan = apply_edits(spec, week_plan, plan_edits)
+        return week_plan
+
+    # served from the shared store when any session has built this code before
+    with METRICS.stage("plan_store"):
+        built = plan_store().get_or_build(share_code, build)
+    if built is None:
         st.error("No exercises matched your filters. Try adding more equipment or removing limitations.")
         st.stop()
 
-    patterns_week = patterns_for_week(days, goal_key)
-    week_plan: Dict[int, List[Dict]] = {}
-
-    # Build per-day with deterministic RNG based on (seed, day_index)
-    for i, patterns in enumerate(patterns_week):
-        day_rng = random.Random(seed * 1000 + i)
-        cand_weighted = emphasize(candidates, focus, experience)
-        day = build_day_plan(cand_weighted, patterns, day_rng, goal_key, experience, minutes)
-        week_plan[i] = day
-
+    stored = st.session_state.plan = {
+        "fingerprint": plan_key,
+        "inputs": plan_inputs,
+        "spec": spec,
+        "edits": plan_edits,
+        "code": plan_code,
+        "share": share_code,
+        "adapted_from": adapted_from,
+        "week_plan": built.week_plan,
+        "cols": built.cols,
+        "summaries": built.summaries,
+        "videos": None,   # Prefetch once every lookup has finished
+        "exports": None,  # PlanExports with final video links
+    }
+    st.session_state.shared_link = share_code
+    st.query_params["plan"] = share_code
     st.success("Plan generated! Scroll down to view your week.")
 
-    tabs = st.tabs([f"Day {i+1}" for i in range(days)] + ["Download / Export"])
+if stored is not None:
+    week_plan, cols, summaries = stored["week_plan"], stored["cols"], stored["summaries"]
+    if stored.get("adapted_from") is None:
+        st.caption(f"Plan Code **{stored['share']}** recreates exactly this plan with all its settings "
+                   f"(**{stored['code']}** with the same settings); this page's link does too. "
+                   "Reroll a day or swap an exercise and the code updates.")
+    else:
+        adaptation = stored.get("adaptation")
+        changes = []
+        if adaptation is not None:
+            if adaptation.replaced:
+                changes.append("swapped " + ", ".join(f"{old} → {new}" for _, _, old, new in adaptation.replaced))
+            if adaptation.rebuilt:
+                changes.append("rebuilt " + ", ".join(f"Day {d+1}" for d in adaptation.rebuilt))
+            if adaptation.dropped:
+                changes.append("removed " + ", ".join(n for _, n in adaptation.dropped))
+        st.caption("Adapted to your new setup" + "".join(f" · {c}" for c in changes)
+                   + f". Plan Code **{stored['share']}** recreates exactly this adapted plan with all its "
+                   "settings; this page's link does too. Reroll a day or swap an exercise and the code updates.")
+
+    # Reuse the finished video map from an earlier run, or start every lookup now;
+    # the plan renders without waiting for them
+    videos = stored["videos"]
+    pending = None
+    if include_videos and videos is None:
+        pending = video_resolver(YT_KEY).submit(cols.name)
+    video_slots = {}  # exercise name -> placeholders for its "Watch demo" expander
+
+    def show_video(slot, name: str, vid: str) -> None:
+        with slot.container():
+            with st.expander(f"Watch demo: {name}"):
+                st.video(watch_url(vid))
+
+    video_notice = st.empty()
+
+    # Only the open tab's body runs: switching tabs reruns the script for the new one
+    tabs = st.tabs([f"Day {i+1}" for i in range(len(week_plan))] + (["Program"] if program_weeks > 1 else [])
+                   + ["Download / Export"], key="plan_tab", on_change="rerun")
 
     # Day tabs
-    for i in range(days):
-        with tabs[i]:
-            st.subheader(f"Day {i+1}")
-
-            day_items = week_plan[i]
-            summary = summarize_day(day_items)
-            st.caption(f"**Summary:** {summary['total_sets']} total sets · ~{summary['est_min']} min · Patterns: {summary['patterns']}")
-
-            for j, it in enumerate(day_items, start=1):
-                header = f"{j}. {it['name']} · <small>{it['pattern']}</small>"
-                if it["type"] == "sets_reps":
-                    scheme_txt = f"{it['sets']} × {it['reps']} · Rest {it['rest_sec']}s"
-                elif it["type"] == "timed":
-                    scheme_txt = f"Circuit: {it['sets']} rounds — {it['time_sec']}s work / {it['rest_sec']}s rest"
-                else:
-                    scheme_txt = f"Holds: {it['sets']} × {it['time_sec']}s · Rest {it['rest_sec']}s"
-
-                tempo = it.get("tempo")
-                rir = it.get("rir")
-                extra = []
-                if tempo: extra.append(f"Tempo {tempo}")
-                if rir is not None: extra.append(f"RIR {rir}")
-                extras = " · ".join(extra)
-
-                st.markdown(f'''
-<div class="card">
-  <h4>{header}</h4>
-  <div>{scheme_txt}{(" · " + extras) if extras else ""}</div>
-  <small>{it.get('notes','')}</small>
-</div>
-''', unsafe_allow_html=True)
-
-                # Video + search link (limit auto-fetch to first 3 non-warm-up exercises)
-                if include_videos and it["name"] != "Warm-up" and j <= 3:
-                    vid = get_youtube_id(f"{it['name']} exercise proper form tutorial", YT_KEY)
-                    if vid:
-                        with st.expander("Watch demo"):
-                            st.video(f"https://www.youtube.com/watch?v={vid}")
-
-                if it["name"] != "Warm-up":
-                    search_q = it["name"].replace(" ", "+") + "+exercise+proper+form+tutorial"
-                    st.markdown(f"[Search on YouTube for demo](https://www.youtube.com/results?search_query={search_q})")
+    with METRICS.stage("render_days"):
+        for i in range(len(week_plan)):
+            if not tabs[i].open:
+                continue
+            with tabs[i]:
+                st.subheader(f"Day {i+1}")
+
+                day_items = week_plan[i]
+                summary = summaries[i]
+                st.caption(f"**Summary:** {summary['total_sets']} total sets · ~{summary['est_min']} min · Patterns: {summary['patterns']}")
+                st.button("🎲 Reroll this day", key=f"reroll_{i}", on_click=edit_plan, args=(i,))
+
+                # every card of the day in one element, built once per plan and day
+                cards = stored.setdefault("cards", {})
+                if i not in cards:
+                    cards[i] = day_cards_html(day_items)
+                st.markdown(cards[i], unsafe_allow_html=True)
+
+                slots = [s for s, it in enumerate(day_items) if it["name"] != "Warm-up"]
+                if slots:
+                    st.selectbox("Swap an exercise", slots, key=f"swap_pick_{i}",
+                                 format_func=lambda s, items=day_items: f"{s + 1}. {items[s]['name']}")
+                    st.button("🔄 Swap exercise", key=f"swap_{i}", on_click=swap_picked, args=(i,))
+
+                # Video placeholders, filled below as lookups finish
+                if include_videos:
+                    for s in slots[:AUTO_VIDEOS_PER_DAY]:
+                        name = day_items[s]["name"]
+                        slot = st.empty()
+                        if pending is None or pending.futures[name].done():
+                            vid = (videos or pending).get(name)
+                            if vid:
+                                show_video(slot, name, vid)
+                        else:
+                            video_slots.setdefault(name, []).append(slot)
+
+    # Program tab: any week is built directly from week 1 and its index
+    if program_weeks > 1 and tabs[len(week_plan)].open:
+        with tabs[len(week_plan)]:
+            week_no = st.slider("Week", 1, program_weeks, 1, key="program_week")
+            with METRICS.stage("program_week"):
+                week = program_week(stored["spec"], week_no - 1, base=week_plan)
+            st.subheader(week.label)
+            st.caption(f"Block {week.block + 1} · " + ("lighter week to recover before the next block."
+                                                       if week.deload else "progressive overload on week 1."))
+            st.dataframe(plan_to_dataframe(week.plan), use_container_width=True)
+
+            program_files = stored.setdefault("program", {})
+            if program_weeks not in program_files:
+                with METRICS.stage("program_export"):
+                    csv_buf, md_buf = io.StringIO(), io.StringIO()
+                    lookup = videos.get if include_videos and videos is not None else None
+                    write_program_csv(program(stored["spec"], program_weeks, base=week_plan), csv_buf, lookup)
+                    write_program_markdown(program(stored["spec"], program_weeks, base=week_plan), md_buf, lookup)
+                    program_files[program_weeks] = (csv_buf.getvalue().encode("utf-8"),
+                                                    md_buf.getvalue().encode("utf-8"))
+            csv_bytes, md_bytes = program_files[program_weeks]
+            st.download_button(f"⬇️ Download {program_weeks}-week program (CSV)", data=csv_bytes,
+                               file_name="workout_program.csv", mime="text/csv", key="program_csv")
+            st.download_button(f"⬇️ Download {program_weeks}-week program (Markdown)", data=md_bytes,
+                               file_name="workout_program.md", mime="text/markdown", key="program_md")
 
     # Export tab
-    with tabs[-1]:
-        df = plan_to_dataframe(week_plan, include_videos)
-        st.dataframe(df, use_container_width=True)
-        csv = df.to_csv(index=False).encode("utf-8")
-        st.download_button("⬇️ Download as CSV", data=csv, file_name="workout_plan.csv", mime="text/csv")
-
-        md = markdown_plan(week_plan, include_videos).encode("utf-8")
-        st.download_button("⬇️ Download as Markdown", data=md, file_name="workout_plan.md", mime="text/markdown")
+    def render_export(exports: PlanExports, stage: str) -> None:
+        with METRICS.stage("render_export"):
+            show_export(exports, stage)
+
+    def show_export(exports: PlanExports, stage: str) -> None:
+        st.dataframe(exports.dataframe(), use_container_width=True)
+        volume = " · ".join(f"{p} {n}" for p, n in cols.pattern_volume().items())
+        st.caption(f"**Weekly volume (working sets):** {volume}")
+        st.download_button("⬇️ Download as CSV", data=exports.csv_bytes(), file_name="workout_plan.csv", mime="text/csv", key=f"csv_{stage}")
+        st.download_button("⬇️ Download as Markdown", data=exports.markdown_bytes(), file_name="workout_plan.md", mime="text/markdown", key=f"md_{stage}")
+
+    export_open = tabs[-1].open
+    if export_open:
+        with tabs[-1]:
+            export_box = st.empty()
+            with export_box.container():
+                if pending is not None and not pending.done():
+                    render_export(PlanExports(week_plan, pending.get, columns=cols), "initial")
+                    st.caption("Fetching demo videos… the Video column and downloads update when they're in.")
+                else:
+                    if stored["exports"] is None:
+                        if pending is not None:
+                            stored["videos"] = videos = pending.result()
+                        stored["exports"] = PlanExports(week_plan, videos.get if include_videos else None, columns=cols)
+                    render_export(stored["exports"], "final")
+
+    # Fill the video placeholders as lookups land, then store and show the final export
+    if pending is not None:
+        with METRICS.stage("video_wait"):
+            for name, vid, _ in pending.as_completed():
+                if vid:
+                    for slot in video_slots.pop(name, ()):
+                        show_video(slot, name, vid)
+        if stored["videos"] is None:
+            stored["videos"] = videos = pending.result()
+        if export_open and stored["exports"] is None:
+            stored["exports"] = PlanExports(week_plan, videos.get, columns=cols)
+            with export_box.container():
+                render_export(stored["exports"], "final")
+
+    if include_videos and videos is not None:
+        if videos.failed:
+            video_notice.info("Couldn't fetch YouTube video automatically. You can still use the search links.")
+        elif videos.throttled:
+            video_notice.info("Video lookups are paused to save today's YouTube quota. You can still use the search links.")
+
+
+# Debug Panel
+
+run = METRICS.end_trace(generated=bool(generate), plan=st.session_state.get("shared_link"))
+if METRICS.enabled:
+    if os.environ.get("METRICS_PROM_PATH"):
+        METRICS.write_prometheus(os.environ["METRICS_PROM_PATH"])
+    with st.sidebar:
+        with st.expander("🔧 Debug: timings & counters"):
+            if run is not None:
+                st.caption(f"This run: {run['total_ms']:.1f} ms · "
+                           + " · ".join(f"{k} {v:.1f}" for k, v in sorted(run["stages_ms"].items(), key=lambda kv: -kv[1])))
+            snap = METRICS.snapshot()
+            st.dataframe([{"stage": name, "calls": n, "mean ms": round(mean, 3), "p50 ms": round(p50, 3),
+                           "p99 ms": round(p99, 3)} for name, n, mean, p50, p99 in stage_table(snap)],
+                         use_container_width=True, hide_index=True)
+            st.json(snap["counters"], expanded=False)
+            for name in ("pool_cache", "plan_store"):
+                rate = snap["collectors"].get(name, {}).get("hit_rate")
+                if rate is not None:
+                    st.caption(f"{name} hit rate: {rate:.0%}")
+            st.download_button("⬇️ Prometheus metrics", data=METRICS.prometheus(), file_name="metrics.prom",
+                               mime="text/plain", key="metrics_prom")
+            if st.button("Reset timers", key="metrics_reset"):
+                METRICS.reset()
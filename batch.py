@@ -0,0 +1,247 @@
+"""Batch plan generation for whole member rosters.
+
+Reads profiles from CSV or JSONL and writes one plan per profile, using the same steps as
+the app's Generate button (videos off). Work is spread over a process pool; results are
+written in input order as they complete, so memory stays flat for large rosters.
+
+Profile fields use the sidebar labels:
+    id, goal, days, minutes, experience, equipment, limitations, focus, seed
+In CSV input the list fields are separated by ";" (e.g. "Bodyweight;Dumbbells").
+Each profile is validated on its own against the app's limits (labels, days 1-6, minutes
+20-90 in steps of 5, seed 0-10000), so every plan has a Plan Code; an invalid or failing
+profile gets {"id", "status": "error", "error"} in the jsonl output and is skipped by the
+other formats, the rest of the roster still runs.
+
+Output formats (picked from the output extension, or --format):
+    jsonl  {"id", "status", "markdown", "csv"} per profile; "markdown" and "csv" are
+           byte-identical to the app's Markdown / CSV downloads for the same inputs
+           and the Plan Code `<seed>+v2` (new plans use the `+v2` streams, streams.py)
+    csv    the app's CSV rows for every profile, prefixed with a "Profile" column
+    ndjson one typed record per plan item (exporters.RECORD_FIELDS), with "profile"
+    parquet  the same records as Parquet, written in record batches (needs pyarrow)
+
+    python batch.py roster.jsonl -o plans.jsonl --jobs 8
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List
+
+from planner import (EQUIPMENT_LABELS, EXPERIENCES, FOCUS_LABELS, GOAL_LABELS, LIMITATION_LABELS, _norm_equip,
+                     _contra_from_constraints, goal_key_from_label, generate_week)
+from exporters import ArrowWriter, CsvWriter, NdjsonWriter, markdown_plan, plan_records
+from plancode import MAX_SEED
+from streams import CURRENT
+
+LIST_FIELDS = ("equipment", "limitations", "focus")
+LIST_OPTIONS = {"equipment": EQUIPMENT_LABELS, "limitations": LIMITATION_LABELS, "focus": FOCUS_LABELS}
+# the app's limits, so that every profile's plan has a Plan Code (plancode.py)
+RANGES = {"days": (1, 6), "minutes": (20, 90), "seed": (0, MAX_SEED)}
+STEPS = {"minutes": 5}
+NO_MATCH = "No exercises matched your filters. Try adding more equipment or removing limitations."
+
+
+def _split(v) -> List[str]:
+    if isinstance(v, list):
+        return v
+    return [x.strip() for x in str(v or "").split(";") if x.strip()]
+
+
+def _int(row: Dict, field: str, default=None) -> int:
+    v = row.get(field)
+    if v is None or v == "":
+        if default is None:
+            raise ValueError(f"missing {field}")
+        return default
+    if isinstance(v, str):
+        digits = v.strip().lstrip("-")
+        if digits.isascii() and digits.isdigit():
+            v = int(v)
+    if not isinstance(v, int) or isinstance(v, bool):
+        raise ValueError(f"{field} must be an integer, got {v!r}")
+    lo, hi = RANGES[field]
+    if not lo <= v <= hi:
+        raise ValueError(f"{field} must be {lo}..{hi}, got {v}")
+    if v % STEPS.get(field, 1):
+        raise ValueError(f"{field} must be a multiple of {STEPS[field]}, got {v}")
+    return v
+
+
+def normalize_profile(row: Dict, n: int) -> Dict:
+    """A roster row as a profile dict; raises ValueError naming the first invalid field."""
+    if not isinstance(row, dict):
+        raise ValueError("expected an object")
+    for field, options in (("goal", GOAL_LABELS), ("experience", EXPERIENCES)):
+        if row.get(field) not in options:
+            raise ValueError(f"{field} {row.get(field)!r} is not one of {', '.join(options)}")
+    p = {"id": str(row.get("id") or n), "goal": row["goal"], "days": _int(row, "days"),
+         "minutes": _int(row, "minutes"), "experience": row["experience"]}
+    for field in LIST_FIELDS:
+        # "constraints" is the app's name for limitations
+        values = _split(row.get(field, row.get("constraints")) if field == "limitations" else row.get(field))
+        unknown = [v for v in values if v not in LIST_OPTIONS[field]]
+        if unknown:
+            raise ValueError(f"unknown {field} {', '.join(map(repr, unknown))}")
+        p[field] = values
+    p["seed"] = _int(row, "seed", 0)
+    return p
+
+
+def read_profiles(path: str) -> Iterator[Dict]:
+    """Yield normalized profile dicts from a .csv or .jsonl file.
+
+    An invalid row yields {"id", "error"} instead, so one bad row doesn't stop the roster.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            rows: Iterable = csv.DictReader(f)
+        else:
+            rows = (line for line in f if line.strip())
+        for n, row in enumerate(rows):
+            try:
+                if isinstance(row, str):
+                    row = json.loads(row)
+                yield normalize_profile(row, n)
+            except ValueError as e:  # json.JSONDecodeError included
+                pid = row.get("id") if isinstance(row, dict) else None
+                yield {"id": str(pid or n), "error": str(e)}
+
+
+def plan_for_profile(p: Dict, records: bool = False) -> Dict:
+    """Markdown and CSV text for one profile, or its typed item records if `records`."""
+    if "error" in p:
+        return {"id": p["id"], "status": "error", "error": p["error"]}
+    try:
+        goal_key = goal_key_from_label(p["goal"])
+        week_plan = generate_week(goal_key, p["days"], p["minutes"], p["experience"], _norm_equip(p["equipment"]),
+                                  _contra_from_constraints(p["limitations"]), p["focus"], p["seed"], streams=CURRENT)
+    except Exception as e:  # one broken profile must not abort the roster
+        return {"id": p["id"], "status": "error", "error": f"{type(e).__name__}: {e}"}
+    if week_plan is None:
+        return {"id": p["id"], "status": "no_match", "error": NO_MATCH}
+    if records:
+        return {"id": p["id"], "status": "ok", "records": list(plan_records(week_plan))}
+    buf = io.StringIO()
+    CsvWriter(buf).write(week_plan)
+    return {
+        "id": p["id"],
+        "status": "ok",
+        "markdown": markdown_plan(week_plan),
+        "csv": buf.getvalue(),
+    }
+
+
+def _run_chunk(chunk: List[Dict], records: bool = False) -> List[Dict]:
+    return [plan_for_profile(p, records) for p in chunk]
+
+
+def generate_all(profiles: Iterable[Dict], jobs: int, chunksize: int = 64, records: bool = False) -> Iterator[Dict]:
+    """Plans in input order; at most `jobs * 4` chunks are in flight at once."""
+    if jobs <= 1:
+        for p in profiles:
+            yield plan_for_profile(p, records)
+        return
+
+    def chunks():
+        buf = []
+        for p in profiles:
+            buf.append(p)
+            if len(buf) == chunksize:
+                yield buf
+                buf = []
+        if buf:
+            yield buf
+
+    with ProcessPoolExecutor(max_workers=jobs) as ex:
+        pending = []
+        for chunk in chunks():
+            pending.append(ex.submit(_run_chunk, chunk, records))
+            if len(pending) >= jobs * 4:
+                yield from pending.pop(0).result()
+        for fut in pending:
+            yield from fut.result()
+
+
+def write_jsonl(results: Iterable[Dict], out) -> int:
+    n = 0
+    for r in results:
+        out.write(json.dumps(r, ensure_ascii=False) + "\n")
+        n += 1
+    return n
+
+
+def write_csv(results: Iterable[Dict], out) -> int:
+    w = csv.writer(out, lineterminator="\n")
+    header_done = False
+    n = 0
+    for r in results:
+        n += 1
+        if r["status"] != "ok":
+            continue
+        rows = csv.reader(io.StringIO(r["csv"]))
+        header = next(rows)
+        if not header_done:
+            w.writerow(["Profile"] + header)
+            header_done = True
+        for row in rows:
+            w.writerow([r["id"]] + row)
+    return n
+
+
+def write_records(results: Iterable[Dict], writer) -> int:
+    """Item records of every planned profile into an `NdjsonWriter` / `ArrowWriter` keyed by "profile"."""
+    n = 0
+    for r in results:
+        n += 1
+        if r["status"] == "ok":
+            writer.write_records(r["records"], r["id"])
+    return n
+
+
+def write_ndjson(results: Iterable[Dict], out) -> int:
+    return write_records(results, NdjsonWriter(out, keys=("profile",)))
+
+
+def write_parquet(results: Iterable[Dict], out) -> int:
+    with ArrowWriter(out, keys=("profile",)) as writer:
+        return write_records(results, writer)
+
+
+WRITERS = {"jsonl": write_jsonl, "csv": write_csv, "ndjson": write_ndjson, "parquet": write_parquet}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("profiles", help="roster file (.csv or .jsonl)")
+    ap.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    ap.add_argument("--format", choices=list(WRITERS), help="default: from the output extension, else jsonl")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="worker processes (default: all cores)")
+    ap.add_argument("--chunksize", type=int, default=64, help="profiles per worker task")
+    args = ap.parse_args(argv)
+
+    ext = os.path.splitext(args.output)[1].lstrip(".")
+    fmt = args.format or (ext if ext in WRITERS else "jsonl")
+    writer = WRITERS[fmt]
+
+    start = time.perf_counter()
+    results = generate_all(read_profiles(args.profiles), args.jobs, args.chunksize, records=fmt in ("ndjson", "parquet"))
+    if args.output == "-":
+        n = writer(results, sys.stdout.buffer if fmt == "parquet" else sys.stdout)
+    elif fmt == "parquet":
+        with open(args.output, "wb") as out:
+            n = writer(results, out)
+    else:
+        with open(args.output, "w", newline="", encoding="utf-8") as out:
+            n = writer(results, out)
+    elapsed = time.perf_counter() - start
+    print(f"{n} profiles in {elapsed:.2f}s ({n / elapsed if elapsed else 0:.0f} profiles/s, {args.jobs} jobs)",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Linear-scan filter vs. the bitmask CatalogIndex on synthetic catalogs.
+
+    python benchmarks/catalog_filter.py [--sizes 36 1000 10000]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import EXERCISES, LEVEL_ORDER, CatalogIndex  # noqa: E402
+from planner import filter_exercises  # noqa: E402
+from synthetic import synthetic_catalog  # noqa: E402
+
+QUERIES = [
+    ("hypertrophy", ["bodyweight", "dumbbells"], "beginner", []),
+    ("strength", ["barbell", "dumbbells", "pullup_bar"], "intermediate", ["knee"]),
+    ("general", ["bodyweight"], "advanced", ["wrist", "impact"]),
+    ("fatloss", ["kettlebell", "bands", "bodyweight"], "beginner", ["lumbar_flexion"]),
+]
+
+
+def linear_filter(exercises, goal_key, equip_norm, min_level, avoid):
+    """The pre-index implementation, kept here as the reference."""
+    level_min = LEVEL_ORDER[min_level]
+    out = []
+    for ex in exercises:
+        if LEVEL_ORDER[ex["level_min"]] > level_min:
+            continue
+        if not any(e in equip_norm for e in ex["equipment"]):
+            continue
+        if any(a in ex["contra"] for a in avoid):
+            continue
+        if goal_key not in ["general", "mobility"] and goal_key not in ex["goal_tags"]:
+            continue
+        out.append(ex)
+    return out
+
+
+def per_call_us(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[len(EXERCISES), 1_000, 10_000])
+    args = ap.parse_args()
+
+    print(f"{'catalog':>8} {'build ms':>9} {'linear us':>10} {'mask us':>8} {'mask+select us':>15} {'speedup':>8}")
+    for n in args.sizes:
+        exs = EXERCISES if n == len(EXERCISES) else synthetic_catalog(n)
+        build_ms = min(timeit.repeat(lambda: CatalogIndex(exs), number=1, repeat=3)) * 1e3
+        idx = CatalogIndex(exs)
+        number = max(10, 20_000 // n)
+        lin = mask = full = 0.0
+        for q in QUERIES:
+            assert [e["name"] for e in linear_filter(exs, *q)] == [e.name for e in filter_exercises(*q, index=idx)]
+            lin += per_call_us(lambda: linear_filter(exs, *q), number)
+            mask += per_call_us(lambda: idx.filter_mask(*q), number)
+            full += per_call_us(lambda: filter_exercises(*q, index=idx), number)
+        k = len(QUERIES)
+        print(f"{n:>8} {build_ms:>9.2f} {lin / k:>10.1f} {mask / k:>8.2f} {full / k:>15.1f} {lin / full:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Process start with an external catalog: full parse + validation vs. the compiled cache.
+
+Writes synthetic catalogs (JSON and CSV) to a temp dir and times `import planner` with
+WORKOUT_CATALOG pointing at them, each run in a fresh interpreter: once with the cache
+cleared before every run ("compile"), once with it in place ("cached"). The built-in
+catalog is the reference.
+
+    python benchmarks/catalog_load.py [--sizes 1000 10000] [--runs 5]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from catalog_loader import cache_path, write_catalog  # noqa: E402
+from synthetic import synthetic_catalog  # noqa: E402
+
+PROBE = """
+import time
+t0 = time.perf_counter()
+import planner
+print(time.perf_counter() - t0, len(planner.CATALOG))
+"""
+
+
+def time_import(env: dict) -> tuple:
+    out = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, env=env, capture_output=True, text=True)
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr.strip().splitlines()[-1])
+    secs, n = out.stdout.split()
+    return float(secs) * 1000, int(n)
+
+
+def measure(path, runs: int, cache_dir: str, clear: bool) -> tuple:
+    env = dict(os.environ)
+    env.pop("WORKOUT_CATALOG", None)
+    if path:
+        env["WORKOUT_CATALOG"] = path
+    samples, n = [], 0
+    for _ in range(runs):
+        if clear and path:
+            try:
+                os.remove(cache_path(path, cache_dir))
+            except OSError:
+                pass
+        ms, n = time_import(env)
+        samples.append(ms)
+    return statistics.median(samples), min(samples), n
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000])
+    ap.add_argument("--runs", type=int, default=5)
+    args = ap.parse_args()
+
+    from catalog_loader import DEFAULT_CACHE_DIR
+
+    tmp = tempfile.mkdtemp(prefix="catalog_load_")
+    try:
+        print(f"{'catalog':<24} {'mode':<8} {'exercises':>9} {'median ms':>10} {'min ms':>8}  (import planner)")
+        med, best, n = measure(None, args.runs, DEFAULT_CACHE_DIR, clear=False)
+        print(f"{'built-in':<24} {'-':<8} {n:>9} {med:>10.1f} {best:>8.1f}")
+        for size in args.sizes:
+            entries = synthetic_catalog(size)
+            for ext in ("json", "csv"):
+                path = os.path.join(tmp, f"synthetic-{size}.{ext}")
+                write_catalog(entries, path)
+                for mode, clear in (("compile", True), ("cached", False)):
+                    if not clear:
+                        measure(path, 1, DEFAULT_CACHE_DIR, clear=False)  # write the cache
+                    med, best, n = measure(path, args.runs, DEFAULT_CACHE_DIR, clear)
+                    print(f"{os.path.basename(path):<24} {mode:<8} {n:>9} {med:>10.1f} {best:>8.1f}")
+                try:
+                    os.remove(cache_path(path, DEFAULT_CACHE_DIR))
+                except OSError:
+                    pass
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
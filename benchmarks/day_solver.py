@@ -0,0 +1,94 @@
+"""Greedy day builder vs. the knapsack solver: budget fill and latency.
+
+For every (goal, minutes, experience, equipment, seed) and every day of a 3- and 6-day
+week, builds the day both ways from the same weighted pool and reports:
+
+    fill      seconds used / minutes*60 (warm-up included)
+    in-budget fill counting only seconds within the budget
+    over      share of days that overrun the budget
+    cover     share of the day's patterns that got an exercise
+    caps      share of days within the level's min/max exercise caps
+    latency   mean / p99 per day build
+
+With the default 10 seeds that is 16200 days per mode. Last run:
+
+    mode       days   fill in-budget   over  cover   caps  mean us   p99 us
+    greedy    16200  76.0%     73.9%   9.2%  78.1%  82.0%       87      205
+    solver    16200  75.9%     73.7%   6.7%  78.3%  77.8%      257      514
+
+The solver only overruns when no solution fits (or for the must-have lifts), so it
+runs over budget on fewer days; it reaches the level's minimum less often (caps)
+instead, and is about 3x slower.
+
+    python benchmarks/day_solver.py [--seeds 10]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from planner import (  # noqa: E402
+    LEVEL_CAPS, build_day_plan, candidate_pool, estimate_exercise_time_sec, patterns_for_week,
+)
+
+GOALS = ["hypertrophy", "strength", "fatloss", "general", "mobility"]
+MINUTES = [20, 30, 45, 60, 75, 90]
+EXPERIENCES = ["Beginner", "Intermediate", "Advanced"]
+EQUIPMENT = [["bodyweight", "dumbbells"], ["bodyweight", "dumbbells", "barbell", "pullup_bar", "kettlebell", "bands"]]
+
+
+def run(mode: str, seeds: int) -> dict:
+    fill, inside, over, cover, caps, lat = [], [], 0, [], 0, []
+    for goal in GOALS:
+        for equip in EQUIPMENT:
+            for exp in EXPERIENCES:
+                pool = candidate_pool(goal, equip, exp, [], ["Full Body"])
+                cap = LEVEL_CAPS[exp]
+                for minutes in MINUTES:
+                    budget = minutes * 60
+                    for days in (3, 6):
+                        for i, patterns in enumerate(patterns_for_week(days, goal)):
+                            for seed in range(seeds):
+                                rng = random.Random(seed * 1000 + i)
+                                t0 = time.perf_counter()
+                                day = build_day_plan(pool, patterns, rng, goal, exp, minutes, mode)
+                                lat.append(time.perf_counter() - t0)
+                                used = sum(estimate_exercise_time_sec(x) for x in day)
+                                fill.append(used / budget)
+                                inside.append(min(used, budget) / budget)
+                                over += used > budget
+                                got = {x["pattern"] for x in day[1:]}
+                                cover.append(len(got & set(patterns)) / len(set(patterns)))
+                                caps += cap["min"] <= len(day) - 1 <= cap["max"]
+    n = len(fill)
+    lat.sort()
+    return {
+        "days": n,
+        "fill": statistics.mean(fill),
+        "inside": statistics.mean(inside),
+        "over": over / n,
+        "cover": statistics.mean(cover),
+        "caps": caps / n,
+        "mean_us": statistics.mean(lat) * 1e6,
+        "p99_us": lat[int(0.99 * (n - 1))] * 1e6,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--seeds", type=int, default=10)
+    args = ap.parse_args()
+
+    print(f"{'mode':<8} {'days':>6} {'fill':>6} {'in-budget':>9} {'over':>6} {'cover':>6} {'caps':>6} {'mean us':>8} {'p99 us':>8}")
+    for mode in ("greedy", "solver"):
+        r = run(mode, args.seeds)
+        print(f"{mode:<8} {r['days']:>6} {r['fill']:>6.1%} {r['inside']:>9.1%} {r['over']:>6.1%} {r['cover']:>6.1%} "
+              f"{r['caps']:>6.1%} {r['mean_us']:>8.0f} {r['p99_us']:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""Load test for server.py: requests/s and tail latency at a given concurrency.
+
+Starts a local server (`--workers` build processes, a free port) unless `--url` points
+at a running one, then keeps `--concurrency` keep-alive connections busy with
+POST /v1/plans for `--requests` requests per mix:
+
+* cold   – every request is a different plan, so each one is built (worker pool bound),
+* warm   – requests drawn from `--distinct` plans, mostly answered from the response cache,
+* burst  – all connections ask for the same new plan at once, repeatedly (coalescing).
+
+    python benchmarks/load_test.py [--concurrency 64] [--requests 3000] [--workers 4]
+    python benchmarks/load_test.py --url http://127.0.0.1:8080 --mixes warm
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from planner import EQUIPMENT_LABELS, EXPERIENCES, FOCUS_LABELS, GOAL_LABELS  # noqa: E402
+from plancode import MAX_SEED  # noqa: E402
+
+
+def random_profile(rng: random.Random, seed: int) -> dict:
+    return {
+        "goal": rng.choice(GOAL_LABELS), "days": rng.randint(2, 6), "minutes": rng.randrange(30, 91, 5),
+        "experience": rng.choice(EXPERIENCES),
+        "equipment": ["Bodyweight"] + rng.sample(EQUIPMENT_LABELS[1:], rng.randint(1, 3)),
+        "focus": rng.sample(FOCUS_LABELS, rng.randint(0, 2)), "plan_code": str(seed),
+    }
+
+
+def bodies(mix: str, n: int, distinct: int, rng: random.Random, concurrency: int) -> list:
+    """Encoded request bodies for one mix, in send order."""
+    if mix == "cold":
+        return [json.dumps(random_profile(rng, i % (MAX_SEED + 1))).encode() for i in range(n)]
+    if mix == "warm":
+        pool = [json.dumps(random_profile(rng, rng.randrange(MAX_SEED + 1))).encode() for _ in range(distinct)]
+        return [rng.choice(pool) for _ in range(n)]
+    # burst: one new plan per wave of `concurrency` requests
+    waves = [json.dumps(random_profile(rng, rng.randrange(MAX_SEED + 1))).encode()
+             for _ in range(-(-n // concurrency))]
+    return [waves[i // concurrency] for i in range(n)]
+
+
+class Client:
+    """One keep-alive HTTP/1.1 connection."""
+
+    def __init__(self, host: str, port: int):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, method: str, path: str, body: bytes = b"") -> tuple:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: application/json\r\n"
+                          f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        length, close = 0, False
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+            elif name.lower() == "connection":
+                close = value.strip().lower() == "close"
+        payload = await self.reader.readexactly(length)
+        if close:
+            await self.close()
+        return status, payload
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+async def run_mix(host: str, port: int, reqs: list, concurrency: int) -> dict:
+    latencies, statuses = [], {}
+    queue = iter(reqs)
+
+    async def worker():
+        client = Client(host, port)
+        try:
+            for body in queue:
+                t0 = time.perf_counter()
+                status, _ = await client.request("POST", "/v1/plans", body)
+                latencies.append(time.perf_counter() - t0)
+                statuses[status] = statuses.get(status, 0) + 1
+        finally:
+            await client.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return {"seconds": time.perf_counter() - start, "latencies": sorted(latencies), "statuses": statuses}
+
+
+async def server_stats(host: str, port: int) -> dict:
+    client = Client(host, port)
+    try:
+        return json.loads((await client.request("GET", "/v1/stats"))[1])
+    finally:
+        await client.close()
+
+
+def start_server(workers: int) -> tuple:
+    proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "server.py"), "--port", "0", "--workers",
+                             str(workers)], cwd=ROOT, stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()
+    if not line.startswith("listening on"):
+        proc.kill()
+        sys.exit(f"server didn't start: {line!r}")
+    url = urlsplit(line.split()[2])
+    return proc, url.hostname, url.port
+
+
+def pct(ordered: list, q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--url", help="running server (default: start one locally)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="build processes of the local server")
+    ap.add_argument("--concurrency", type=int, default=64)
+    ap.add_argument("--requests", type=int, default=3000, help="requests per mix")
+    ap.add_argument("--distinct", type=int, default=200, help="plans in the warm mix")
+    ap.add_argument("--mixes", nargs="+", default=["cold", "warm", "burst"], choices=["cold", "warm", "burst"])
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    proc = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        proc, host, port = start_server(args.workers)
+    try:
+        rng = random.Random(args.seed)
+        label = args.url or f"local server, {args.workers} workers"
+        print(f"{label} · concurrency {args.concurrency} · {args.requests} requests per mix")
+        print(f"{'mix':<6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+              f"{'builds':>7} {'hits':>6} {'shared':>7}  statuses")
+        for mix in args.mixes:
+            reqs = bodies(mix, args.requests, args.distinct, rng, args.concurrency)
+            before = asyncio.run(server_stats(host, port))
+            res = asyncio.run(run_mix(host, port, reqs, args.concurrency))
+            after = asyncio.run(server_stats(host, port))
+            lat = res["latencies"]
+            delta = {k: after[k] - before[k] for k in ("builds", "cache_hits", "coalesced")}
+            print(f"{mix:<6} {len(lat) / res['seconds']:>8.0f} {pct(lat, 0.5):>8.1f} {pct(lat, 0.95):>8.1f} "
+                  f"{pct(lat, 0.99):>8.1f} {lat[-1] * 1000:>8.1f} {delta['builds']:>7} {delta['cache_hits']:>6} "
+                  f"{delta['coalesced']:>7}  {dict(sorted(res['statuses'].items()))}")
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Week and multi-week generation: sequential vs. a process pool, for both stream schemes.
+
+Checks first that every day built alone, in shuffled order, and every plan built on the
+pool equals the sequential plan, then times:
+
+* week    – `base_week` for a 6-day plan (days built concurrently),
+* program – a `--weeks`-week program from that plan (weeks built concurrently),
+* streams – creating one day's random stream (legacy seed vs. hierarchical key).
+
+    python benchmarks/parallel_week.py [--workers 4] [--weeks 52] [--runs 20]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from edits import PlanSpec  # noqa: E402
+from periodization import base_week, program  # noqa: E402
+from planner import build_week_day  # noqa: E402
+from streams import HIERARCHICAL, LEGACY, day_rng  # noqa: E402
+
+SCHEMES = {"legacy": LEGACY, "v2": HIERARCHICAL}
+
+
+def spec_for(seed: int, streams: int) -> PlanSpec:
+    return PlanSpec("hypertrophy", 6, 60, "Intermediate", ("bodyweight", "dumbbells", "barbell", "pullup_bar"), (),
+                    ("Upper Body",), seed, streams)
+
+
+def check(executor, seeds: int, weeks: int) -> None:
+    rng = random.Random(0)
+    for streams in SCHEMES.values():
+        for seed in range(seeds):
+            spec = spec_for(seed, streams)
+            plan = base_week(spec)
+            order = list(plan)
+            rng.shuffle(order)
+            alone = {d: build_week_day(spec.goal_key, spec.days, spec.minutes, spec.experience,
+                                       list(spec.equip_norm), list(spec.avoid), list(spec.focus), seed, "greedy",
+                                       streams, d) for d in order}
+            assert alone == plan, f"seed {seed}: days built out of order differ"
+            assert base_week(spec, executor=executor) == plan, f"seed {seed}: pooled week differs"
+        assert list(program(spec, weeks, executor=executor)) == list(program(spec, weeks)), "pooled program differs"
+
+
+def timed(fn, runs: int) -> float:
+    samples = []
+    for i in range(runs):
+        t0 = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--weeks", type=int, default=52)
+    ap.add_argument("--runs", type=int, default=20)
+    args = ap.parse_args()
+
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        check(executor, seeds=10, weeks=args.weeks)
+        print(f"identical results: days in any order, pooled weeks and programs ({args.workers} workers, "
+              f"{os.cpu_count()} cores)")
+        print(f"{'task':<24} {'scheme':<7} {'sequential ms':>14} {'pool ms':>9}")
+        for name, streams in SCHEMES.items():
+            seq = timed(lambda i: base_week(spec_for(1000 + i, streams)), args.runs)
+            par = timed(lambda i: base_week(spec_for(2000 + i, streams), executor=executor), args.runs)
+            print(f"{'week (6 days)':<24} {name:<7} {seq:>14.2f} {par:>9.2f}")
+        for name, streams in SCHEMES.items():
+            base = base_week(spec_for(7, streams))
+            seq = timed(lambda i: list(program(spec_for(7, streams), args.weeks, base=base)), args.runs)
+            par = timed(lambda i: list(program(spec_for(7, streams), args.weeks, base=base, executor=executor)),
+                        args.runs)
+            print(f"{f'program ({args.weeks} weeks)':<24} {name:<7} {seq:>14.2f} {par:>9.2f}")
+    for name, streams in SCHEMES.items():
+        n = 20_000
+        t0 = time.perf_counter()
+        for i in range(n):
+            day_rng(i, i % 6, 0, streams)
+        print(f"{'day stream':<24} {name:<7} {(time.perf_counter() - t0) * 1e6 / n:>11.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
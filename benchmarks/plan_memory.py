@@ -0,0 +1,63 @@
+"""Retained memory of week plans: merged dicts vs. slotted PlanItems.
+
+Plans are generated once with the current planner; the "dict" case then rebuilds the old
+`{**exercise, **scheme}` representation from them, so both cases hold the same content.
+
+    python benchmarks/plan_memory.py [--plans 10000]
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from planner import generate_week  # noqa: E402
+
+PROFILES = [
+    ("hypertrophy", 6, 60, "Intermediate", ["bodyweight", "dumbbells", "barbell", "pullup_bar"], [], ["Full Body"]),
+    ("strength", 4, 75, "Advanced", ["barbell", "dumbbells", "pullup_bar"], ["knee"], ["Upper Body"]),
+    ("general", 3, 45, "Beginner", ["bodyweight", "dumbbells"], ["wrist"], ["Core"]),
+    ("fatloss", 5, 30, "Beginner", ["bodyweight", "kettlebell"], ["impact"], ["Full Body"]),
+]
+
+
+def make_plans(n: int) -> list:
+    return [generate_week(*PROFILES[i % len(PROFILES)], seed=i) for i in range(n)]
+
+
+def as_dicts(plans: list) -> list:
+    return [{d: [it.as_dict() for it in items] for d, items in plan.items()} for plan in plans]
+
+
+def measure(build) -> tuple:
+    tracemalloc.start()
+    obj = build()
+    snap = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = snap.statistics("filename")
+    return obj, sum(s.size for s in stats), sum(s.count for s in stats)
+
+
+def report(label: str, n_plans: int):
+    make_plans(len(PROFILES))  # warm pool and scheme caches; those are shared, not per plan
+    plans, slot_bytes, slot_blocks = measure(lambda: make_plans(n_plans))
+    n_items = sum(len(items) for plan in plans for items in plan.values())
+    _, dict_bytes, dict_blocks = measure(lambda: as_dicts(plans))
+    print(f"{label}: {n_plans} plan(s), {n_items} items")
+    print(f"  {'representation':<16} {'KiB':>10} {'bytes/item':>11} {'blocks':>9}")
+    for name, b, c in (("merged dicts", dict_bytes, dict_blocks), ("PlanItem", slot_bytes, slot_blocks)):
+        print(f"  {name:<16} {b / 1024:>10.1f} {b / n_items:>11.0f} {c:>9}")
+    print(f"  saving: {1 - slot_bytes / dict_bytes:.0%}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--plans", type=int, default=10_000)
+    args = ap.parse_args()
+    report("6-day plan", 1)
+    report("batch", args.plans)
+
+
+if __name__ == "__main__":
+    main()
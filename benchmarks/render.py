@@ -0,0 +1,88 @@
+"""Streamlit render cost of a plan page: script time, delta messages and bytes per run.
+
+Drives app.py headless with Streamlit's AppTest and counts every delta the script
+sends to the browser (each is one websocket message in a real session). The runs are:
+
+* generate – the click that builds and shows the plan,
+* rerun    – any later interaction (a toggle, a download, a tab switch),
+* tab      – switching to another day tab (lazy tabs render only the open one).
+
+    python benchmarks/render.py [--days 6] [--runs 7] [--app app.py]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ["PLAN_STORE_PATH"] = ""  # memory-only plan store, nothing written to .cache
+
+from streamlit.runtime.forward_msg_queue import ForwardMsgQueue  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+_sent = {"deltas": 0, "bytes": 0}
+_enqueue = ForwardMsgQueue.enqueue
+
+
+def _counting_enqueue(self, msg):
+    if msg.HasField("delta"):
+        _sent["deltas"] += 1
+        _sent["bytes"] += msg.ByteSize()
+    return _enqueue(self, msg)
+
+
+ForwardMsgQueue.enqueue = _counting_enqueue
+
+
+def measured(run) -> tuple:
+    """(ms, deltas, bytes) of one script run."""
+    _sent.update(deltas=0, bytes=0)
+    t0 = time.perf_counter()
+    run()
+    return (time.perf_counter() - t0) * 1000, _sent["deltas"], _sent["bytes"]
+
+
+def new_session(app: str, days: int) -> AppTest:
+    at = AppTest.from_file(app, default_timeout=60)
+    at.run()
+    at.slider(key="days").set_value(days).run()
+    return at
+
+
+def generate(at: AppTest) -> None:
+    [b for b in at.button if "Generate" in b.label][0].click().run()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--days", type=int, default=6)
+    ap.add_argument("--runs", type=int, default=7)
+    ap.add_argument("--app", default=os.path.join(ROOT, "app.py"))
+    args = ap.parse_args()
+
+    results = {"generate": [], "rerun": [], "tab": []}
+    for _ in range(args.runs):
+        at = new_session(args.app, args.days)
+        results["generate"].append(measured(lambda: generate(at)))
+        if at.exception:
+            sys.exit(f"app raised: {at.exception}")
+        at.run()  # settle: the first rerun after a click can differ
+        results["rerun"].append(measured(at.run))
+        if "plan_tab" in at.session_state:
+            at.session_state["plan_tab"] = f"Day {args.days}"
+            results["tab"].append(measured(at.run))
+
+    print(f"{os.path.relpath(args.app, ROOT)} · {args.days}-day plan · {args.runs} sessions")
+    print(f"{'run':<10} {'median ms':>10} {'min ms':>8} {'deltas':>7} {'KiB':>7}")
+    for name, rows in results.items():
+        if not rows:
+            print(f"{name:<10} {'n/a (no tab state)':>34}")
+            continue
+        ms = [r[0] for r in rows]
+        print(f"{name:<10} {statistics.median(ms):>10.1f} {min(ms):>8.1f} {rows[-1][1]:>7} {rows[-1][2] / 1024:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
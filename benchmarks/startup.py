@@ -0,0 +1,63 @@
+"""Cold-start import timing: headless planner core vs. the old eager import set.
+
+Each measurement runs in a fresh interpreter so nothing is already in sys.modules.
+
+    python benchmarks/startup.py [--runs 7]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ["streamlit", "pandas", "googleapiclient"]
+
+CASES = {
+    # what `import app` used to pull in before the UI/core split
+    "eager (streamlit + pandas + googleapiclient)":
+        "import streamlit, pandas, googleapiclient.discovery",
+    "planner": "import planner",
+    "planner + exporters": "import planner, exporters",
+}
+
+PROBE = """
+import sys, time
+t0 = time.perf_counter()
+{stmt}
+dt = time.perf_counter() - t0
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(dt, ",".join(heavy))
+"""
+
+
+def time_import(stmt: str) -> tuple:
+    code = PROBE.format(stmt=stmt, heavy=HEAVY)
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    if out.returncode != 0:
+        return None, out.stderr.strip().splitlines()[-1]
+    secs, heavy = out.stdout.strip().split(" ", 1) if " " in out.stdout.strip() else (out.stdout.strip(), "")
+    return float(secs), heavy
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--runs", type=int, default=7)
+    args = ap.parse_args()
+
+    print(f"{'case':<46} {'median ms':>10} {'min ms':>8}  heavy modules loaded")
+    for label, stmt in CASES.items():
+        samples, heavy = [], ""
+        for _ in range(args.runs):
+            secs, heavy = time_import(stmt)
+            if secs is None:
+                break
+            samples.append(secs * 1000)
+        if not samples:
+            print(f"{label:<46} {'n/a':>10} {'':>8}  ({heavy})")
+            continue
+        print(f"{label:<46} {statistics.median(samples):>10.1f} {min(samples):>8.1f}  {heavy or '-'}")
+
+
+if __name__ == "__main__":
+    main()
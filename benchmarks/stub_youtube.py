@@ -0,0 +1,118 @@
+"""Local stand-in for the YouTube Data API search endpoint.
+
+    with StubYouTube(latency=0.1) as stub:
+        client = YouTubeClient("key", base_url=stub.base_url)
+
+Answers GET /youtube/v3/search with a deterministic fake videoId per query (or no items
+for queries containing "nomatch"; HTTP 500 for "fail"; HTTP 403 quotaExceeded for
+"quota"), after `latency` seconds. Counts
+requests and TCP connections so callers can check reuse and coalescing.
+
+`StubSearchClient` gives the same answers in-process, without sockets, for benchmarks
+that time the resolver rather than the network.
+"""
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+
+def fake_video_id(query: str) -> str:
+    return hashlib.sha1(query.encode("utf-8")).hexdigest()[:11]
+
+
+class StubSearchClient:
+    """Drop-in for `YouTubeClient` answering like the stub server, without HTTP."""
+
+    def __init__(self):
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def search_video_id(self, query: str):
+        from videos import YouTubeError
+
+        with self._lock:
+            self.requests += 1
+        if "quota" in query:
+            raise YouTubeError("search failed with HTTP 403", 403, "quotaExceeded")
+        if "fail" in query:
+            raise YouTubeError("search failed with HTTP 500", 500)
+        return None if "nomatch" in query else fake_video_id(query)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def setup(self):
+        super().setup()
+        with self.server.stats_lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        q = parse_qs(url.query).get("q", [""])[0]
+        with self.server.stats_lock:
+            self.server.requests += 1
+            self.server.queries.append(q)
+        time.sleep(self.server.latency)
+        if not url.path.endswith("/search"):
+            status, payload = 404, {"error": "not found"}
+        elif "quota" in q:
+            status, payload = 403, {"error": {"code": 403, "errors": [{"reason": "quotaExceeded"}]}}
+        elif "fail" in q:
+            status, payload = 500, {"error": "backend error"}
+        elif "nomatch" in q:
+            status, payload = 200, {"items": []}
+        else:
+            status, payload = 200, {"items": [{"id": {"kind": "youtube#video", "videoId": fake_video_id(q)}}]}
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubYouTube:
+    def __init__(self, latency: float = 0.0):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.server.daemon_threads = True
+        self.server.latency = latency
+        self.server.stats_lock = threading.Lock()
+        self.reset()
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/youtube/v3"
+
+    @property
+    def requests(self) -> int:
+        return self.server.requests
+
+    @property
+    def connections(self) -> int:
+        return self.server.connections
+
+    @property
+    def queries(self) -> list:
+        return list(self.server.queries)
+
+    def reset(self):
+        self.server.requests = 0
+        self.server.connections = 0
+        self.server.queries = []
+
+    def __enter__(self) -> "StubYouTube":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,319 @@
+"""Planner benchmark suite: per-stage latency and allocations over the parameter space.
+
+Sweeps days x minutes x goals x levels x equipment/limitation combinations against the
+built-in catalog and synthetic 1k / 10k catalogs, and times every stage of a Generate:
+
+    filter     CatalogIndex mask + select (once per goal/level/equipment/limitations)
+    weight     emphasize() into a WeightedPool (same)
+    build      build_day_plan for every day of the week
+    summarize  WeekColumns + day summaries
+    videos     VideoResolver.prefetch of the plan's exercises with an in-memory cache and
+               the in-process stub client (stub_youtube.py): offline, no sockets, so it
+               times the resolver (cache, coalescing, pool), not a network
+    export     streaming CSV and Markdown with video links, to a null sink
+
+Latency is measured on every call, `--repeat` times, keeping each call's fastest run
+(so transient machine noise drops out; the videos stage is then warm-cache); allocations (peak and retained KiB per call, via
+tracemalloc) on a separate pass over every `--alloc-every`-th configuration, so the
+tracing overhead doesn't distort the timings. A digest of all generated plans is
+recorded too, to tell a faster change from one that also changed the plans.
+
+Results are JSON (`--out`). `--save-baseline` writes them as the baseline, `--compare`
+checks them against it: a stage regresses when its p50 / p95 latency or allocations
+exceed the baseline by more than the thresholds stored in the baseline file (and by
+more than a small absolute floor). Exit status 1 on regression. Baselines are
+machine-specific; keep one per machine/CI runner. A fixed pure-Python calibration
+workload is timed throughout each catalog's timing passes, and latencies are compared
+after scaling by the ratio of its median to the baseline's, so a machine that is busier or throttled for the whole block
+isn't reported as a regression in every stage.
+
+    python benchmarks/suite.py --grid quick --save-baseline
+    python benchmarks/suite.py --grid quick --compare
+"""
+import argparse
+import gc
+import hashlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from itertools import product
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import EXERCISES, CatalogIndex  # noqa: E402
+from columnar import WeekColumns  # noqa: E402
+from exporters import CsvWriter, write_markdown  # noqa: E402
+from planner import _contra_from_constraints, _norm_equip, build_day_plan, emphasize, patterns_for_week  # noqa: E402
+from quota import QuotaGovernor  # noqa: E402
+from stub_youtube import StubSearchClient  # noqa: E402
+from synthetic import synthetic_catalog  # noqa: E402
+from video_cache import VideoCache  # noqa: E402
+from videos import VideoResolver  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "suite.json")
+RESULTS_VERSION = 1
+STAGES = ("filter", "weight", "build", "summarize", "videos", "export_csv", "export_md")
+
+GOALS = ["hypertrophy", "strength", "fatloss", "general", "mobility"]
+LEVELS = ["Beginner", "Intermediate", "Advanced"]
+EQUIPMENT_SETS = {
+    "bodyweight": ["Bodyweight"],
+    "home": ["Bodyweight", "Dumbbells", "Resistance Bands"],
+    "barbell": ["Barbell", "Pull-up Bar"],
+    "gym": ["Bodyweight", "Dumbbells", "Barbell", "Kettlebell", "Resistance Bands", "Pull-up Bar", "Machines"],
+}
+LIMITATION_SETS = {
+    "none": [],
+    "knee": ["No deep knee flexion"],
+    "back+shoulder": ["Lower back sensitive", "Shoulder sensitive"],
+}
+FOCUS_BY_GOAL = {"hypertrophy": ["Upper Body"], "strength": ["Full Body"], "fatloss": ["Full Body"],
+                 "general": ["Core"], "mobility": ["Full Body"]}
+GRIDS = {
+    "quick": {"days": [1, 3, 6], "minutes": [20, 45, 90]},
+    "standard": {"days": [1, 2, 3, 4, 5, 6], "minutes": [20, 30, 45, 60, 75, 90]},
+    "full": {"days": [1, 2, 3, 4, 5, 6], "minutes": list(range(20, 95, 5))},
+}
+CATALOGS = {"builtin": len(EXERCISES), "synthetic-1k": 1_000, "synthetic-10k": 10_000}
+
+DEFAULT_THRESHOLDS = {"p50_us": 0.35, "p95_us": 0.50, "alloc_kib": 0.15}
+# differences below these never count as regressions (timer noise, small stages)
+ABS_FLOORS = {"p50_us": 5.0, "p95_us": 10.0, "alloc_kib": 1.0}
+
+
+CALIBRATE_EVERY = 25  # configurations between calibration samples
+
+
+def calibrate(rounds: int = 3) -> float:
+    """Best time (us) of a fixed workload with the planner's mix of dict/list/str work."""
+    def work():
+        d = {}
+        for i in range(5_000):
+            d[f"k{i % 997}"] = d.get(f"k{i % 997}", 0) + i
+        return sorted(d.items(), key=lambda kv: kv[1])
+    best = float("inf")
+    for _ in range(rounds):
+        t0 = time.perf_counter_ns()
+        work()
+        best = min(best, (time.perf_counter_ns() - t0) / 1e3)
+    return best
+
+
+class _NullSink(io.TextIOBase):
+    def write(self, s: str) -> int:
+        return len(s)
+
+
+def catalog_for(name: str) -> List[Dict]:
+    return EXERCISES if name == "builtin" else synthetic_catalog(CATALOGS[name])
+
+
+def configurations(grid: str):
+    """(goal, level, equipment label, limitation label, days, minutes) in sweep order."""
+    g = GRIDS[grid]
+    return list(product(GOALS, LEVELS, EQUIPMENT_SETS, LIMITATION_SETS, g["days"], g["minutes"]))
+
+
+def _percentile(sorted_vals: List[float], q: float) -> float:
+    return sorted_vals[min(len(sorted_vals) - 1, int(q * len(sorted_vals)))]
+
+
+def run_catalog(name: str, configs: list, resolver: VideoResolver, alloc_every: int, repeat: int = 3) -> Dict:
+    """Timings (and sampled allocations) of every stage for one catalog."""
+    index = CatalogIndex(catalog_for(name))
+    times: Dict[str, List[float]] = {s: [] for s in STAGES}
+    calls: Dict[str, int] = dict.fromkeys(STAGES, 0)
+    calibration: List[float] = []
+    allocs: Dict[str, List[tuple]] = {s: [] for s in STAGES}
+    digest = hashlib.sha256()
+    pools = {}
+    empty = 0
+    sink = _NullSink()
+
+    def timed(stage: str, fn: Callable, traced: bool):
+        if traced:
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            out = fn()
+            current, peak = tracemalloc.get_traced_memory()
+            allocs[stage].append((peak - before, current - before))
+            return out
+        t0 = time.perf_counter_ns()
+        out = fn()
+        us = (time.perf_counter_ns() - t0) / 1e3
+        # every pass makes the same calls in the same order: keep the fastest run of each
+        i, calls[stage] = calls[stage], calls[stage] + 1
+        if i < len(times[stage]):
+            times[stage][i] = min(times[stage][i], us)
+        else:
+            times[stage].append(us)
+        return out
+
+    for n_pass, traced in enumerate([False] * repeat + [True]):
+        if traced:
+            gc.collect()
+            tracemalloc.start()
+        pools.clear()
+        calls = dict.fromkeys(STAGES, 0)
+        for n, (goal, level, equip, limits, days, minutes) in enumerate(configs):
+            if traced and n % alloc_every:
+                continue
+            if not traced and n % CALIBRATE_EVERY == 0:
+                calibration.append(calibrate())
+            key = (goal, level, equip, limits)
+            if key not in pools:
+                equip_norm = _norm_equip(EQUIPMENT_SETS[equip])
+                avoid = _contra_from_constraints(LIMITATION_SETS[limits])
+                candidates = timed("filter", lambda: index.select(
+                    index.filter_mask(goal, equip_norm, level.lower(), avoid)), traced)
+                pools[key] = timed("weight", lambda: emphasize(candidates, FOCUS_BY_GOAL[goal], level), traced)
+            pool = pools[key]
+            if not pool:
+                empty += n_pass == 0
+                continue
+
+            def build():
+                return {i: build_day_plan(pool, patterns, random.Random(n * 1000 + i), goal, level, minutes)
+                        for i, patterns in enumerate(patterns_for_week(days, goal))}
+            plan = timed("build", build, traced)
+            timed("summarize", lambda: WeekColumns(plan).day_summaries(), traced)
+            names = [it["name"] for items in plan.values() for it in items]
+            videos = timed("videos", lambda: resolver.prefetch(names), traced)
+            timed("export_csv", lambda: CsvWriter(sink, videos.get).write(plan), traced)
+            timed("export_md", lambda: write_markdown(plan, sink, videos.get), traced)
+            if n_pass == 0:
+                digest.update(repr([[it["name"], it["sets"]] for items in plan.values() for it in items]).encode())
+        if traced:
+            tracemalloc.stop()
+
+    stages = {}
+    for stage in STAGES:
+        vals = sorted(times[stage])
+        if not vals:
+            continue
+        a = allocs[stage]
+        stages[stage] = {
+            "calls": len(vals),
+            "mean_us": round(sum(vals) / len(vals), 2),
+            "p50_us": round(_percentile(vals, 0.50), 2),
+            "p95_us": round(_percentile(vals, 0.95), 2),
+            "p99_us": round(_percentile(vals, 0.99), 2),
+            "alloc_kib": round(sum(p for p, _ in a) / len(a) / 1024, 2) if a else None,
+            "retained_kib": round(sum(r for _, r in a) / len(a) / 1024, 2) if a else None,
+        }
+    calibration.sort()
+    return {"size": len(index), "weeks": len(configs) - empty, "empty": empty,
+            "calibration_us": round(_percentile(calibration, 0.5), 2),
+            "plans_digest": digest.hexdigest()[:16], "stages": stages}
+
+
+def run(grid: str, catalogs: List[str], alloc_every: int, repeat: int = 3) -> Dict:
+    configs = configurations(grid)
+    out = {"version": RESULTS_VERSION, "grid": grid, "configs": len(configs), "repeat": repeat,
+           "env": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+           "catalogs": {}}
+    for name in catalogs:
+        client = StubSearchClient()
+        # no quota: every new exercise is a (stub) search, never a throttled skip
+        resolver = VideoResolver(client, cache=VideoCache(":memory:"), manifest={},
+                                 governor=QuotaGovernor(capacity=10**12, reserve=0))
+        t0 = time.perf_counter()
+        out["catalogs"][name] = run_catalog(name, configs, resolver, alloc_every, repeat)
+        out["catalogs"][name]["seconds"] = round(time.perf_counter() - t0, 2)
+        out["catalogs"][name]["stub_requests"] = client.requests
+    return out
+
+
+def compare(results: Dict, baseline: Dict) -> List[str]:
+    """Regression messages (empty if none); notes about changed plans or environments are printed."""
+    thresholds = {**DEFAULT_THRESHOLDS, **baseline.get("thresholds", {})}
+    for setting in ("grid", "repeat"):
+        if baseline.get(setting) != results[setting]:
+            return [f"baseline was run with {setting} {baseline.get(setting)!r}, not {results[setting]!r}"]
+    if baseline.get("env") != results["env"]:
+        print(f"note: baseline recorded on {baseline.get('env')}, now {results['env']}")
+    problems = []
+    for name, cat in results["catalogs"].items():
+        base = baseline["catalogs"].get(name)
+        if base is None:
+            continue
+        # >1 when the machine ran slower than when the baseline was taken
+        speed = cat["calibration_us"] / base["calibration_us"] if base.get("calibration_us") else 1.0
+        if abs(speed - 1) > 0.1:
+            print(f"note: {name}: machine {speed:.2f}x the baseline's calibration time; latencies scaled")
+        if base["plans_digest"] != cat["plans_digest"]:
+            print(f"note: {name}: generated plans differ from the baseline ({base['plans_digest']} -> "
+                  f"{cat['plans_digest']})")
+        for stage, m in cat["stages"].items():
+            b = base["stages"].get(stage)
+            if b is None:
+                continue
+            for metric, limit in thresholds.items():
+                old, new = b.get(metric), m.get(metric)
+                if old is None or new is None:
+                    continue
+                if metric.endswith("_us"):
+                    old = round(old * speed, 2)
+                if new > old * (1 + limit) and new - old > ABS_FLOORS[metric]:
+                    problems.append(f"{name} {stage} {metric}: {old} -> {new} (+{(new / old - 1) * 100:.0f}%, "
+                                    f"limit +{limit * 100:.0f}%)" if old else f"{name} {stage} {metric}: 0 -> {new}")
+    return problems
+
+
+def print_table(results: Dict) -> None:
+    print(f"grid {results['grid']}: {results['configs']} configurations per catalog")
+    for name, cat in results["catalogs"].items():
+        print(f"\n{name} ({cat['size']} exercises): {cat['weeks']} weeks, {cat['empty']} without matches, "
+              f"{cat['seconds']}s, {cat['stub_requests']} stub requests, plans {cat['plans_digest']}")
+        print(f"  {'stage':<11} {'calls':>7} {'mean us':>9} {'p50 us':>9} {'p95 us':>9} {'p99 us':>9} "
+              f"{'alloc KiB':>10} {'kept KiB':>9}")
+        for stage, m in cat["stages"].items():
+            alloc = "-" if m["alloc_kib"] is None else f"{m['alloc_kib']:.1f}"
+            kept = "-" if m["retained_kib"] is None else f"{m['retained_kib']:.1f}"
+            print(f"  {stage:<11} {m['calls']:>7} {m['mean_us']:>9.1f} {m['p50_us']:>9.1f} {m['p95_us']:>9.1f} "
+                  f"{m['p99_us']:>9.1f} {alloc:>10} {kept:>9}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--grid", choices=list(GRIDS), default="standard")
+    ap.add_argument("--catalogs", nargs="+", choices=list(CATALOGS), default=list(CATALOGS))
+    ap.add_argument("--repeat", type=int, default=3, help="timing passes; each call's fastest is kept")
+    ap.add_argument("--alloc-every", type=int, default=10, help="trace allocations on every n-th configuration")
+    ap.add_argument("--out", help="write the results JSON here")
+    ap.add_argument("--baseline", default=BASELINE_PATH)
+    mode = ap.add_mutually_exclusive_group()
+    mode.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    mode.add_argument("--compare", action="store_true", help="exit 1 if a stage regressed against the baseline")
+    args = ap.parse_args()
+
+    results = run(args.grid, args.catalogs, args.alloc_every, args.repeat)
+    print_table(results)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({**results, "thresholds": DEFAULT_THRESHOLDS}, f, indent=2)
+            f.write("\n")
+        print(f"\nbaseline written to {args.baseline}")
+    elif args.compare:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        problems = compare(results, baseline)
+        print()
+        for p in problems:
+            print("REGRESSION", p)
+        print(f"{len(problems)} regression(s) against {args.baseline}")
+        sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
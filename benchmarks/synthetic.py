@@ -0,0 +1,29 @@
+"""Synthetic exercise catalogs for benchmarks (same schema and vocabularies as catalog.py)."""
+import os
+import random
+import sys
+from typing import List, Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import EXERCISES, EQUIPMENT, CONTRA, GOAL_TAGS, LEVEL_ORDER  # noqa: E402
+
+PATTERNS = sorted({ex["pattern"] for ex in EXERCISES})
+
+
+def synthetic_catalog(n: int, seed: int = 0) -> List[Dict]:
+    """`n` exercises with uniquely numbered names and randomly drawn attributes."""
+    rng = random.Random(seed)
+    levels = list(LEVEL_ORDER)
+    out = []
+    for i in range(n):
+        base = EXERCISES[i % len(EXERCISES)]
+        out.append({
+            "name": f"{base['name']} #{i}",
+            "pattern": rng.choice(PATTERNS),
+            "equipment": rng.sample(EQUIPMENT, rng.randint(1, 2)),
+            "level_min": rng.choice(levels[:2]) if rng.random() < 0.9 else "advanced",
+            "contra": rng.sample(CONTRA, rng.randint(0, 2)),
+            "goal_tags": rng.sample(GOAL_TAGS, rng.randint(1, 3)),
+        })
+    return out
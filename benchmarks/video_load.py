@@ -0,0 +1,70 @@
+"""Many sessions resolving the same plan's videos at once, against a local stub API.
+
+Each of `--sessions` threads plays one user: its own (empty-cache) lookups for the same
+exercises, all started together. Without coalescing every session would search every
+exercise; with the shared resolver, concurrent identical queries ride one request.
+The second part runs with a small quota budget to show the governor throttling.
+
+    python benchmarks/video_load.py [--sessions 20] [--latency 0.2]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import EXERCISES  # noqa: E402
+from quota import SEARCH_COST, QuotaGovernor  # noqa: E402
+from stub_youtube import StubYouTube  # noqa: E402
+from video_cache import VideoCache  # noqa: E402
+from videos import VideoResolver, YouTubeClient  # noqa: E402
+
+
+def run_sessions(resolver, names, sessions):
+    barrier = threading.Barrier(sessions)
+    results = []
+
+    def session():
+        barrier.wait()
+        results.append(resolver.prefetch(names))
+
+    threads = [threading.Thread(target=session) for _ in range(sessions)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - t0, results
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sessions", type=int, default=20)
+    ap.add_argument("--latency", type=float, default=0.2)
+    args = ap.parse_args()
+    names = [ex["name"] for ex in EXERCISES[:12]]
+
+    with StubYouTube(latency=args.latency) as stub:
+        resolver = VideoResolver(YouTubeClient("key", base_url=stub.base_url), cache=VideoCache(":memory:"),
+                                 manifest={})
+        secs, results = run_sessions(resolver, names, args.sessions)
+        assert all(r.ids == results[0].ids and not r.failed for r in results)
+        print(f"{args.sessions} sessions x {len(names)} exercises in {secs:.2f} s: "
+              f"{stub.requests} API requests (uncoalesced, uncached: {args.sessions * len(names)})")
+        print(json.dumps(resolver.stats(), indent=2))
+
+        stub.reset()
+        budget = QuotaGovernor(capacity=10 * SEARCH_COST, reserve=2 * SEARCH_COST)
+        resolver = VideoResolver(YouTubeClient("key", base_url=stub.base_url), cache=VideoCache(":memory:"),
+                                 manifest={}, governor=budget)
+        got = resolver.prefetch(names)
+        print(f"\nquota of {budget.capacity:.0f} units, reserve {budget.reserve:.0f}: {stub.requests} searches, "
+              f"{len(got.throttled)} exercises fell back to search links")
+        print(json.dumps(resolver.stats()["quota"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Sequential per-exercise video lookups vs. the concurrent prefetch stage.
+
+Runs against a local stub of the search endpoint with a fixed per-request latency, for the
+unique exercises of a 6-day plan. "sequential" mimics the old path: a fresh client for
+every lookup, one after another. "prefetch" is VideoResolver.prefetch with one reused
+client on a bounded pool. "restart" is a new resolver on the same persistent cache file,
+as after a container restart: no requests at all.
+
+    python benchmarks/video_prefetch.py [--latency 0.15] [--workers 8]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from planner import generate_week  # noqa: E402
+from stub_youtube import StubYouTube, fake_video_id  # noqa: E402
+from video_cache import VideoCache  # noqa: E402
+from videos import VideoResolver, YouTubeClient, video_query  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--latency", type=float, default=0.15, help="stub response delay in seconds")
+    ap.add_argument("--workers", type=int, default=8)
+    args = ap.parse_args()
+
+    plan = generate_week("hypertrophy", 6, 60, "Intermediate", ["bodyweight", "dumbbells", "barbell", "pullup_bar"],
+                         [], ["Full Body"], 42)
+    names = list(dict.fromkeys(it["name"] for items in plan.values() for it in items if it["name"] != "Warm-up"))
+
+    cache_path = os.path.join(tempfile.mkdtemp(), "videos.sqlite3")
+    rows = []
+    with StubYouTube(latency=args.latency) as stub:
+        t0 = time.perf_counter()
+        seq = {n: YouTubeClient("key", base_url=stub.base_url).search_video_id(video_query(n)) for n in names}
+        rows.append(("sequential", time.perf_counter() - t0, stub.requests, stub.connections))
+
+        for mode in ("prefetch", "restart"):
+            stub.reset()
+            resolver = VideoResolver(YouTubeClient("key", base_url=stub.base_url), max_workers=args.workers,
+                                     cache=VideoCache(cache_path), manifest={})
+            t0 = time.perf_counter()
+            got = resolver.prefetch(names)
+            rows.append((mode, time.perf_counter() - t0, stub.requests, stub.connections))
+            assert seq == {n: fake_video_id(video_query(n)) for n in names}
+    print(f"{len(names)} unique exercises, {args.latency * 1000:.0f} ms per request")
+    print(f"{'mode':<12} {'seconds':>8} {'requests':>9} {'connections':>12}")
+    for mode, secs, requests, connections in rows:
+        print(f"{mode:<12} {secs:>8.3f} {requests:>9} {connections:>12}")
+
+if __name__ == "__main__":
+    main()
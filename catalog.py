@@ -0,0 +1,251 @@
+"""Exercise catalog and its precompiled bitmask index.
+
+Every equipment / contraindication / goal tag gets a bit. Besides the per-exercise masks,
+the index keeps the transposed view: one Python int per tag (and per level and pattern)
+with bit *i* set when exercise *i* has it. A filter is then a few ORs/ANDs over those
+ints followed by decoding the surviving bits, instead of a scan over every dict.
+"""
+import hashlib
+import json
+from itertools import compress
+from operator import attrgetter
+from typing import List, Dict, Iterable, Optional
+
+from models import Exercise
+
+# Exercise Library
+
+# pattern: 'squat' | 'hinge' | 'lunge' | 'push' | 'vertical_push' | 'pull' | 'vertical_pull' | 'core' | 'carry' | 'mobility'
+# equipment: 'bodyweight', 'dumbbells', 'barbell', 'kettlebell', 'bands', 'pullup_bar', 'machines'
+# contraindications: 'knee', 'shoulder_overhead', 'lumbar_flexion', 'wrist', 'impact'
+EXERCISES: List[Dict] = [
+    # Lower body
+    {"name": "Back Squat", "pattern": "squat", "equipment": ["barbell"], "level_min": "intermediate",
+     "contra": ["knee"], "goal_tags": ["strength", "hypertrophy"]},
+    {"name": "Goblet Squat", "pattern": "squat", "equipment": ["dumbbells"], "level_min": "beginner",
+     "contra": ["knee"], "goal_tags": ["strength", "hypertrophy", "general"]},
+    {"name": "Bodyweight Squat", "pattern": "squat", "equipment": ["bodyweight"], "level_min": "beginner",
+      "contra": ["knee"], "goal_tags": ["general", "fatloss", "endurance"]},
+    {"name": "Romanian Deadlift", "pattern": "hinge", "equipment": ["barbell", "dumbbells"], "level_min": "beginner",
+     "contra": ["lumbar_flexion"], "goal_tags": ["strength", "hypertrophy", "general"]},
+    {"name": "Conventional Deadlift", "pattern": "hinge", "equipment": ["barbell"], "level_min": "intermediate",
+     "contra": ["lumbar_flexion"], "goal_tags": ["strength", "hypertrophy"]},
+    {"name": "Hip Thrust", "pattern": "hinge", "equipment": ["barbell", "dumbbells"], "level_min": "beginner",
+     "contra": [], "goal_tags": ["hypertrophy", "general"]},
+    {"name": "Kettlebell Swing", "pattern": "hinge", "equipment": ["kettlebell"], "level_min": "beginner",
+     "contra": ["lumbar_flexion", "impact"], "goal_tags": ["fatloss", "endurance", "general"]},
+    {"name": "Walking Lunge", "pattern": "lunge", "equipment": ["bodyweight", "dumbbells"], "level_min": "beginner",
+     "contra": ["knee", "impact"], "goal_tags": ["hypertrophy", "general", "fatloss"]},
+    {"name": "Bulgarian Split Squat", "pattern": "lunge", "equipment": ["bodyweight", "dumbbells"], "level_min": "intermediate",
+     "contra": ["knee"], "goal_tags": ["hypertrophy", "general"]},
+    {"name": "Step-up", "pattern": "lunge", "equipment": ["bodyweight", "dumbbells"], "level_min": "beginner",
+     "contra": ["knee", "impact"], "goal_tags": ["general", "hypertrophy"]},
+
+    # Push
+    {"name": "Bench Press", "pattern": "push", "equipment": ["barbell"], "level_min": "intermediate",
+     "contra": ["wrist"], "goal_tags": ["strength", "hypertrophy"]},
+    {"name": "Dumbbell Bench Press", "pattern": "push", "equipment": ["dumbbells"], "level_min": "beginner",
+      "contra": ["wrist"], "goal_tags": ["strength", "hypertrophy", "general"]},
+    {"name": "Push-up", "pattern": "push", "equipment": ["bodyweight"], "level_min": "beginner",
+     "contra": ["wrist"], "goal_tags": ["general", "fatloss", "endurance"]},
+    {"name": "Overhead Press", "pattern": "vertical_push", "equipment": ["barbell"], "level_min": "intermediate",
+     "contra": ["shoulder_overhead", "wrist"], "goal_tags": ["strength", "hypertrophy"]},
+    {"name": "Dumbbell Shoulder Press", "pattern": "vertical_push", "equipment": ["dumbbells"], "level_min": "beginner",
+     "contra": ["shoulder_overhead", "wrist"], "goal_tags": ["strength", "hypertrophy", "general"]},
+    {"name": "Incline Dumbbell Press", "pattern": "push", "equipment": ["dumbbells"], "level_min": "beginner",
+     "contra": ["wrist"], "goal_tags": ["hypertrophy", "general"]},
+
+    # Pull
+    {"name": "Pull-up", "pattern": "vertical_pull", "equipment": ["pullup_bar"], "level_min": "intermediate",
+     "contra": [], "goal_tags": ["strength", "hypertrophy", "general"]},
+    {"name": "Chin-up", "pattern": "vertical_pull", "equipment": ["pullup_bar"], "level_min": "intermediate",
+     "contra": [], "goal_tags": ["strength", "hypertrophy", "general"]},
+    {"name": "One-arm Dumbbell Row", "pattern": "pull", "equipment": ["dumbbells"], "level_min": "beginner",
+     "contra": ["lumbar_flexion", "wrist"], "goal_tags": ["strength", "hypertrophy", "general"]},
+    {"name": "Barbell Row", "pattern": "pull", "equipment": ["barbell"], "level_min": "intermediate",
+     "contra": ["lumbar_flexion"], "goal_tags": ["strength", "hypertrophy"]},
+    {"name": "Face Pull (Band)", "pattern": "pull", "equipment": ["bands"], "level_min": "beginner",
+     "contra": [], "goal_tags": ["hypertrophy", "general"]},
+
+    # Arms / Shoulders
+    {"name": "Dumbbell Lateral Raise", "pattern": "push", "equipment": ["dumbbells"], "level_min": "beginner",
+     "contra": ["shoulder_overhead"], "goal_tags": ["hypertrophy", "general"]},
+    {"name": "Dumbbell Biceps Curl", "pattern": "pull", "equipment": ["dumbbells"], "level_min": "beginner",
+     "contra": ["wrist"], "goal_tags": ["hypertrophy", "general"]},
+    {"name": "Triceps Rope Pushdown (Band)", "pattern": "push", "equipment": ["bands"], "level_min": "beginner",
+     "contra": ["wrist"], "goal_tags": ["hypertrophy", "general"]},
+
+    # Core
+    {"name": "Plank", "pattern": "core", "equipment": ["bodyweight"], "level_min": "beginner",
+     "contra": [], "goal_tags": ["general", "fatloss", "endurance"]},
+    {"name": "Side Plank", "pattern": "core", "equipment": ["bodyweight"], "level_min": "beginner",
+     "contra": [], "goal_tags": ["general", "fatloss", "endurance"]},
+    {"name": "Dead Bug", "pattern": "core", "equipment": ["bodyweight"], "level_min": "beginner",
+     "contra": [], "goal_tags": ["general"]},
+    {"name": "Hollow Body Hold", "pattern": "core", "equipment": ["bodyweight"], "level_min": "intermediate",
+     "contra": [], "goal_tags": ["general"]},
+    {"name": "Russian Twist", "pattern": "core", "equipment": ["bodyweight", "dumbbells"], "level_min": "beginner",
+     "contra": ["lumbar_flexion"], "goal_tags": ["general", "fatloss"]},
+
+    # Carries / Conditioning
+    {"name": "Farmer Carry", "pattern": "carry", "equipment": ["dumbbells", "kettlebell"], "level_min": "beginner",
+     "contra": [], "goal_tags": ["general", "fatloss", "endurance"]},
+    {"name": "Jump Rope", "pattern": "carry", "equipment": ["bodyweight"], "level_min": "beginner",
+     "contra": ["impact"], "goal_tags": ["fatloss", "endurance"]},
+
+    # Mobility
+    {"name": "World's Greatest Stretch", "pattern": "mobility", "equipment": ["bodyweight"], "level_min": "beginner",
+     "contra": [], "goal_tags": ["mobility", "general"]},
+    {"name": "90/90 Hip Switches", "pattern": "mobility", "equipment": ["bodyweight"], "level_min": "beginner",
+     "contra": [], "goal_tags": ["mobility"]},
+    {"name": "Cat-Cow", "pattern": "mobility", "equipment": ["bodyweight"], "level_min": "beginner",
+     "contra": [], "goal_tags": ["mobility"]},
+    {"name": "Thoracic Rotations", "pattern": "mobility", "equipment": ["bodyweight"], "level_min": "beginner",
+     "contra": [], "goal_tags": ["mobility"]},
+    {"name": "Ankle Dorsiflexion Mobilization", "pattern": "mobility", "equipment": ["bodyweight"], "level_min": "beginner",
+     "contra": [], "goal_tags": ["mobility"]},
+]
+
+LEVEL_ORDER = {"beginner": 0, "intermediate": 1, "advanced": 2}
+
+
+PATTERNS = ["squat", "hinge", "lunge", "push", "vertical_push", "pull", "vertical_pull", "core", "carry", "mobility"]
+
+EXERCISE_FIELDS = ("name", "pattern", "equipment", "level_min", "contra", "goal_tags")
+
+# Bit positions of the known vocabularies; tags outside these lists get the next free bit.
+EQUIPMENT = ["bodyweight", "dumbbells", "barbell", "kettlebell", "bands", "pullup_bar", "machines"]
+CONTRA = ["knee", "shoulder_overhead", "lumbar_flexion", "wrist", "impact"]
+GOAL_TAGS = ["strength", "hypertrophy", "general", "fatloss", "endurance", "mobility"]
+
+# goals that don't require a matching goal tag
+OPEN_GOALS = ("general", "mobility")
+
+# maps the ASCII digits of bin(mask) to 0/1 bytes, so itertools.compress can decode a mask
+_BIN_DIGITS = bytes.maketrans(b"01", b"\x00\x01")
+
+
+def catalog_digest(exercises: List[Dict]) -> str:
+    """Short content hash of a catalog (entry dicts); stored plans are only valid for the same digest."""
+    return hashlib.sha256(json.dumps(exercises, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def _bit_table(vocab: List[str], exercises: List[Dict], field: str) -> Dict[str, int]:
+    bits = {v: i for i, v in enumerate(vocab)}
+    for ex in exercises:
+        for v in ex[field]:
+            bits.setdefault(v, len(bits))
+    return bits
+
+
+def _mask(values: Iterable[str], bits: Dict[str, int]) -> int:
+    m = 0
+    for v in values:
+        b = bits.get(v)
+        if b is not None:
+            m |= 1 << b
+    return m
+
+
+class CatalogIndex:
+    """Bitmask index over a catalog; entries are compiled once into immutable `Exercise`s."""
+
+    def __init__(self, exercises: List[Dict]):
+        self.exercises: List[Exercise] = [ex if isinstance(ex, Exercise) else Exercise.from_dict(ex)
+                                          for ex in exercises]
+        self.equip_bits = _bit_table(EQUIPMENT, exercises, "equipment")
+        self.contra_bits = _bit_table(CONTRA, exercises, "contra")
+        self.goal_bits = _bit_table(GOAL_TAGS, exercises, "goal_tags")
+
+        # per-exercise view
+        self.equip_mask: List[int] = []
+        self.contra_mask: List[int] = []
+        self.goal_mask: List[int] = []
+        self.level: List[int] = []
+        self.pattern: List[str] = []
+        self.position: Dict[str, int] = {}
+
+        # transposed view: tag -> bitset of exercise positions
+        self.by_equip: Dict[str, int] = {v: 0 for v in self.equip_bits}
+        self.by_contra: Dict[str, int] = {v: 0 for v in self.contra_bits}
+        self.by_goal: Dict[str, int] = {v: 0 for v in self.goal_bits}
+        self.by_pattern: Dict[str, int] = {}
+        self.max_level: Dict[int, int] = {}  # level -> exercises whose level_min <= level
+
+        by_level: Dict[int, int] = {}
+        for i, ex in enumerate(self.exercises):
+            bit = 1 << i
+            lvl = LEVEL_ORDER[ex["level_min"]]
+            self.equip_mask.append(_mask(ex["equipment"], self.equip_bits))
+            self.contra_mask.append(_mask(ex["contra"], self.contra_bits))
+            self.goal_mask.append(_mask(ex["goal_tags"], self.goal_bits))
+            self.level.append(lvl)
+            self.pattern.append(ex["pattern"])
+            self.position.setdefault(ex["name"], i)
+            for v in ex["equipment"]:
+                self.by_equip[v] |= bit
+            for v in ex["contra"]:
+                self.by_contra[v] |= bit
+            for v in ex["goal_tags"]:
+                self.by_goal[v] |= bit
+            self.by_pattern[ex["pattern"]] = self.by_pattern.get(ex["pattern"], 0) | bit
+            by_level[lvl] = by_level.get(lvl, 0) | bit
+
+        self.all = (1 << len(exercises)) - 1
+        acc = 0
+        for lvl in sorted(set(LEVEL_ORDER.values()) | set(by_level)):
+            acc |= by_level.get(lvl, 0)
+            self.max_level[lvl] = acc
+
+    def __getstate__(self) -> Dict:
+        # exercises go column-wise with equal values shared: unpickling 10k Exercise objects
+        # one by one costs ~4x more (see catalog_loader.py's cache)
+        state = dict(vars(self))
+        exercises = state.pop("exercises")
+        del state["position"]
+        shared: Dict = {}
+        state["exercise_columns"] = [[shared.setdefault(v, v) for v in map(attrgetter(f), exercises)]
+                                     for f in EXERCISE_FIELDS]
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        columns = state.pop("exercise_columns")
+        vars(self).update(state)
+        self.exercises = list(map(Exercise, *columns))
+        self.position = {}
+        for i, name in enumerate(columns[0]):
+            self.position.setdefault(name, i)
+
+    def __len__(self) -> int:
+        return len(self.exercises)
+
+    def filter_mask(self, goal_key: str, equip_norm: Iterable[str], min_level: str, avoid: Iterable[str],
+                    patterns: Optional[Iterable[str]] = None) -> int:
+        """Bitset of exercises passing level/equipment/contra/goal (and optionally pattern) filters."""
+        m = self.max_level.get(LEVEL_ORDER[min_level], 0)
+        eq = 0
+        for e in equip_norm:
+            eq |= self.by_equip.get(e, 0)
+        m &= eq
+        for a in avoid:
+            m &= ~self.by_contra.get(a, 0)
+        if goal_key not in OPEN_GOALS:
+            m &= self.by_goal.get(goal_key, 0)
+        if patterns is not None:
+            pm = 0
+            for p in patterns:
+                pm |= self.by_pattern.get(p, 0)
+            m &= pm
+        return m & self.all
+
+    def _selectors(self, mask: int) -> bytes:
+        # bit i of the mask -> byte i of the result (bin() is most-significant first)
+        return bin(mask)[:1:-1].encode("ascii").translate(_BIN_DIGITS)
+
+    def positions(self, mask: int) -> List[int]:
+        """Catalog positions of the set bits in `mask`, ascending."""
+        return list(compress(range(len(self.exercises)), self._selectors(mask)))
+
+    def select(self, mask: int) -> List[Exercise]:
+        """Exercises for `mask`, in catalog order."""
+        return list(compress(self.exercises, self._selectors(mask)))
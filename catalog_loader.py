@@ -0,0 +1,275 @@
+"""External exercise catalogs: JSON/CSV files, validated once and cached compiled.
+
+Set WORKOUT_CATALOG to a catalog file to use it instead of the built-in list (see
+planner.py). Accepted layouts:
+
+* JSON – a list of exercise objects, or `{"exercises": [...]}`,
+* CSV  – a header with name, pattern, equipment, level_min, contra, goal_tags (other
+  columns are rejected, like unknown JSON fields); list fields are `|`-separated
+  (`dumbbells|kettlebell`), empty for none.
+
+Every entry is checked against catalog.py's vocabularies (pattern, equipment,
+level_min, contraindications, goal tags), and names must be unique. All problems are
+reported together in one `CatalogError`.
+
+Parsing, validating and indexing 10k entries takes a fraction of a second, which is
+too long to repeat on every process start. So the compiled `CatalogIndex` is pickled
+to `.cache/` next to the other caches. Later starts check the source's mtime and size
+against the cache header and unpickle without reading the source. When only the mtime
+changed (a touch, a fresh checkout), a matching content hash still reuses the cache.
+The cache is also rebuilt when the vocabularies or the index layout change. Only the
+app itself writes `.cache/`, so its pickles are trusted like the code.
+
+    python catalog_loader.py check coaches.csv     # validate, compile and time it
+    python catalog_loader.py export catalog.json   # write the built-in catalog as a starting point
+"""
+import csv
+import hashlib
+import io
+import json
+import os
+import pickle
+from typing import Dict, List, Tuple
+
+from catalog import (CONTRA, EQUIPMENT, EXERCISE_FIELDS as FIELDS, GOAL_TAGS, LEVEL_ORDER, PATTERNS, CatalogIndex,
+                     catalog_digest)
+from models import WARMUP
+
+LIST_FIELDS = ("equipment", "contra", "goal_tags")
+LIST_SEP = "|"
+MAX_REPORTED = 25
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+
+# bump when CatalogIndex's attributes or the validation rules change; the vocabularies are part of the key too
+CACHE_FORMAT = 2
+_CODE_KEY = hashlib.sha256(json.dumps([CACHE_FORMAT, PATTERNS, EQUIPMENT, CONTRA, GOAL_TAGS, LEVEL_ORDER])
+                           .encode("utf-8")).hexdigest()[:16]
+
+# allowed values per validated field
+_VOCAB = {"pattern": PATTERNS, "equipment": EQUIPMENT, "level_min": list(LEVEL_ORDER), "contra": CONTRA,
+          "goal_tags": GOAL_TAGS}
+
+
+class CatalogError(ValueError):
+    """An unreadable or invalid catalog file; `problems` lists every issue found."""
+
+    def __init__(self, source: str, problems: List[str]):
+        self.source = source
+        self.problems = problems
+        shown = problems[:MAX_REPORTED]
+        more = f"\n  … and {len(problems) - len(shown)} more" if len(problems) > len(shown) else ""
+        super().__init__(f"{source}: {len(problems)} problem(s)\n  " + "\n  ".join(shown) + more)
+
+
+def parse_entries(data: bytes, fmt: str, source: str = "catalog") -> List[Dict]:
+    """Raw entries from a JSON or CSV document (list fields from CSV split on LIST_SEP)."""
+    text = data.decode("utf-8-sig")
+    if fmt == "json":
+        try:
+            doc = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise CatalogError(source, [f"invalid JSON: {e}"]) from None
+        entries = doc.get("exercises") if isinstance(doc, dict) else doc
+        if not isinstance(entries, list):
+            raise CatalogError(source, ["expected a list of exercises or {\"exercises\": [...]}"])
+        return entries
+    if fmt == "csv":
+        reader = csv.DictReader(io.StringIO(text))
+        header = reader.fieldnames or ()
+        problems = []
+        missing = [f for f in ("name", "pattern") if f not in header]
+        if missing:
+            problems.append(f"CSV header lacks column(s): {', '.join(missing)}")
+        unknown = [f for f in header if f not in FIELDS]
+        if unknown:
+            # like unknown JSON fields: a typo ("equipement") must not load a catalog with missing data
+            problems.append(f"unknown CSV column(s) {', '.join(map(repr, unknown))} (allowed: {', '.join(FIELDS)})")
+        if problems:
+            raise CatalogError(source, problems)
+        entries = []
+        for row in reader:
+            # empty cells count as missing, so defaults (level_min, no contra) apply
+            entry = {k: v.strip() for k, v in row.items() if k in FIELDS and v and v.strip()}
+            for f in LIST_FIELDS:
+                if f in entry:
+                    entry[f] = [v.strip() for v in entry[f].split(LIST_SEP) if v.strip()]
+            entries.append(entry)
+        return entries
+    raise CatalogError(source, [f"unsupported catalog format {fmt!r} (use .json or .csv)"])
+
+
+def validate(entries: List, source: str = "catalog") -> List[Dict]:
+    """Entries normalized to the built-in shape (all six fields, lists); raises CatalogError."""
+    problems: List[str] = []
+    out: List[Dict] = []
+    seen: Dict[str, int] = {}
+    for i, raw in enumerate(entries, start=1):
+        where = f"entry {i}"
+        if not isinstance(raw, dict):
+            problems.append(f"{where}: expected an object, got {type(raw).__name__}")
+            continue
+        name = raw.get("name")
+        if not isinstance(name, str) or not name.strip():
+            problems.append(f"{where}: missing name")
+            continue
+        name = name.strip()
+        where = f"entry {i} ({name})"
+        if name == WARMUP["name"]:
+            problems.append(f"{where}: {name!r} is reserved for the generated warm-up")
+        elif name in seen:
+            problems.append(f"{where}: duplicate name (first at entry {seen[name]})")
+        seen.setdefault(name, i)
+        unknown = sorted(set(raw) - set(FIELDS))
+        if unknown:
+            problems.append(f"{where}: unknown field(s) {', '.join(unknown)}")
+
+        entry = {"name": name}
+        for f in ("pattern", "level_min"):
+            v = raw.get(f, "beginner" if f == "level_min" else None)
+            if v not in _VOCAB[f]:
+                problems.append(f"{where}: {f} {v!r} is not one of {', '.join(_VOCAB[f])}")
+            entry[f] = v
+        for f in LIST_FIELDS:
+            v = raw.get(f, [])
+            if isinstance(v, str):
+                v = [v]
+            if not isinstance(v, list) or not all(isinstance(x, str) for x in v):
+                problems.append(f"{where}: {f} must be a list of strings")
+                continue
+            bad = [x for x in v if x not in _VOCAB[f]]
+            if bad:
+                problems.append(f"{where}: unknown {f} {', '.join(map(repr, bad))} (allowed: {', '.join(_VOCAB[f])})")
+            if not v and f != "contra":
+                problems.append(f"{where}: {f} is empty")
+            entry[f] = list(dict.fromkeys(v))
+        out.append({f: entry[f] for f in FIELDS if f in entry})
+    if not entries:
+        problems.append("the catalog is empty")
+    if problems:
+        raise CatalogError(source, problems)
+    return out
+
+
+def compile_catalog(data: bytes, fmt: str, source: str = "catalog") -> Tuple[CatalogIndex, str]:
+    """Parse, validate and index a catalog document: (index, digest)."""
+    entries = validate(parse_entries(data, fmt, source), source)
+    return CatalogIndex(entries), catalog_digest(entries)
+
+
+def cache_path(path: str, cache_dir: str = DEFAULT_CACHE_DIR) -> str:
+    key = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(cache_dir, f"catalog-{key}.pickle")
+
+
+def _read_cache(cpath: str):
+    """(header, file positioned at the payload) or (None, None)."""
+    try:
+        f = open(cpath, "rb")
+    except OSError:
+        return None, None
+    try:
+        header = pickle.load(f)
+        if isinstance(header, dict) and header.get("code") == _CODE_KEY:
+            return header, f
+    except Exception:  # truncated or from another version: rebuild
+        pass
+    f.close()
+    return None, None
+
+
+def _write_cache(cpath: str, header: Dict, payload: Tuple[CatalogIndex, str]) -> None:
+    tmp = f"{cpath}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(cpath), exist_ok=True)
+        with open(tmp, "wb") as f:
+            pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cpath)
+    except OSError:
+        # read-only deploy: every start compiles the catalog, which still works
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def load_catalog(path: str, cache_dir: str = DEFAULT_CACHE_DIR, use_cache: bool = True) -> Tuple[CatalogIndex, str]:
+    """Compiled index and digest for a JSON/CSV catalog file, from the cache when it is current."""
+    fmt = os.path.splitext(path)[1].lower().lstrip(".")
+    try:
+        st = os.stat(path)
+    except OSError as e:
+        raise CatalogError(path, [f"can't read catalog: {e}"]) from None
+    cpath = cache_path(path, cache_dir)
+    header, f = _read_cache(cpath) if use_cache else (None, None)
+    if header is not None and header["mtime_ns"] == st.st_mtime_ns and header["size"] == st.st_size:
+        with f:
+            try:
+                return pickle.load(f)
+            except Exception:
+                header = None
+
+    with open(path, "rb") as src:
+        data = src.read()
+    sha = hashlib.sha256(data).hexdigest()
+    payload = None
+    if header is not None and header["sha256"] == sha:  # touched, not changed
+        with f:
+            try:
+                payload = pickle.load(f)
+            except Exception:
+                payload = None
+    elif f is not None:
+        f.close()
+    if payload is None:
+        payload = compile_catalog(data, fmt, path)
+    if use_cache:
+        _write_cache(cpath, {"code": _CODE_KEY, "source": os.path.abspath(path), "mtime_ns": st.st_mtime_ns,
+                             "size": st.st_size, "sha256": sha}, payload)
+    return payload
+
+
+def write_catalog(entries: List[Dict], path: str) -> None:
+    """Write entries as a JSON or CSV catalog (by extension) that `load_catalog` reads back."""
+    fmt = os.path.splitext(path)[1].lower()
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if fmt == ".csv":
+            w = csv.writer(f, lineterminator="\n")
+            w.writerow(FIELDS)
+            for ex in entries:
+                w.writerow([LIST_SEP.join(ex[k]) if k in LIST_FIELDS else ex[k] for k in FIELDS])
+        else:
+            json.dump([{k: list(ex[k]) if k in LIST_FIELDS else ex[k] for k in FIELDS} for ex in entries],
+                      f, ensure_ascii=False, indent=1)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    import time
+
+    ap = argparse.ArgumentParser(description="Exercise catalog tools")
+    ap.add_argument("command", choices=["check", "export"])
+    ap.add_argument("path", help="catalog file (.json or .csv)")
+    args = ap.parse_args()
+    if args.command == "export":
+        from catalog import EXERCISES
+
+        write_catalog(EXERCISES, args.path)
+        print(f"wrote {len(EXERCISES)} exercises to {args.path}")
+        sys.exit(0)
+    try:
+        t0 = time.perf_counter()
+        index, digest = load_catalog(args.path, use_cache=False)
+        t1 = time.perf_counter()
+        load_catalog(args.path)  # writes the cache
+        t2 = time.perf_counter()
+        load_catalog(args.path)
+        t3 = time.perf_counter()
+    except CatalogError as e:
+        sys.exit(str(e))
+    counts = {p: bin(m).count("1") for p, m in index.by_pattern.items()}
+    print(f"{args.path}: {len(index)} exercises OK (digest {digest})")
+    print("  per pattern: " + ", ".join(f"{p} {n}" for p, n in sorted(counts.items())))
+    print(f"  compile {1e3 * (t1 - t0):.1f} ms · cached load {1e3 * (t3 - t2):.2f} ms · cache {cache_path(args.path)}")
@@ -0,0 +1,172 @@
+"""Columnar (NumPy) view of a week plan for vectorized summaries, time estimates and export.
+
+Plan items are read once into parallel arrays (sets, rep lo/hi, tempo components, rest,
+work time, categorical pattern codes); rep ranges and tempo come pre-parsed from the
+shared Scheme, plain dict items are parsed. Per-day totals, time estimates and weekly
+per-pattern volume are then single array passes, and the export DataFrame is assembled
+column by column from the same arrays.
+"""
+from typing import List, Dict, Optional
+
+import numpy as np
+
+from models import PER_SET_OVERHEAD_SEC, TRANSITION_SEC, format_reps, item_rep_range, parse_tempo
+
+KIND_SETS_REPS, KIND_TIMED, KIND_HOLD = 0, 1, 2
+KINDS = {"sets_reps": KIND_SETS_REPS, "timed": KIND_TIMED, "hold": KIND_HOLD}
+
+
+class WeekColumns:
+    """Parallel arrays, one row per plan item (warm-ups included), in plan order."""
+
+    def __init__(self, week_plan: Dict[int, List[Dict]]):
+        self.day_keys = list(week_plan)
+        n = sum(len(items) for items in week_plan.values())
+
+        self.day = np.empty(n, dtype=np.int16)           # position in day_keys
+        self.kind = np.empty(n, dtype=np.int8)
+        self.sets = np.empty(n, dtype=np.int32)
+        self.rep_lo = np.empty(n, dtype=np.int32)
+        self.rep_hi = np.empty(n, dtype=np.int32)
+        self.tempo = np.zeros((n, 3), dtype=np.int32)    # ecc, pause, con (sets_reps only)
+        self.rest = np.empty(n, dtype=np.int32)
+        self.time_sec = np.zeros(n, dtype=np.int32)      # work interval (timed/hold only)
+        self.rir = np.full(n, np.nan)
+        self.pattern_code = np.empty(n, dtype=np.int16)
+        self.is_warmup = np.zeros(n, dtype=bool)
+
+        # text columns kept as-is for rendering
+        self.name: List[str] = []
+        self.tempo_txt: List[str] = []
+        self.notes: List[str] = []
+
+        self.patterns: List[str] = []                   # pattern_code -> pattern name
+        codes: Dict[str, int] = {}
+
+        r = 0
+        for d, items in enumerate(week_plan.values()):
+            for it in items:
+                kind = KINDS[it["type"]]
+                self.day[r] = d
+                self.kind[r] = kind
+                self.sets[r] = it["sets"]
+                if kind == KIND_SETS_REPS:
+                    self.rep_lo[r], self.rep_hi[r] = item_rep_range(it)
+                    self.tempo[r] = it.get("tempo_parts") or parse_tempo(it.get("tempo", "2-0-2"))
+                    self.rest[r] = it.get("rest_sec", 75)
+                else:
+                    self.rep_lo[r] = self.rep_hi[r] = 0
+                    self.rest[r] = it["rest_sec"]
+                    self.time_sec[r] = it["time_sec"]
+                if it.get("rir") is not None:
+                    self.rir[r] = it["rir"]
+                p = it.get("pattern") or ""
+                if p not in codes:
+                    codes[p] = len(self.patterns)
+                    self.patterns.append(p)
+                self.pattern_code[r] = codes[p]
+                self.is_warmup[r] = it["name"] == "Warm-up"
+                self.name.append(it["name"])
+                self.tempo_txt.append(it.get("tempo", ""))
+                self.notes.append(it.get("notes", ""))
+                r += 1
+
+    def __len__(self) -> int:
+        return len(self.name)
+
+    _ARRAYS = ("day", "kind", "sets", "rep_lo", "rep_hi", "tempo", "rest", "time_sec", "rir", "pattern_code",
+               "is_warmup")
+    _LISTS = ("name", "tempo_txt", "notes")
+
+    def with_day(self, day_key: int, items: List[Dict]) -> "WeekColumns":
+        """Copy with one day's rows replaced; only `items` are read, other rows are spliced."""
+        d = self.day_keys.index(day_key)
+        lo = int(np.searchsorted(self.day, d, side="left"))   # a day's rows are contiguous
+        hi = int(np.searchsorted(self.day, d, side="right"))
+        part = WeekColumns({day_key: items})
+        part.day[:] = d
+
+        out = WeekColumns.__new__(WeekColumns)
+        out.day_keys = list(self.day_keys)
+        out.patterns = list(self.patterns)
+        codes = {p: i for i, p in enumerate(out.patterns)}
+        for p in part.patterns:
+            if p not in codes:
+                codes[p] = len(out.patterns)
+                out.patterns.append(p)
+        part.pattern_code = np.array([codes[p] for p in part.patterns], dtype=np.int16)[part.pattern_code] \
+            if len(part) else part.pattern_code
+
+        for attr in self._ARRAYS:
+            a = getattr(self, attr)
+            setattr(out, attr, np.concatenate([a[:lo], getattr(part, attr), a[hi:]]))
+        for attr in self._LISTS:
+            a = getattr(self, attr)
+            setattr(out, attr, a[:lo] + getattr(part, attr) + a[hi:])
+        return out
+
+    def est_time_sec(self) -> np.ndarray:
+        """Vectorized estimate_exercise_time_sec for every row."""
+        timed = (self.time_sec + self.rest) * self.sets + TRANSITION_SEC
+        reps = (self.rep_lo + self.rep_hi) // 2
+        work = (reps * self.tempo.sum(axis=1) + PER_SET_OVERHEAD_SEC) * self.sets
+        rest_total = np.maximum(0, self.sets - 1) * self.rest
+        return np.where(self.kind == KIND_SETS_REPS, work + rest_total + TRANSITION_SEC, timed)
+
+    def day_summaries(self) -> List[Dict]:
+        """summarize_day for every day at once (same keys and values)."""
+        n_days = len(self.day_keys)
+        est = np.bincount(self.day, weights=self.est_time_sec(), minlength=n_days)
+        sets = np.bincount(self.day, weights=np.where(self.kind == KIND_SETS_REPS, self.sets, 0), minlength=n_days)
+
+        # unique (day, pattern) pairs, sorted by day then pattern code
+        n_pat = max(1, len(self.patterns))
+        pairs = np.unique(self.day.astype(np.int64) * n_pat + self.pattern_code)
+        per_day: List[List[str]] = [[] for _ in range(n_days)]
+        for d, code in zip((pairs // n_pat).tolist(), (pairs % n_pat).tolist()):
+            if self.patterns[code]:
+                per_day[d].append(self.patterns[code])
+
+        return [
+            {"total_sets": int(sets[d]), "est_min": round(int(est[d]) / 60), "patterns": ", ".join(sorted(per_day[d]))}
+            for d in range(n_days)
+        ]
+
+    def pattern_volume(self) -> Dict[str, int]:
+        """Working sets per pattern over the week (warm-ups excluded), largest first."""
+        vol = np.bincount(self.pattern_code, weights=np.where(self.is_warmup, 0, self.sets),
+                          minlength=len(self.patterns))
+        order = np.argsort(-vol, kind="stable")
+        return {self.patterns[i]: int(vol[i]) for i in order if vol[i] > 0}
+
+    def scheme_column(self) -> List[str]:
+        out = []
+        for kind, sets, lo, hi, t, rest in zip(self.kind.tolist(), self.sets.tolist(), self.rep_lo.tolist(),
+                                               self.rep_hi.tolist(), self.time_sec.tolist(), self.rest.tolist()):
+            if kind == KIND_SETS_REPS:
+                out.append(f"{sets} x {format_reps((lo, hi))}")
+            elif kind == KIND_TIMED:
+                out.append(f"{sets} rounds of {t}s work / {rest}s rest")
+            else:
+                out.append(f"{sets} x {t}s")
+        return out
+
+    def to_dataframe(self, videos: Optional[List[str]] = None):
+        """Export frame with the same columns and values as the old row-by-row builder."""
+        import pandas as pd
+
+        rir = self.rir
+        if not np.isnan(rir).any():
+            rir = rir.astype(np.int64)
+        day_names = [f"Day {k+1}" for k in self.day_keys]
+        return pd.DataFrame({
+            "Day": [day_names[d] for d in self.day.tolist()],
+            "Exercise": self.name,
+            "Pattern": [self.patterns[c] for c in self.pattern_code.tolist()],
+            "Scheme": self.scheme_column(),
+            "Rest (s)": self.rest,
+            "Tempo": self.tempo_txt,
+            "RIR": rir,
+            "Notes": self.notes,
+            "Video": videos if videos is not None else [""] * len(self),
+        })
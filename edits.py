@@ -0,0 +1,170 @@
+"""Incremental plan edits: reroll one day or swap one exercise, recorded in the Plan Code.
+
+Every day draws from its own random stream (streams.py), so an edit only has to rebuild
+what it touches: a reroll rebuilds one day from a new stream, a swap replaces one item.
+Edits are appended to the Plan Code in the order they were made, e.g.
+`42+d2r1+d2s3+d2s3` is plan 42 with day 2 rerolled once, then its 3rd card swapped
+twice (day and card numbers are 1-based, as shown in the UI). `apply_edits` replays the
+log on the base week with the same seeds the app used, so a derived code always
+reproduces the same plan. A reroll drops the earlier edits of its day from the log.
+
+Codes with `+v2` right after the seed (`42+v2+d2r1`) use the hierarchical streams; all
+other codes use the legacy ones they were created with.
+"""
+import dataclasses
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from models import PlanItem
+from planner import build_day_plan, candidate_pool, patterns_for_week, scheme_for
+from sampler import WeightedPool
+from streams import LEGACY, SCHEMES, day_rng, swap_rng
+
+_EDIT_RE = re.compile(r"\+d(\d+)(?:r(\d+)|s(\d+))")
+_CODE_RE = re.compile(r"(\d+)(?:\+v(\d+))?((?:\+d\d+(?:r\d+|s\d+))*)")
+
+
+@dataclass(frozen=True)
+class PlanSpec:
+    """Everything `generate_week` needs, in its normalized form."""
+    goal_key: str
+    days: int
+    minutes: int
+    experience: str
+    equip_norm: Tuple[str, ...]
+    avoid: Tuple[str, ...]
+    focus: Tuple[str, ...]
+    seed: int
+    streams: int = LEGACY
+
+    def pool(self) -> WeightedPool:
+        return candidate_pool(self.goal_key, list(self.equip_norm), self.experience, list(self.avoid),
+                              list(self.focus))
+
+    def day_patterns(self, day: int) -> List[str]:
+        return patterns_for_week(self.days, self.goal_key)[day]
+
+
+@dataclass(frozen=True)
+class PlanEdits:
+    """Edit log, in the order applied: ("r", day, variant) rerolls and ("s", day, card) swaps.
+
+    Days and cards are 0-based here. `streams` is the code's random-stream scheme.
+    """
+    steps: Tuple[tuple, ...] = ()
+    streams: int = LEGACY
+
+    def __bool__(self) -> bool:
+        return bool(self.steps)
+
+    def days(self) -> List[int]:
+        return sorted({step[1] for step in self.steps})
+
+    def reroll_of(self, day: int) -> int:
+        return max((v for kind, d, v in self.steps if kind == "r" and d == day), default=0)
+
+    def swaps_of(self, day: int, slot: int) -> int:
+        return sum(1 for step in self.steps if step == ("s", day, slot))
+
+    def with_reroll(self, day: int) -> "PlanEdits":
+        """Reroll `day` once more; its earlier swaps no longer apply and are dropped."""
+        kept = tuple(step for step in self.steps if step[1] != day)
+        return dataclasses.replace(self, steps=kept + (("r", day, self.reroll_of(day) + 1),))
+
+    def with_swap(self, day: int, slot: int) -> "PlanEdits":
+        return dataclasses.replace(self, steps=self.steps + (("s", day, slot),))
+
+
+def format_plan_code(seed: int, edits: Optional[PlanEdits] = None) -> str:
+    parts = [str(seed)]
+    if edits is not None and edits.streams != LEGACY:
+        parts.append(f"v{edits.streams}")
+    for kind, day, arg in (edits.steps if edits else ()):
+        parts.append(f"d{day + 1}r{arg}" if kind == "r" else f"d{day + 1}s{arg + 1}")
+    return "+".join(parts)
+
+
+def parse_plan_code(code: str) -> Tuple[int, PlanEdits]:
+    """"42", "42+d2r1+d2s3" or "42+v2+d2r1" -> (seed, edits); raises ValueError if malformed."""
+    m = _CODE_RE.fullmatch(str(code).strip().replace(" ", ""))
+    if not m:
+        raise ValueError(f"invalid plan code: {code!r}")
+    streams = int(m.group(2) or LEGACY)
+    if streams not in SCHEMES:
+        raise ValueError(f"unknown stream version v{streams} in plan code {code!r}")
+    steps = []
+    for day, reroll, slot in _EDIT_RE.findall(m.group(3)):
+        if int(day) < 1 or (slot and int(slot) < 1) or (reroll and int(reroll) < 1):
+            raise ValueError(f"invalid plan code: {code!r}")
+        steps.append(("r", int(day) - 1, int(reroll)) if reroll else ("s", int(day) - 1, int(slot) - 1))
+    return int(m.group(1)), PlanEdits(tuple(steps), streams)
+
+
+def check_edits(week_plan: Dict[int, List[PlanItem]], edits: PlanEdits) -> None:
+    """Raise ValueError if an edit names a day or card `week_plan` (the edited week) doesn't have."""
+    for kind, day, arg in edits.steps:
+        if day >= len(week_plan):
+            raise ValueError(f"edit d{day + 1}: the plan has {len(week_plan)} days")
+        if kind == "s":
+            items = week_plan[day]
+            if arg >= len(items):
+                raise ValueError(f"edit d{day + 1}s{arg + 1}: day {day + 1} has {len(items)} cards")
+            if items[arg]["name"] == "Warm-up":
+                raise ValueError(f"edit d{day + 1}s{arg + 1}: the warm-up can't be swapped")
+
+
+def build_day(spec: PlanSpec, day: int, reroll: int = 0, pool: Optional[WeightedPool] = None,
+              mode: str = "greedy") -> List[PlanItem]:
+    """One day of the plan; reroll 0 is the day `generate_week` builds."""
+    rng = day_rng(spec.seed, day, reroll, spec.streams)
+    return build_day_plan(pool or spec.pool(), spec.day_patterns(day), rng, spec.goal_key, spec.experience,
+                          spec.minutes, mode)
+
+
+def swap_item(spec: PlanSpec, day: int, items: List[PlanItem], slot: int, variant: int,
+              pool: Optional[WeightedPool] = None) -> List[PlanItem]:
+    """`items` with card `slot` replaced by another exercise, preferably of the same pattern.
+
+    Exercises already in the day are excluded; if nothing is left the day is returned as is.
+    """
+    current = items[slot]
+    if current["name"] == "Warm-up":
+        raise ValueError("the warm-up can't be swapped")
+    sampler = (pool or spec.pool()).sampler()
+    for it in items:
+        sampler.remove(it["name"])
+    ex = sampler.draw(current["pattern"], swap_rng(spec.seed, day, slot, variant, spec.streams))
+    if ex is None:
+        return items
+    out = list(items)
+    out[slot] = PlanItem(ex, scheme_for(spec.goal_key, ex["pattern"], spec.experience, spec.minutes))
+    return out
+
+
+def build_edited_day(spec: PlanSpec, day: int, edits: PlanEdits, pool: Optional[WeightedPool] = None,
+                     base: Optional[List[PlanItem]] = None) -> List[PlanItem]:
+    """Replay the log for one day: from its last reroll, then each swap in order.
+
+    `base` is the day before any edit (e.g. an adapted day); by default the generated one.
+    """
+    pool = pool or spec.pool()
+    reroll = edits.reroll_of(day)
+    items = build_day(spec, day, reroll, pool) if reroll or base is None else base
+    done: Dict[int, int] = {}
+    for kind, d, slot in edits.steps:
+        if kind != "s" or d != day or slot >= len(items) or items[slot]["name"] == "Warm-up":
+            continue
+        done[slot] = done.get(slot, 0) + 1
+        items = swap_item(spec, day, items, slot, done[slot], pool)
+    return items
+
+
+def apply_edits(spec: PlanSpec, week_plan: Dict[int, List[PlanItem]], edits: PlanEdits) -> Dict[int, List[PlanItem]]:
+    """`week_plan` (the unedited week for `spec`, or an adapted one) with only the edited days rebuilt."""
+    out = dict(week_plan)
+    pool = spec.pool()
+    for day in edits.days():
+        if day in out:
+            out[day] = build_edited_day(spec, day, edits, pool, out[day])
+    return out
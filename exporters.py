@@ -0,0 +1,372 @@
+"""CSV / Markdown / NDJSON / Parquet exporters for generated plans.
+
+The writers stream rows straight from the plan items to a file-like object, one plan
+(a week, a program week or a roster profile) at a time, without building a DataFrame
+or the whole document first, so memory stays flat for batch and multi-week output:
+
+* `CsvWriter`    – the app's CSV download, byte-identical to the old pandas output,
+* `write_markdown` – the Markdown download,
+* `NdjsonWriter` – one typed JSON record per plan item,
+* `ArrowWriter`  – the same records as Parquet or an Arrow IPC stream (needs pyarrow),
+  flushed in record batches.
+
+Each writer can prefix every row with key columns (e.g. "Week" or "Profile") and looks
+each exercise's video up once. pandas is only imported by `plan_to_dataframe`, for the
+on-screen tables; pyarrow only when an `ArrowWriter` is created.
+"""
+import csv
+import io
+import json
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, TextIO
+
+from metrics import METRICS
+from models import format_reps, item_rep_range
+
+# exercise name -> YouTube videoId (or None); None disables video links entirely
+VideoLookup = Optional[Callable[[str], Optional[str]]]
+
+CSV_COLUMNS = ("Day", "Exercise", "Pattern", "Scheme", "Rest (s)", "Tempo", "RIR", "Notes", "Video")
+# typed per-item fields of the NDJSON / Arrow records (days and cards are 1-based)
+RECORD_FIELDS = ("day", "card", "exercise", "pattern", "type", "sets", "rep_min", "rep_max", "time_sec",
+                 "rest_sec", "tempo", "rir", "notes", "video")
+# key columns of program records (week and block 1-based)
+PROGRAM_KEYS = ("week", "block", "deload")
+DEFAULT_BATCH_ROWS = 8192
+
+
+def video_url(video_id: Optional[str]) -> str:
+    return f"https://www.youtube.com/watch?v={video_id}" if video_id else ""
+
+
+def memoized_lookup(video_lookup: VideoLookup) -> VideoLookup:
+    """`video_lookup` asking at most once per exercise name (warm-ups never)."""
+    if not video_lookup:
+        return None
+    seen: Dict[str, Optional[str]] = {"Warm-up": None}
+
+    def lookup(name: str) -> Optional[str]:
+        if name not in seen:
+            seen[name] = video_lookup(name)
+        return seen[name]
+    return lookup
+
+
+def scheme_text(it) -> str:
+    """The CSV "Scheme" cell, e.g. "3 x 8–12" or "4 rounds of 40s work / 20s rest"."""
+    if it["type"] == "sets_reps":
+        return f'{it["sets"]} x {format_reps(item_rep_range(it))}'
+    if it["type"] == "timed":
+        return f'{it["sets"]} rounds of {it["time_sec"]}s work / {it["rest_sec"]}s rest'
+    return f'{it["sets"]} x {it["time_sec"]}s'
+
+
+def has_missing_rir(week_plan: Dict[int, List[Dict]]) -> bool:
+    """True if any item has no RIR; pandas then wrote the whole RIR column as floats ("2.0")."""
+    return any(it.get("rir") is None for items in week_plan.values() for it in items)
+
+
+def csv_rows(day_idx: int, items: List[Dict], video_lookup: VideoLookup = None,
+             float_rir: bool = False) -> Iterator[list]:
+    """CSV cells of one day's items (see `CsvWriter`)."""
+    day = f"Day {day_idx+1}"
+    for it in items:
+        rest = it.get("rest_sec", 75) if it["type"] == "sets_reps" else it["rest_sec"]
+        rir = it.get("rir")
+        if rir is None:
+            rir = ""
+        elif float_rir:
+            rir = float(rir)
+        vid = video_lookup(it["name"]) if video_lookup and it["name"] != "Warm-up" else None
+        yield [day, it["name"], it.get("pattern") or "", scheme_text(it), rest, it.get("tempo", ""), rir,
+               it.get("notes", ""), video_url(vid)]
+
+
+def plan_records(week_plan: Dict[int, List[Dict]], video_lookup: VideoLookup = None) -> Iterator[tuple]:
+    """Typed values in RECORD_FIELDS order, one tuple per plan item."""
+    for day_idx, items in week_plan.items():
+        for card, it in enumerate(items, start=1):
+            reps = item_rep_range(it) if it["type"] == "sets_reps" else (None, None)
+            vid = video_lookup(it["name"]) if video_lookup and it["name"] != "Warm-up" else None
+            yield (day_idx + 1, card, it["name"], it.get("pattern") or "", it["type"], it["sets"], reps[0], reps[1],
+                   it.get("time_sec") if it["type"] != "sets_reps" else None, it.get("rest_sec", 75),
+                   it.get("tempo", ""), it.get("rir"), it.get("notes", ""), video_url(vid) or None)
+
+
+class CsvWriter:
+    """The app's CSV for one or more plans, written to `fp` plan by plan.
+
+    `keys` are extra leading columns whose values are passed to `write`, e.g.
+    `CsvWriter(fp, keys=("Week",)).write(plan, "Week 2")`. The header is written with the
+    first plan. Output matches `plan_to_dataframe(...).to_csv(index=False)` per plan.
+    """
+
+    def __init__(self, fp: TextIO, video_lookup: VideoLookup = None, keys: Sequence[str] = (), header: bool = True):
+        self._csv = csv.writer(fp, lineterminator="\n")
+        self.video_lookup = memoized_lookup(video_lookup)
+        self.keys = tuple(keys)
+        self._header = header
+        self.rows = 0
+
+    def write(self, week_plan: Dict[int, List[Dict]], *key_values) -> int:
+        if len(key_values) != len(self.keys):
+            raise ValueError(f"expected values for {self.keys}, got {key_values!r}")
+        if self._header:
+            self._csv.writerow(self.keys + CSV_COLUMNS)
+            self._header = False
+        float_rir = has_missing_rir(week_plan)
+        n = 0
+        for day_idx, items in week_plan.items():
+            for row in csv_rows(day_idx, items, self.video_lookup, float_rir):
+                self._csv.writerow([*key_values, *row])
+                n += 1
+        self.rows += n
+        return n
+
+
+class NdjsonWriter:
+    """One JSON object per plan item: `keys` fields first, then RECORD_FIELDS."""
+
+    def __init__(self, fp: TextIO, video_lookup: VideoLookup = None, keys: Sequence[str] = ()):
+        self.fp = fp
+        self.video_lookup = memoized_lookup(video_lookup)
+        self.keys = tuple(keys)
+        self.rows = 0
+
+    def write(self, week_plan: Dict[int, List[Dict]], *key_values) -> int:
+        return self.write_records(plan_records(week_plan, self.video_lookup), *key_values)
+
+    def write_records(self, records: Iterable[tuple], *key_values) -> int:
+        if len(key_values) != len(self.keys):
+            raise ValueError(f"expected values for {self.keys}, got {key_values!r}")
+        fields = self.keys + RECORD_FIELDS
+        n = 0
+        for rec in records:
+            self.fp.write(json.dumps(dict(zip(fields, (*key_values, *rec))), ensure_ascii=False) + "\n")
+            n += 1
+        self.rows += n
+        return n
+
+
+class ArrowWriter:
+    """Plan records as Parquet (`fmt="parquet"`) or an Arrow IPC stream (`fmt="arrow"`).
+
+    Rows are buffered column-wise and written as a record batch every `batch_rows` rows,
+    so memory is bounded by the batch size, not the output. Key column types are taken
+    from the first values passed to `write`. Use as a context manager, or call `close`
+    to write the footer.
+    """
+
+    def __init__(self, fp, video_lookup: VideoLookup = None, keys: Sequence[str] = (), fmt: str = "parquet",
+                 batch_rows: int = DEFAULT_BATCH_ROWS):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise ImportError("Parquet/Arrow export needs pyarrow (pip install pyarrow)") from e
+        if fmt not in ("parquet", "arrow"):
+            raise ValueError(f"unknown format {fmt!r}")
+        self.fp = fp
+        self.fmt = fmt
+        self.video_lookup = memoized_lookup(video_lookup)
+        self.keys = tuple(keys)
+        self.batch_rows = batch_rows
+        self.rows = 0
+        self._columns: List[list] = [[] for _ in self.keys + RECORD_FIELDS]
+        self._schema = None
+        self._writer = None
+
+    def _make_schema(self, key_values: tuple):
+        import pyarrow as pa
+
+        # key types from the first values; string if nothing was written
+        key_fields = [pa.field(k, pa.scalar(v).type if key_values else pa.string())
+                      for k, v in zip(self.keys, key_values or self.keys)]
+        i32, s = pa.int32(), pa.string()
+        return pa.schema(key_fields + [
+            pa.field("day", i32), pa.field("card", i32), pa.field("exercise", s), pa.field("pattern", s),
+            pa.field("type", s), pa.field("sets", i32), pa.field("rep_min", i32), pa.field("rep_max", i32),
+            pa.field("time_sec", i32), pa.field("rest_sec", i32), pa.field("tempo", s), pa.field("rir", i32),
+            pa.field("notes", s), pa.field("video", s),
+        ])
+
+    def write(self, week_plan: Dict[int, List[Dict]], *key_values) -> int:
+        return self.write_records(plan_records(week_plan, self.video_lookup), *key_values)
+
+    def write_records(self, records: Iterable[tuple], *key_values) -> int:
+        if len(key_values) != len(self.keys):
+            raise ValueError(f"expected values for {self.keys}, got {key_values!r}")
+        if self._schema is None:
+            self._schema = self._make_schema(key_values)
+        cols = self._columns
+        n = 0
+        for rec in records:
+            for col, v in zip(cols, (*key_values, *rec)):
+                col.append(v)
+            n += 1
+            if len(cols[0]) >= self.batch_rows:
+                self._flush()
+                cols = self._columns
+        self.rows += n
+        return n
+
+    def _flush(self) -> None:
+        import pyarrow as pa
+
+        if self._writer is None:
+            if self.fmt == "parquet":
+                import pyarrow.parquet as pq
+
+                self._writer = pq.ParquetWriter(self.fp, self._schema)
+            else:
+                self._writer = pa.ipc.new_stream(self.fp, self._schema)
+        batch = pa.RecordBatch.from_arrays(
+            [pa.array(col, type=f.type) for col, f in zip(self._columns, self._schema)], schema=self._schema)
+        self._writer.write_batch(batch)
+        self._columns = [[] for _ in self._columns]
+
+    def close(self) -> None:
+        if self._schema is None:  # nothing written: still produce a valid, empty file
+            self._schema = self._make_schema(())
+        if self._columns[0] or self._writer is None:
+            self._flush()
+        self._writer.close()
+
+    def __enter__(self) -> "ArrowWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def plan_to_dataframe(week_plan: Dict[int, List[Dict]], video_lookup: VideoLookup = None, columns=None):
+    """Export frame built column-wise from a `WeekColumns` (pass `columns` to reuse one)."""
+    from columnar import WeekColumns
+
+    with METRICS.stage("dataframe"):
+        cols = columns if columns is not None else WeekColumns(week_plan)
+        videos = None
+        if video_lookup:
+            videos = []
+            for name, warmup in zip(cols.name, cols.is_warmup.tolist()):
+                vid = None if warmup else video_lookup(name)
+                videos.append(video_url(vid))
+        return cols.to_dataframe(videos)
+
+def markdown_day(day_idx: int, items: List[Dict], video_lookup: VideoLookup = None, level: int = 2) -> str:
+    """One day's section of `markdown_plan` (starting with its "## Day N" heading)."""
+    lines = [f"\n{'#' * level} Day {day_idx+1}\n"]
+    for it in items:
+        if it["type"] == "sets_reps":
+            scheme = f'{it["sets"]} x {it["reps"]} — rest {it["rest_sec"]}s'
+        elif it["type"] == "timed":
+            scheme = f'{it["sets"]} rounds — {it["time_sec"]}s work / {it["rest_sec"]}s rest'
+        else:
+            scheme = f'{it["sets"]} x {it["time_sec"]}s — rest {it["rest_sec"]}s'
+        vid = ""
+        if video_lookup and it["name"] != "Warm-up":
+            v = video_lookup(it["name"])
+            if v:
+                vid = f"  \n[Demo]({video_url(v)})"
+        extras = []
+        if it.get("tempo"): extras.append(f"Tempo {it['tempo']}")
+        if it.get("rir") is not None: extras.append(f"RIR {it['rir']}")
+        extras_txt = (" — " + " · ".join(extras)) if extras else ""
+        lines.append(f"- **{it['name']}** ({it['pattern']}) — {scheme}.{extras_txt} {it.get('notes','')}{vid}")
+    return "\n".join(lines)
+
+def markdown_plan(week_plan: Dict[int, List[Dict]], video_lookup: VideoLookup = None) -> str:
+    sections = ["# Weekly Workout Plan"]
+    for day_idx, items in week_plan.items():
+        sections.append(markdown_day(day_idx, items, video_lookup))
+    return "\n".join(sections)
+
+def write_markdown(week_plan: Dict[int, List[Dict]], fp: TextIO, video_lookup: VideoLookup = None) -> None:
+    """`markdown_plan` written to `fp` one day section at a time."""
+    video_lookup = memoized_lookup(video_lookup)
+    fp.write("# Weekly Workout Plan")
+    for day_idx, items in week_plan.items():
+        fp.write("\n")
+        fp.write(markdown_day(day_idx, items, video_lookup))
+
+
+class PlanExports:
+    """CSV lines and Markdown section kept per day, plus the on-screen DataFrame.
+
+    Built once from the plan's `WeekColumns`; after an edit only the changed day is
+    re-exported with `replace_day`, and the downloads are re-joined from the pieces.
+    The downloads are written by `csv_rows` / `markdown_day` without pandas.
+    """
+
+    def __init__(self, week_plan: Dict[int, List[Dict]], video_lookup: VideoLookup = None, columns=None):
+        import numpy as np
+
+        self.video_lookup = video_lookup
+        self.week_plan = dict(week_plan)
+        df = plan_to_dataframe(week_plan, video_lookup, columns=columns)
+        day = columns.day if columns is not None else df["Day"].map({f"Day {k+1}": i for i, k in enumerate(week_plan)})
+        bounds = np.searchsorted(np.asarray(day), np.arange(len(week_plan) + 1))
+        self.header = ",".join(CSV_COLUMNS) + "\n"
+        self.float_rir = has_missing_rir(week_plan)
+        self.frames: Dict[int, object] = {}
+        self.csv: Dict[int, str] = {}
+        self.markdown: Dict[int, str] = {}
+        for i, (day_idx, items) in enumerate(week_plan.items()):
+            self.frames[day_idx] = df.iloc[bounds[i]:bounds[i + 1]]
+            self._set_day(day_idx, items)
+
+    def _set_day(self, day_idx: int, items: List[Dict]) -> None:
+        with METRICS.stage("export_day"):
+            buf = io.StringIO()
+            csv.writer(buf, lineterminator="\n").writerows(csv_rows(day_idx, items, self.video_lookup, self.float_rir))
+            self.csv[day_idx] = buf.getvalue()
+            self.markdown[day_idx] = markdown_day(day_idx, items, self.video_lookup)
+
+    def replace_day(self, day_idx: int, items: List[Dict]) -> None:
+        self.week_plan[day_idx] = items
+        self.frames[day_idx] = plan_to_dataframe({day_idx: items}, self.video_lookup)
+        float_rir = has_missing_rir(self.week_plan)
+        if float_rir != self.float_rir:  # the RIR column changes type for every day
+            self.float_rir = float_rir
+            for d, its in self.week_plan.items():
+                self._set_day(d, its)
+        else:
+            self._set_day(day_idx, items)
+
+    def dataframe(self):
+        import pandas as pd
+
+        return pd.concat(list(self.frames.values()), ignore_index=True)
+
+    def csv_bytes(self) -> bytes:
+        return (self.header + "".join(self.csv.values())).encode("utf-8")
+
+    def markdown_bytes(self) -> bytes:
+        return "\n".join(["# Weekly Workout Plan", *self.markdown.values()]).encode("utf-8")
+
+
+def write_program_csv(weeks: Iterable, fp: TextIO, video_lookup: VideoLookup = None) -> int:
+    """Stream a multi-week program (`ProgramWeek`s) to `fp`, one week's rows at a time.
+
+    Same columns as the plan CSV with a leading "Week" column. Returns rows written.
+    """
+    writer = CsvWriter(fp, video_lookup, keys=("Week",))
+    for week in weeks:
+        writer.write(week.plan, week.label)
+    return writer.rows
+
+def write_program_records(weeks: Iterable, writer) -> int:
+    """Program weeks into an `NdjsonWriter` / `ArrowWriter` created with `PROGRAM_KEYS`. Returns rows written."""
+    for week in weeks:
+        writer.write(week.plan, week.index + 1, week.block + 1, week.deload)
+    return writer.rows
+
+def write_program_markdown(weeks: Iterable, fp: TextIO, video_lookup: VideoLookup = None) -> int:
+    """Stream a multi-week program to `fp` as Markdown, one week section at a time. Returns weeks written."""
+    video_lookup = memoized_lookup(video_lookup)
+    fp.write("# Training Program")
+    n = 0
+    for n, week in enumerate(weeks, start=1):
+        fp.write(f"\n\n## {week.label}\n")
+        for day_idx, items in week.plan.items():
+            fp.write(markdown_day(day_idx, items, video_lookup, level=3))
+            fp.write("\n")
+    return n
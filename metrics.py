@@ -0,0 +1,246 @@
+"""Hot-path instrumentation: per-stage timers, event counters and structured run logs.
+
+Off by default. Set WORKOUT_METRICS=1 (or call `METRICS.enable()`) to record:
+
+* stage timers – `with METRICS.stage("filter"): ...` adds the elapsed time to a
+  Prometheus-style histogram (fixed buckets, so p50/p99 can be aggregated across
+  processes and sessions) and keeps the last RECENT_SAMPLES for local quantiles;
+* counters – `METRICS.count("picks", n)`; hot loops count in locals and report once
+  per call;
+* collectors – callables returning (nested) dicts of numbers, e.g. `LRUCache.stats`,
+  read at export time, so existing cache/quota counters cost nothing extra;
+* traces – `begin_trace`/`end_trace` around one request (a Streamlit run, a batch
+  profile) log one JSON line with that request's stage times and counters.
+
+When disabled, `stage()` returns a shared no-op context manager and the other calls
+return after one attribute check.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+# upper bounds in seconds, Prometheus `le` labels (+Inf implied)
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RECENT_SAMPLES = 1024
+PREFIX = "workout"
+
+logger = logging.getLogger("workout_planner.metrics")
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics: "Metrics", name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _Histogram:
+    __slots__ = ("buckets", "count", "sum", "recent")
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def add(self, seconds: float) -> None:
+        self.buckets[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.recent.append(seconds)
+
+
+def _quantile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def _flatten(prefix: str, value, out: Dict[str, float]) -> None:
+    if isinstance(value, dict):
+        for k, v in value.items():
+            _flatten(f"{prefix}_{k}", v, out)
+    elif isinstance(value, (bool, int, float)):
+        out[prefix] = float(value)
+
+
+def _escape(label: str) -> str:
+    return label.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics:
+    """Process-wide registry; all updates go through one lock."""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stages: Dict[str, _Histogram] = {}
+        self._counters: Dict[str, int] = {}
+        self._collectors: Dict[str, Callable[[], Dict]] = {}
+        self._local = threading.local()
+
+    def enable(self, on: bool = True) -> None:
+        self.enabled = on
+
+    def stage(self, name: str):
+        """Context manager timing one execution of stage `name`."""
+        return _Stage(self, name) if self.enabled else _NULL_STAGE
+
+    def observe(self, name: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            hist = self._stages.get(name)
+            if hist is None:
+                hist = self._stages[name] = _Histogram()
+            hist.add(seconds)
+        trace = getattr(self._local, "trace", None)
+        if trace is not None:
+            stages = trace["stages"]
+            stages[name] = stages.get(name, 0.0) + seconds
+
+    def count(self, name: str, n: int = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+        trace = getattr(self._local, "trace", None)
+        if trace is not None:
+            counters = trace["counters"]
+            counters[name] = counters.get(name, 0) + n
+
+    def register(self, name: str, collect: Callable[[], Dict]) -> None:
+        """Export `collect()`'s numbers as gauges named `<name>_<key>...` (replaces an earlier one)."""
+        with self._lock:
+            self._collectors[name] = collect
+
+    # Traces
+
+    def begin_trace(self, event: str, **fields) -> None:
+        """Start collecting this thread's stage times and counters for one request."""
+        if self.enabled:
+            self._local.trace = {"event": event, **fields, "start": time.perf_counter(), "stages": {}, "counters": {}}
+
+    def end_trace(self, **fields) -> Optional[Dict]:
+        """Finish the thread's trace, log it as one JSON line and return it (None if none is open)."""
+        trace = getattr(self._local, "trace", None)
+        if trace is None:
+            return None
+        self._local.trace = None
+        record = {k: v for k, v in trace.items() if k not in ("start", "stages", "counters")}
+        record.update(fields)
+        record["total_ms"] = round((time.perf_counter() - trace["start"]) * 1000, 3)
+        record["stages_ms"] = {k: round(v * 1000, 3) for k, v in trace["stages"].items()}
+        record["counters"] = trace["counters"]
+        logger.info(json.dumps(record, separators=(",", ":"), default=str))
+        return record
+
+    # Export
+
+    def snapshot(self) -> Dict:
+        """Stages (count, total, p50/p99 of recent samples, in ms), counters and collector values."""
+        with self._lock:
+            stages = {name: (h.count, h.sum, sorted(h.recent)) for name, h in self._stages.items()}
+            counters = dict(self._counters)
+            collectors = dict(self._collectors)
+        out = {"stages": {}, "counters": counters, "collectors": {}}
+        for name, (n, total, recent) in sorted(stages.items()):
+            out["stages"][name] = {"count": n, "total_ms": total * 1000, "mean_ms": total * 1000 / n,
+                                   "p50_ms": _quantile(recent, 0.5) * 1000, "p99_ms": _quantile(recent, 0.99) * 1000}
+        for name, collect in collectors.items():
+            try:
+                out["collectors"][name] = collect()
+            except Exception as e:  # a broken collector shouldn't take the page down
+                out["collectors"][name] = {"error": str(e)}
+        return out
+
+    def prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            stages = {name: (list(h.buckets), h.count, h.sum) for name, h in self._stages.items()}
+            counters = dict(self._counters)
+            collectors = dict(self._collectors)
+        lines = [f"# HELP {PREFIX}_stage_seconds Time spent per planner stage.",
+                 f"# TYPE {PREFIX}_stage_seconds histogram"]
+        for name, (buckets, n, total) in sorted(stages.items()):
+            label = _escape(name)
+            cumulative = 0
+            for le, b in zip(BUCKETS + ("+Inf",), buckets):
+                cumulative += b
+                lines.append(f'{PREFIX}_stage_seconds_bucket{{stage="{label}",le="{le}"}} {cumulative}')
+            lines.append(f'{PREFIX}_stage_seconds_sum{{stage="{label}"}} {total!r}')
+            lines.append(f'{PREFIX}_stage_seconds_count{{stage="{label}"}} {n}')
+        lines += [f"# HELP {PREFIX}_events_total Hot-path event counters.", f"# TYPE {PREFIX}_events_total counter"]
+        for name, n in sorted(counters.items()):
+            lines.append(f'{PREFIX}_events_total{{event="{_escape(name)}"}} {n}')
+        for name, collect in sorted(collectors.items()):
+            values: Dict[str, float] = {}
+            try:
+                _flatten(f"{PREFIX}_{name}", collect(), values)
+            except Exception:
+                continue
+            for key, v in values.items():
+                lines.append(f"# TYPE {key} gauge")
+                lines.append(f"{key} {v!r}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """Write `prometheus()` to `path` atomically (e.g. for node_exporter's textfile collector)."""
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+        os.replace(tmp, path)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+
+
+def configure_logging(stream=None) -> None:
+    """Log the app's INFO lines (traces, timings); to stderr (or `stream`) unless the host app
+    already has handlers, e.g. Streamlit's on the root logger, which then get them."""
+    app = logging.getLogger("workout_planner")
+    if app.getEffectiveLevel() > logging.INFO:
+        app.setLevel(logging.INFO)
+    if logger.handlers or logging.getLogger().handlers:
+        return
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+
+def stage_table(snapshot: Dict) -> List[Tuple[str, int, float, float, float]]:
+    """(stage, count, mean, p50, p99 in ms) rows, slowest mean first."""
+    rows = [(name, s["count"], s["mean_ms"], s["p50_ms"], s["p99_ms"]) for name, s in snapshot["stages"].items()]
+    return sorted(rows, key=lambda r: -r[2])
+
+
+METRICS = Metrics(enabled=os.environ.get("WORKOUT_METRICS", "") not in ("", "0"))
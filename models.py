@@ -0,0 +1,172 @@
+"""Compact, immutable plan types.
+
+A plan item used to be `{**exercise, **scheme}`: a fresh 14-key dict per item. Now an
+`Exercise` is built once per catalog entry (tuples instead of lists, interned strings),
+a `Scheme` is shared by every item with the same prescription, and a `PlanItem` is just
+two references. Schemes keep reps as an int range and the tempo pre-parsed; the "8–12"
+text is only produced when something reads `reps`.
+
+All three keep dict-style reads (`item["sets"]`, `item.get("tempo", "")`) so the
+builders, exporters and UI read them exactly like the old dicts.
+"""
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+_MISSING = object()
+
+
+class _ReadOnlyMapping:
+    """`obj[key]` / `obj.get(key)` on top of slotted attributes."""
+
+    __slots__ = ()
+    _keys: frozenset = frozenset()
+
+    def __getitem__(self, key: str):
+        if key in self._keys:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in self._keys else default
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._keys
+
+
+def _intern_all(values) -> Tuple[str, ...]:
+    return tuple(sys.intern(v) for v in values)
+
+
+@dataclass(frozen=True, slots=True)
+class Exercise(_ReadOnlyMapping):
+    name: str
+    pattern: str
+    equipment: Tuple[str, ...] = ()
+    level_min: str = "beginner"
+    contra: Tuple[str, ...] = ()
+    goal_tags: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> "Exercise":
+        return cls(
+            name=d["name"],
+            pattern=sys.intern(d["pattern"]),
+            equipment=_intern_all(d.get("equipment", ())),
+            level_min=sys.intern(d.get("level_min", "beginner")),
+            contra=_intern_all(d.get("contra", ())),
+            goal_tags=_intern_all(d.get("goal_tags", ())),
+        )
+
+
+# constants of the per-exercise time estimate
+PER_SET_OVERHEAD_SEC = 12
+TRANSITION_SEC = 45
+DEFAULT_TEMPO = (2, 0, 2)
+DEFAULT_REPS = 10
+
+
+def parse_tempo(tempo) -> Tuple[int, int, int]:
+    """Parse "3-1-2" into (3, 1, 2); anything else (e.g. "easy") gives DEFAULT_TEMPO."""
+    try:
+        ecc, pause, con = [int(x) for x in str(tempo).split("-")]
+    except Exception:
+        return DEFAULT_TEMPO
+    return ecc, pause, con
+
+
+def format_reps(rep_range: Optional[Tuple[int, int]]) -> Optional[str]:
+    """Render (8, 12) as "8–12"; only called when something displays the reps."""
+    if rep_range is None:
+        return None
+    lo, hi = rep_range
+    return f"{lo}–{hi}" if lo != hi else str(lo)
+
+
+def item_rep_range(it) -> Tuple[int, int]:
+    """(lo, hi) reps of a sets/reps item, PlanItem or plain dict ("8–12", 10 or missing)."""
+    rr = it.get("rep_range")
+    if rr is None:  # plain dict items
+        reps = it.get("reps")
+        if isinstance(reps, int):
+            rr = (reps, reps)
+        elif isinstance(reps, str) and "–" in reps:
+            rr = tuple(int(x) for x in reps.split("–"))
+    return rr or (DEFAULT_REPS, DEFAULT_REPS)
+
+
+def estimate_sec(type: str, sets: int, rep_range: Optional[Tuple[int, int]], time_sec: Optional[int],
+                 rest_sec: int, tempo_parts: Tuple[int, int, int]) -> int:
+    """Work + rest + overhead for one exercise."""
+    if type in ("timed", "hold"):
+        return (time_sec + rest_sec) * sets + TRANSITION_SEC
+    reps = (rep_range[0] + rep_range[1]) // 2 if rep_range else DEFAULT_REPS
+    work = (reps * sum(tempo_parts) + PER_SET_OVERHEAD_SEC) * sets
+    return work + max(0, sets - 1) * rest_sec + TRANSITION_SEC
+
+
+@dataclass(frozen=True, slots=True)
+class Scheme(_ReadOnlyMapping):
+    """Prescription with structured reps; `tempo_parts` and `est_sec` are derived once."""
+    type: str
+    sets: int
+    rep_range: Optional[Tuple[int, int]]
+    time_sec: Optional[int]
+    rest_sec: int
+    tempo: str
+    rir: Optional[int]
+    notes: str
+    tempo_parts: Tuple[int, int, int] = field(init=False)
+    est_sec: int = field(init=False)
+
+    def __post_init__(self):
+        parts = parse_tempo(self.tempo)
+        object.__setattr__(self, "tempo_parts", parts)
+        object.__setattr__(self, "est_sec", estimate_sec(self.type, self.sets, self.rep_range, self.time_sec,
+                                                         self.rest_sec, parts))
+
+    @property
+    def reps(self) -> Optional[str]:
+        return format_reps(self.rep_range)
+
+
+@dataclass(frozen=True, slots=True)
+class PlanItem(_ReadOnlyMapping):
+    exercise: Exercise
+    scheme: Scheme
+
+    def __getitem__(self, key: str):
+        if key in _SCHEME_KEYS:
+            return getattr(self.scheme, key)
+        if key in _EXERCISE_KEYS:
+            return getattr(self.exercise, key)
+        raise KeyError(key)
+
+    def get(self, key: str, default=None):
+        value = self.__getitem__(key) if key in _ALL_KEYS else _MISSING
+        return default if value is _MISSING else value
+
+    def __contains__(self, key: str) -> bool:
+        return key in _ALL_KEYS
+
+    def as_dict(self) -> Dict:
+        """The old merged-dict representation."""
+        return {**{k: self.exercise[k] for k in _EXERCISE_ORDER}, **{k: self.scheme[k] for k in _SCHEME_ORDER}}
+
+
+_EXERCISE_ORDER = ("name", "pattern", "equipment", "level_min", "contra", "goal_tags")
+# keys of the old scheme dicts, in their order
+_SCHEME_ORDER = ("type", "sets", "reps", "time_sec", "rest_sec", "tempo", "rir", "notes")
+_EXERCISE_KEYS = frozenset(_EXERCISE_ORDER)
+_SCHEME_KEYS = frozenset(_SCHEME_ORDER) | {"rep_range", "tempo_parts", "est_sec"}
+_ALL_KEYS = _EXERCISE_KEYS | _SCHEME_KEYS
+Exercise._keys = _EXERCISE_KEYS
+Scheme._keys = _SCHEME_KEYS
+
+WARMUP = PlanItem(
+    Exercise("Warm-up", "mobility"),
+    Scheme(
+        type="hold", sets=6, rep_range=None, time_sec=30, rest_sec=15, tempo="easy", rir=None,
+        notes="3–5 min: light cardio + dynamic mobility (hips, T-spine, shoulders). Add 2 ramp sets for your first big lift.",
+    ),
+)
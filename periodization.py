@@ -0,0 +1,180 @@
+"""Multi-week programs: progressive overload, deload weeks and planned exercise rotation.
+
+The program runs in blocks of BLOCK_WEEKS weeks: three loading weeks, then a deload.
+
+* Loading weeks progress the week-1 schemes. Sets/reps work goes +1 rep, then +1 set
+  and one rep closer to failure (RIR - 1). Timed and hold work goes +5 s per week.
+* Deload weeks halve the sets and leave two more reps in reserve.
+* Every block rotates the exercises: each one moves to its next allowed same-pattern
+  alternative in the substitution graph (see substitutes.py). The cycle returns to the
+  week-1 exercise after the last alternative, and the scheme is kept.
+
+Week `w` is a pure function of the week-1 plan and `w`, so `program_week` builds any week
+directly from (plan code, week index) without generating the earlier weeks. `program`
+yields weeks lazily, so a 52-week export never holds more than one week (plus the
+week-1 base) in memory. Given an executor, it builds the weeks concurrently instead,
+a window at a time, and yields them in order.
+"""
+import dataclasses
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from functools import partial
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from edits import PlanEdits, PlanSpec, apply_edits, build_edited_day
+from models import PlanItem, Scheme
+from planner import CATALOG, generate_week
+from substitutes import Adaptation, SubstitutionIndex, adapt_plan
+
+BLOCK_WEEKS = 4            # 3 loading weeks + 1 deload
+PARALLEL_WINDOW = 16       # weeks in flight when `program` runs on an executor
+PARALLEL_CHUNK = 4         # weeks per process-pool task (the base plan is pickled once per task)
+TIME_STEP_SEC = 5          # timed/hold progression per loading week
+DELOAD_NOTE = "Deload week: about half the sets, stop well short of failure."
+
+_SUBS: Optional[SubstitutionIndex] = None
+_PROGRESSED: Dict[Tuple[Scheme, int, bool], Scheme] = {}
+
+
+def substitution_index() -> SubstitutionIndex:
+    global _SUBS
+    if _SUBS is None:
+        _SUBS = SubstitutionIndex(CATALOG)
+    return _SUBS
+
+
+@dataclass(frozen=True)
+class ProgramWeek:
+    index: int                      # 0-based
+    block: int
+    deload: bool
+    plan: Dict[int, List[PlanItem]]
+
+    @property
+    def label(self) -> str:
+        return f"Week {self.index + 1}" + (" (deload)" if self.deload else "")
+
+
+def week_position(week: int) -> Tuple[int, int, bool]:
+    """(block, loading step, is deload) for a 0-based week index."""
+    block, step = divmod(week, BLOCK_WEEKS)
+    return block, step, step == BLOCK_WEEKS - 1
+
+
+def progress_scheme(scheme: Scheme, step: int, deload: bool) -> Scheme:
+    """The week's version of a week-1 scheme; equal results share one instance."""
+    key = (scheme, step, deload)
+    out = _PROGRESSED.get(key)
+    if out is not None:
+        return out
+    if deload:
+        changes = {"sets": max(1, (scheme.sets + 1) // 2), "notes": f"{scheme.notes} {DELOAD_NOTE}".strip()}
+        if scheme.rir is not None:
+            changes["rir"] = scheme.rir + 2
+    elif scheme.type == "sets_reps":
+        changes = {}
+        if step >= 1 and scheme.rep_range:
+            changes["rep_range"] = (scheme.rep_range[0] + 1, scheme.rep_range[1] + 1)
+        if step >= 2:
+            changes["sets"] = scheme.sets + 1
+            if scheme.rir is not None:
+                changes["rir"] = max(0, scheme.rir - 1)
+    else:
+        changes = {"time_sec": scheme.time_sec + TIME_STEP_SEC * step} if step and scheme.time_sec else {}
+    out = dataclasses.replace(scheme, **changes) if changes else scheme
+    return _PROGRESSED.setdefault(key, out)
+
+
+def rotate_day(items: List[PlanItem], block: int, allowed: int, subs: SubstitutionIndex) -> List[PlanItem]:
+    """Block `block` of the rotation: each exercise moves `block` steps along its cycle."""
+    if block == 0:
+        return items
+    ix = subs.index
+    taken = set()
+    out = []
+    for it in items:
+        pos = ix.position.get(it["name"])
+        if pos is None:  # warm-up
+            out.append(it)
+            continue
+        cycle = [pos] + [o for o in subs.alternatives_of(pos) if allowed >> o & 1]
+        start = block % len(cycle)
+        choice = pos
+        for k in range(len(cycle)):
+            cand = cycle[(start + k) % len(cycle)]
+            if ix.exercises[cand]["name"] not in taken:
+                choice = cand
+                break
+        taken.add(ix.exercises[choice]["name"])
+        out.append(it if choice == pos else PlanItem(ix.exercises[choice], it.scheme))
+    return out
+
+
+def base_week(spec: PlanSpec, edits: Optional[PlanEdits] = None,
+              executor: Optional[Executor] = None) -> Optional[Dict[int, List[PlanItem]]]:
+    """Week 1 exactly as the app generates it for this plan code (None if nothing matches)."""
+    plan = generate_week(spec.goal_key, spec.days, spec.minutes, spec.experience, list(spec.equip_norm),
+                         list(spec.avoid), list(spec.focus), spec.seed, streams=spec.streams, executor=executor)
+    if plan is not None and edits:
+        plan = apply_edits(spec, plan, edits)
+    return plan
+
+
+def adapt_week(week_plan: Dict[int, List[PlanItem]], edits: PlanEdits, spec: PlanSpec) -> Adaptation:
+    """`week_plan` (built with `edits`) fitted to `spec`'s equipment and limitations; a day
+    left without a substitute is rebuilt for `spec` with its edits."""
+    return adapt_plan(week_plan, substitution_index(), spec.goal_key, list(spec.equip_norm), spec.experience,
+                      list(spec.avoid), rebuild_day=lambda d: build_edited_day(spec, d, edits))
+
+
+def adapted_base_week(spec: PlanSpec, edits: PlanEdits, adaptations: List[Tuple[PlanSpec, PlanEdits]]
+                      ) -> Tuple[Optional[Dict[int, List[PlanItem]]], Optional[Adaptation]]:
+    """Week 1 of an adapted plan code (see plancode.py) and its last adaptation.
+
+    Starts from `base_week(spec, edits)`, then per (spec, edits since) adaptation fits the
+    plan to that spec and applies the later edits on top. (None, None) if nothing matches.
+    """
+    plan, result = base_week(spec, edits), None
+    for new_spec, new_edits in adaptations:
+        if plan is None or not new_spec.pool():
+            return None, None
+        result = adapt_week(plan, edits, new_spec)
+        plan = apply_edits(new_spec, result.week_plan, new_edits)
+        edits = new_edits
+    return plan, result
+
+
+def program_week(spec: PlanSpec, week: int, edits: Optional[PlanEdits] = None,
+                 base: Optional[Dict[int, List[PlanItem]]] = None) -> ProgramWeek:
+    """Any single week, built from the week-1 plan (pass `base` to reuse one) and its index."""
+    if base is None:
+        base = base_week(spec, edits)
+        if base is None:
+            raise ValueError("no exercises match this plan's filters")
+    block, step, deload = week_position(week)
+    allowed = CATALOG.filter_mask(spec.goal_key, spec.equip_norm, spec.experience.lower(), spec.avoid)
+    subs = substitution_index()
+    plan = {}
+    for day, items in base.items():
+        plan[day] = [
+            it if it["name"] == "Warm-up" else PlanItem(it.exercise, progress_scheme(it.scheme, step, deload))
+            for it in rotate_day(items, block, allowed, subs)
+        ]
+    return ProgramWeek(week, block, deload, plan)
+
+
+def program(spec: PlanSpec, weeks: int, edits: Optional[PlanEdits] = None,
+            base: Optional[Dict[int, List[PlanItem]]] = None, start: int = 0,
+            executor: Optional[Executor] = None) -> Iterator[ProgramWeek]:
+    """Weeks `start`..`weeks - 1`, generated one at a time (or PARALLEL_WINDOW at a time on `executor`)."""
+    if base is None:
+        base = base_week(spec, edits, executor)
+        if base is None:
+            return
+    if executor is None:
+        for week in range(start, weeks):
+            yield program_week(spec, week, base=base)
+        return
+    build = partial(program_week, spec, base=base)
+    for lo in range(start, weeks, PARALLEL_WINDOW):
+        yield from executor.map(build, range(lo, min(weeks, lo + PARALLEL_WINDOW)), chunksize=PARALLEL_CHUNK)
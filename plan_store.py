@@ -0,0 +1,235 @@
+"""Process-wide store of generated plans, addressed by extended Plan Code (see plancode.py).
+
+An extended code pins every input, so the plan behind it never changes: the first
+session to ask for a code builds it, and every later request (a shared link, a
+bookmark, another user with the same setup) is served from the store. Concurrent
+requests for a code nobody has built yet share one build (`SingleFlight`).
+
+Two tiers:
+
+* memory – an `LRUCache` of `StoredPlan`s (plan, columns and day summaries), bounded by
+  entry count, shared by every Streamlit session in the process;
+* disk (optional) – a SQLite table with the plans in a compact JSON form, so popular
+  plans survive restarts. Requests served from memory count towards a plan's
+  popularity too (flushed in batches). The table is bounded: past `max_disk_entries`
+  the least-requested (then least recently used) rows are dropped. Rows written against a different
+  exercise catalog are ignored and purged on open.
+
+Plans are stored as built and never mutated in place; the app's edits create new days.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from cache import LRUCache, SingleFlight
+from columnar import WeekColumns
+from metrics import METRICS
+from models import WARMUP, PlanItem, Scheme
+from planner import CATALOG, CATALOG_DIGEST
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "plans.sqlite3")
+DEFAULT_MAXSIZE = 512
+DEFAULT_MAX_DISK_ENTRIES = 20_000
+_FLUSH_EVERY = 64  # disk writes between hit-count flushes and bound checks
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS plans (
+    code       TEXT PRIMARY KEY,
+    catalog    TEXT NOT NULL,
+    payload    TEXT NOT NULL,
+    hits       INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    used_at    REAL NOT NULL
+)
+"""
+
+
+@dataclass(frozen=True)
+class StoredPlan:
+    week_plan: Dict[int, List[PlanItem]]
+    cols: WeekColumns
+    summaries: List[Dict]
+
+    @classmethod
+    def build(cls, week_plan: Dict[int, List[PlanItem]]) -> "StoredPlan":
+        with METRICS.stage("summarize"):
+            cols = WeekColumns(week_plan)
+            return cls(week_plan, cols, cols.day_summaries())
+
+
+def dump_plan(week_plan: Dict[int, List[PlanItem]]) -> str:
+    """Compact JSON: per day, [name, type, sets, rep range, time, rest, tempo, rir, notes] per item."""
+    days = []
+    for items in week_plan.values():
+        days.append([[it["name"], it["type"], it["sets"], it["rep_range"], it["time_sec"], it["rest_sec"],
+                      it["tempo"], it["rir"], it["notes"]] for it in items])
+    return json.dumps(days, ensure_ascii=False, separators=(",", ":"))
+
+
+def load_plan(payload: str) -> Optional[Dict[int, List[PlanItem]]]:
+    """`dump_plan` reversed against the current catalog (None if an exercise no longer exists)."""
+    schemes: Dict[tuple, Scheme] = {}
+    plan = {}
+    for day, rows in enumerate(json.loads(payload)):
+        items = []
+        for name, *fields in rows:
+            if name == WARMUP["name"]:
+                ex = WARMUP.exercise
+            else:
+                pos = CATALOG.position.get(name)
+                if pos is None:
+                    return None
+                ex = CATALOG.exercises[pos]
+            key = tuple(tuple(f) if isinstance(f, list) else f for f in fields)
+            scheme = schemes.get(key)
+            if scheme is None:
+                scheme = schemes[key] = Scheme(*key)
+            items.append(PlanItem(ex, scheme))
+        plan[day] = items
+    return plan
+
+
+class PlanStore:
+    """Extended Plan Code -> StoredPlan, in memory (LRU) and optionally on disk (`path`)."""
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, path: Optional[str] = None,
+                 max_disk_entries: int = DEFAULT_MAX_DISK_ENTRIES):
+        self.memory = LRUCache(maxsize)
+        self.path = path
+        self.max_disk_entries = max_disk_entries
+        self._flights = SingleFlight()
+        self._lock = threading.Lock()
+        self._counts = {"requests": 0, "memory_hits": 0, "disk_hits": 0, "builds": 0}
+        self._writes = 0
+        self._pending_hits: Dict[str, int] = {}
+        self._db = None
+        if path:
+            try:
+                if path != ":memory:":
+                    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+                # WAL without a sync per commit: losing the last writes in a power cut is fine for a cache
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("PRAGMA synchronous=NORMAL")
+                self._db.execute(_SCHEMA)
+                self._db.execute("DELETE FROM plans WHERE catalog != ?", (CATALOG_DIGEST,))
+            except (OSError, sqlite3.Error):
+                # read-only deploy: the memory tier still works
+                self._db = None
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._counts[key] += 1
+
+    def get(self, code: str) -> Optional[StoredPlan]:
+        """The plan for `code` from memory, else from disk (promoting it), else None."""
+        self._count("requests")
+        plan = self.memory.get(code)
+        if plan is not None:
+            self._count("memory_hits")
+            if self._db is not None:
+                with self._lock:
+                    self._pending_hits[code] = self._pending_hits.get(code, 0) + 1
+            return plan
+        if self._db is None:
+            return None
+        with self._lock:
+            row = self._db.execute("SELECT payload FROM plans WHERE code = ? AND catalog = ?",
+                                   (code, CATALOG_DIGEST)).fetchone()
+            if row is not None:
+                self._pending_hits[code] = self._pending_hits.get(code, 0) + 1
+                self._wrote()
+        week_plan = load_plan(row[0]) if row is not None else None
+        if week_plan is None:
+            return None
+        self._count("disk_hits")
+        plan = StoredPlan.build(week_plan)
+        self.memory.put(code, plan)
+        return plan
+
+    def put(self, code: str, plan: StoredPlan) -> None:
+        self.memory.put(code, plan)
+        if self._db is None:
+            return
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR IGNORE INTO plans (code, catalog, payload, hits, created_at, used_at) VALUES (?, ?, ?, 0, ?, ?)",
+                (code, CATALOG_DIGEST, dump_plan(plan.week_plan), now, now),
+            )
+            self._wrote()
+
+    def _wrote(self) -> None:
+        # caller holds the lock
+        self._writes += 1
+        if self._writes % _FLUSH_EVERY == 0:
+            self._flush_hits()
+            self._db.execute(
+                "DELETE FROM plans WHERE code IN (SELECT code FROM plans ORDER BY hits DESC, used_at DESC "
+                "LIMIT -1 OFFSET ?)", (self.max_disk_entries,),
+            )
+
+    def _flush_hits(self) -> None:
+        # caller holds the lock
+        if self._pending_hits:
+            now = time.time()
+            self._db.executemany("UPDATE plans SET hits = hits + ?, used_at = ? WHERE code = ?",
+                                 [(n, now, code) for code, n in self._pending_hits.items()])
+            self._pending_hits.clear()
+
+    def get_or_build(self, code: str, build: Callable[[], Optional[Dict[int, List[PlanItem]]]]) -> Optional[StoredPlan]:
+        """Stored plan for `code`, or `build()` it once (None results, i.e. no match, aren't stored)."""
+        plan = self.get(code)
+        if plan is not None:
+            return plan
+
+        def run() -> Optional[StoredPlan]:
+            plan = self.memory.get(code)  # built by a flight that landed since our miss
+            if plan is not None:
+                return plan
+            week_plan = build()
+            self._count("builds")
+            if week_plan is None:
+                return None
+            plan = StoredPlan.build(week_plan)
+            self.put(code, plan)
+            return plan
+        return self._flights.do(code, run)
+
+    def warm(self, n: int) -> int:
+        """Load the `n` most requested plans from disk into memory, e.g. at startup. Returns plans loaded."""
+        if self._db is None or n <= 0:
+            return 0
+        with self._lock:
+            self._flush_hits()
+            rows = self._db.execute("SELECT code, payload FROM plans WHERE catalog = ? ORDER BY hits DESC, used_at DESC "
+                                    "LIMIT ?", (CATALOG_DIGEST, min(n, self.memory.maxsize))).fetchall()
+        loaded = 0
+        for code, payload in reversed(rows):  # most requested ends up most recently used
+            week_plan = load_plan(payload)
+            if week_plan is not None:
+                self.memory.put(code, StoredPlan.build(week_plan))
+                loaded += 1
+        return loaded
+
+    def stats(self) -> Dict:
+        """Requests served from memory / disk, builds, tier sizes and the overall hit rate."""
+        with self._lock:
+            counts = dict(self._counts)
+            disk_size = self._db.execute("SELECT COUNT(*) FROM plans").fetchone()[0] if self._db is not None else 0
+        served = counts["memory_hits"] + counts["disk_hits"]
+        return {**counts, "hit_rate": served / counts["requests"] if counts["requests"] else 0.0,
+                "memory": {"size": len(self.memory), "maxsize": self.memory.maxsize,
+                           "evictions": self.memory.evictions},
+                "disk": {"enabled": self._db is not None, "size": disk_size},
+                "coalescing": self._flights.stats()}
+
+    def close(self) -> None:
+        if self._db is not None:
+            with self._lock:
+                self._flush_hits()
+                self._db.close()
@@ -0,0 +1,182 @@
+"""Extended Plan Codes: every sidebar input plus the seed and edits, in one short string.
+
+A plain Plan Code ("42", "42+d2r1") only holds the seed and edits, so reproducing a plan
+also means re-entering the sidebar. An extended code such as `p1k2m9x4ta7c+d2r1` is
+self-contained:
+
+* `p` + a version character,
+* the inputs packed into one integer (mixed radix, field order and sizes fixed per
+  version), written in lowercase Crockford base32,
+* one check character, so most typos are rejected instead of loading another plan,
+* the usual edit suffix (see edits.py).
+
+A plan adapted to new equipment or limitations (substitutes.py) isn't what its new
+inputs generate, so its code keeps the code it was adapted from and appends the new
+setup and the edits made since: `p1k2m9x4ta7c+d2r1+a3fq+d1r1` is that plan with day 2
+rerolled, adapted to equipment/limitations `3f` (check character `q`), then day 1
+rerolled. A plan can be adapted again; every adaptation adds one `+a` segment.
+
+Selections are stored as positions in planner's *_LABELS tuples. A new option or value
+range needs a new version entry in LAYOUTS; old codes keep decoding with theirs.
+"""
+import dataclasses
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+from edits import PlanEdits, format_plan_code, parse_plan_code
+from planner import EQUIPMENT_LABELS, EXPERIENCES, FOCUS_LABELS, GOAL_LABELS, LIMITATION_LABELS
+from streams import LEGACY
+
+CODE_VERSION = 1
+MAX_SEED = 10_000
+_ALPHABET = "0123456789abcdefghjkmnpqrstvwxyz"  # Crockford base32, no i/l/o/u
+_DIGITS = {c: i for i, c in enumerate(_ALPHABET)}
+_ALIASES = str.maketrans("ilo", "110")
+
+# version -> (field, radix), least significant first
+LAYOUTS: Dict[int, Tuple[Tuple[str, int], ...]] = {
+    1: (("seed", MAX_SEED + 1), ("goal", 5), ("days", 6), ("minutes", 15), ("experience", 3),
+        ("equipment", 1 << 7), ("constraints", 1 << 7), ("focus", 1 << 9)),
+}
+# the inputs an adaptation may change, packed like LAYOUTS
+ADAPT_LAYOUT = (("equipment", 1 << 7), ("constraints", 1 << 7))
+ADAPT_MARK = "+a"
+
+
+def _to_base32(n: int) -> str:
+    out = []
+    while True:
+        n, r = divmod(n, 32)
+        out.append(_ALPHABET[r])
+        if not n:
+            return "".join(reversed(out))
+
+
+def _check_char(body: str) -> str:
+    return _ALPHABET[hashlib.sha256(body.encode("ascii")).digest()[0] % 32]
+
+
+def _mask(selected: List[str], options: Tuple[str, ...]) -> int:
+    m = 0
+    for label in selected:
+        m |= 1 << options.index(label)
+    return m
+
+
+def _unmask(m: int, options: Tuple[str, ...]) -> List[str]:
+    return [label for i, label in enumerate(options) if m >> i & 1]
+
+
+def _normalize(code: str) -> str:
+    return str(code).strip().replace(" ", "").lower()
+
+
+def is_extended_code(code: str) -> bool:
+    return str(code).strip()[:1].lower() == "p"
+
+
+def encode_plan_code(inputs: Dict, seed: int, edits: Optional[PlanEdits] = None) -> str:
+    """Extended code for sidebar `inputs` (goal, days, minutes, experience, equipment, constraints, focus)."""
+    if not 0 <= seed <= MAX_SEED:
+        raise ValueError(f"seed must be 0..{MAX_SEED}")
+    if inputs["minutes"] % 5 or not 20 <= inputs["minutes"] <= 90 or not 1 <= inputs["days"] <= 6:
+        raise ValueError(f"days/minutes out of range: {inputs['days']}, {inputs['minutes']}")
+    values = {
+        "seed": seed,
+        "goal": GOAL_LABELS.index(inputs["goal"]),
+        "days": inputs["days"] - 1,
+        "minutes": (inputs["minutes"] - 20) // 5,
+        "experience": EXPERIENCES.index(inputs["experience"]),
+        "equipment": _mask(inputs["equipment"], EQUIPMENT_LABELS),
+        "constraints": _mask(inputs["constraints"], LIMITATION_LABELS),
+        "focus": _mask(inputs["focus"], FOCUS_LABELS),
+    }
+    n, scale = 0, 1
+    for name, radix in LAYOUTS[CODE_VERSION]:
+        n += values[name] * scale
+        scale *= radix
+    body = _ALPHABET[CODE_VERSION] + _to_base32(n)
+    suffix = format_plan_code(seed, edits)[len(str(seed)):]
+    return "p" + body + _check_char(body) + suffix
+
+
+def decode_plan_code(code: str) -> Tuple[Dict, int, PlanEdits]:
+    """`encode_plan_code` reversed: (sidebar inputs, seed, edits); raises ValueError if invalid."""
+    head, plus, suffix = _normalize(code).partition("+")
+    head = head.translate(_ALIASES)
+    if len(head) < 4 or head[0] != "p" or any(c not in _DIGITS for c in head[1:]):
+        raise ValueError(f"invalid plan code: {code!r}")
+    body, check = head[1:-1], head[-1]
+    version = _DIGITS[body[0]]
+    if version not in LAYOUTS:
+        raise ValueError(f"unsupported plan code version {version}")
+    if check != _check_char(body):
+        raise ValueError(f"plan code {code!r} failed its check (typo?)")
+    n = 0
+    for c in body[1:]:
+        n = n * 32 + _DIGITS[c]
+    values = {}
+    for name, radix in LAYOUTS[version]:
+        n, values[name] = divmod(n, radix)
+    if n or values["goal"] >= len(GOAL_LABELS) or values["experience"] >= len(EXPERIENCES):
+        raise ValueError(f"invalid plan code: {code!r}")
+    seed = values["seed"]
+    _, edits = parse_plan_code(f"{seed}{plus}{suffix}")
+    inputs = {
+        "goal": GOAL_LABELS[values["goal"]],
+        "days": values["days"] + 1,
+        "minutes": 20 + 5 * values["minutes"],
+        "experience": EXPERIENCES[values["experience"]],
+        "equipment": _unmask(values["equipment"], EQUIPMENT_LABELS),
+        "constraints": _unmask(values["constraints"], LIMITATION_LABELS),
+        "focus": _unmask(values["focus"], FOCUS_LABELS),
+    }
+    return inputs, seed, edits
+
+
+def _edit_suffix(edits: Optional[PlanEdits]) -> str:
+    """`edits` as a code suffix ("+d1r1+d2s3"); the stream marker belongs to the base code."""
+    plain = dataclasses.replace(edits, streams=LEGACY) if edits is not None else None
+    return format_plan_code(0, plain)[1:]
+
+
+def encode_adapted_code(code: str, inputs: Dict, edits: Optional[PlanEdits] = None) -> str:
+    """Extended `code` adapted to `inputs`' equipment and limitations, then edited with `edits`."""
+    values = {"equipment": _mask(inputs["equipment"], EQUIPMENT_LABELS),
+              "constraints": _mask(inputs["constraints"], LIMITATION_LABELS)}
+    n, scale = 0, 1
+    for name, radix in ADAPT_LAYOUT:
+        n += values[name] * scale
+        scale *= radix
+    body = _to_base32(n)
+    return code + ADAPT_MARK + body + _check_char(body) + _edit_suffix(edits)
+
+
+def decode_adapted_code(code: str) -> Tuple[Dict, int, PlanEdits, List[Tuple[Dict, PlanEdits]]]:
+    """(inputs, seed, edits) of the code a plan was first adapted from, and (inputs, edits since)
+    per adaptation; a code without adaptations decodes like `decode_plan_code`. Raises ValueError."""
+    base, *adaptations = _normalize(code).split(ADAPT_MARK)
+    inputs, seed, edits = decode_plan_code(base)
+    out = []
+    current = inputs
+    for part in adaptations:
+        head, plus, suffix = part.partition("+")
+        head = head.translate(_ALIASES)
+        if len(head) < 2 or any(c not in _DIGITS for c in head):
+            raise ValueError(f"invalid plan code: {code!r}")
+        body, check = head[:-1], head[-1]
+        if check != _check_char(body):
+            raise ValueError(f"plan code {code!r} failed its check (typo?)")
+        n = 0
+        for c in body:
+            n = n * 32 + _DIGITS[c]
+        values = {}
+        for name, radix in ADAPT_LAYOUT:
+            n, values[name] = divmod(n, radix)
+        _, later = parse_plan_code(f"{seed}{plus}{suffix}")
+        if n or later.streams != LEGACY:  # the stream marker only goes after the seed
+            raise ValueError(f"invalid plan code: {code!r}")
+        current = {**current, "equipment": _unmask(values["equipment"], EQUIPMENT_LABELS),
+                   "constraints": _unmask(values["constraints"], LIMITATION_LABELS)}
+        out.append((current, dataclasses.replace(later, streams=edits.streams)))
+    return inputs, seed, edits, out
@@ -0,0 +1,455 @@
+"""Headless planner core: filtering, weighting, schemes and day building.
+
+Nothing here imports Streamlit, pandas or googleapiclient, so the plan logic can be
+used (and timed) from scripts, batch jobs and benchmarks without a Streamlit session.
+"""
+import hashlib
+import json
+import os
+import random
+from concurrent.futures import Executor
+from functools import partial
+from itertools import product
+from typing import List, Dict, Optional
+
+from catalog import EXERCISES, LEVEL_ORDER, PATTERNS, CatalogIndex, catalog_digest
+from sampler import WeightedPool, PoolSampler
+from cache import LRUCache
+from metrics import METRICS
+from models import Exercise, Scheme, PlanItem, WARMUP, DEFAULT_TEMPO, estimate_sec, parse_tempo
+from streams import LEGACY, day_rng
+
+# Compiled once per process; filter_exercises is a handful of mask operations against it.
+# WORKOUT_CATALOG=path/to/catalog.json|csv replaces the built-in list (validated, and
+# cached compiled between starts, see catalog_loader.py).
+CATALOG_PATH = os.environ.get("WORKOUT_CATALOG") or None
+if CATALOG_PATH:
+    from catalog_loader import load_catalog
+    CATALOG, CATALOG_DIGEST = load_catalog(CATALOG_PATH)
+else:
+    CATALOG, CATALOG_DIGEST = CatalogIndex(EXERCISES), catalog_digest(EXERCISES)
+
+# Weighted candidate pools by normalized sidebar inputs; most users pick the same few setups.
+POOL_CACHE = LRUCache(maxsize=256)
+
+# Sidebar options in display order. Share codes (plancode.py) store selections as
+# positions in these lists, so new options must be appended, never inserted.
+GOAL_LABELS = ("Build Muscle (Hypertrophy)", "Get Stronger (Strength)", "Fat Loss / Conditioning",
+               "General Fitness / Health", "Mobility / Flexibility")
+EQUIPMENT_LABELS = ("Bodyweight", "Dumbbells", "Barbell", "Kettlebell", "Resistance Bands", "Pull-up Bar", "Machines")
+LIMITATION_LABELS = ("No deep knee flexion", "No overhead pressing", "No spinal flexion", "Avoid high impact",
+                     "Wrist pain", "Shoulder sensitive", "Lower back sensitive")
+FOCUS_LABELS = ("Full Body", "Upper Body", "Lower Body", "Glutes", "Core", "Arms", "Shoulders", "Back", "Chest")
+
+
+def _norm_equip(e: List[str]) -> List[str]:
+    m = {
+        "Bodyweight": "bodyweight", "Dumbbells": "dumbbells", "Barbell": "barbell",
+        "Kettlebell": "kettlebell", "Resistance Bands": "bands", "Pull-up Bar": "pullup_bar", "Machines": "machines"
+    }
+    return [m[x] for x in e]
+
+def _contra_from_constraints(c: List[str]) -> List[str]:
+    mapping = {
+        "No deep knee flexion": "knee",
+        "No overhead pressing": "shoulder_overhead",
+        "No spinal flexion": "lumbar_flexion",
+        "Avoid high impact": "impact",
+        "Wrist pain": "wrist",
+        "Shoulder sensitive": "shoulder_overhead",
+        "Lower back sensitive": "lumbar_flexion"
+    }
+    return list({mapping[x] for x in c})
+
+def filter_exercises(goal_key: str, equip_norm: List[str], min_level: str, avoid: List[str],
+                     index: Optional[CatalogIndex] = None) -> List[Exercise]:
+    """Fix: Enforce level/equipment/contra + goal intent (except allow 'general'/'mobility' always)."""
+    index = index or CATALOG
+    return index.select(index.filter_mask(goal_key, equip_norm, min_level, avoid))
+
+def difficulty_weight(ex: Dict, experience: str) -> int:
+    """Weight exercises by appropriateness for the user's level."""
+    w = 1
+    lvl = LEVEL_ORDER[ex["level_min"]]
+    if experience == "Beginner":
+        w += 2 if lvl == 0 else 0
+        w -= 1 if lvl >= 1 else 0
+    elif experience == "Intermediate":
+        w += 1 if lvl == 1 else 0
+    else:  # Advanced
+        w += 2 if lvl >= 1 else 0
+        if "barbell" in ex["equipment"] and ex["pattern"] in ["squat", "hinge", "push", "pull", "vertical_push", "vertical_pull"]:
+            w += 1
+    return max(1, w)
+
+def emphasize(exs: List[Dict], focus: List[str], experience: str, compat: bool = True) -> WeightedPool:
+    """Compose difficulty weighting with user emphasis."""
+    weights = []
+    for e in exs:
+        w = difficulty_weight(e, experience)
+        if "Lower Body" in focus and e["pattern"] in ["squat", "hinge", "lunge"]:
+            w += 1
+        if "Upper Body" in focus and e["pattern"] in ["push", "vertical_push", "pull", "vertical_pull"]:
+            w += 1
+        if "Core" in focus and e["pattern"] == "core":
+            w += 1
+        if "Glutes" in focus and e["pattern"] in ["hinge", "lunge", "squat"]:
+            w += 1
+        if "Arms" in focus and (e["name"].lower().endswith("curl") or "tricep" in e["name"].lower()):
+            w += 1
+        if "Shoulders" in focus and (e["pattern"] in ["vertical_push", "push"] or "lateral raise" in e["name"].lower()):
+            w += 1
+        if "Back" in focus and e["pattern"] in ["pull", "vertical_pull"]:
+            w += 1
+        if "Chest" in focus and e["pattern"] == "push":
+            w += 1
+        weights.append(max(1, w))
+    return WeightedPool(exs, weights, compat=compat)
+
+def patterns_for_week(days: int, goal_key: str) -> List[List[str]]:
+    """Goal-aware daily pattern lists with deduping."""
+    base_map = {
+        1: [["squat", "hinge", "push", "pull", "core"]],
+        2: [["squat", "push", "pull", "core"], ["hinge", "push", "pull", "core"]],
+        3: [["squat", "push", "pull", "core"], ["hinge", "push", "pull", "core"], ["lunge", "push", "pull", "core"]],
+        4: [["upper"], ["lower"], ["upper"], ["lower"]],
+        5: [["upper"], ["lower"], ["push"], ["pull"], ["legs"]],
+        6: [["push"], ["pull"], ["legs"], ["upper"], ["lower"], ["core"]],
+    }
+    base = base_map[days][:]
+
+    expanded = []
+    for day in base:
+        day_patterns = []
+        for p in day:
+            if p == "upper":
+                day_patterns += ["push", "pull", "vertical_push", "vertical_pull", "core"]
+            elif p == "lower":
+                day_patterns += ["squat", "hinge", "lunge", "core"]
+            elif p == "legs":
+                day_patterns += ["squat", "hinge", "lunge"]
+            elif p == "core":
+                day_patterns += ["core", "carry"]
+            else:
+                day_patterns.append(p)
+
+        # goal bias
+        if goal_key == "strength":
+            day_patterns += ["carry"]  # bracing
+        elif goal_key == "hypertrophy":
+            day_patterns += ["push", "pull"]  # extra pump
+        elif goal_key in ["fatloss", "endurance"]:
+            day_patterns += ["carry", "core"]  # circuit-friendly
+        elif goal_key == "mobility":
+            day_patterns = ["mobility", "core", "hinge", "squat"]
+
+        uniq = []
+        for x in day_patterns:
+            if x not in uniq:
+                uniq.append(x)
+        expanded.append(uniq)
+    return expanded
+
+# Vocabularies the scheme table is precompiled for
+GOAL_KEYS = ["strength", "hypertrophy", "fatloss", "endurance", "mobility", "general"]
+EXPERIENCES = ["Beginner", "Intermediate", "Advanced"]
+MINUTES_BUCKETS = ["short", "normal", "long"]
+
+def minutes_bucket(minutes: int) -> str:
+    """The only thing scheme_for looks at in `minutes`."""
+    if minutes < 35:
+        return "short"
+    if minutes > 60:
+        return "long"
+    return "normal"
+
+def _compile_scheme(goal_key: str, pattern: str, experience: str, bucket: str) -> Scheme:
+    """Different schemes by goal + level with Tempo & RIR."""
+    notes = ""
+    tempo = "2-0-2"
+    rir = 2
+    rest = 75
+    sets = 3
+    reps = (8, 10)
+
+    if goal_key == "strength":
+        if pattern in ["squat", "hinge", "push", "pull", "vertical_push", "vertical_pull"]:
+            sets, reps, rest = 4, (3, 5), 150
+            tempo, rir = "2-1-1", 2
+            notes = "Power focus, crisp technique."
+        else:
+            sets, reps, rest = 3, (5, 6), 120
+            tempo, rir = "2-1-1", 1
+    elif goal_key == "hypertrophy":
+        sets, reps, rest = 3, (8, 12), 75
+        tempo, rir = "3-1-2", 1
+        notes = "Challenging last reps, full range."
+    elif goal_key in ["fatloss", "endurance"]:
+        return Scheme(
+            type="timed", time_sec=40, rest_sec=20, sets=3, rep_range=None,
+            tempo="constant", rir=None,
+            notes="Circuit pace; keep moving between exercises."
+        )
+    elif goal_key == "mobility":
+        return Scheme(
+            type="hold", time_sec=45, rest_sec=15, sets=2, rep_range=None,
+            tempo="slow", rir=None,
+            notes="Controlled range, breathe into end positions."
+        )
+    else:  # general
+        sets, reps, rest = 3, (6, 10), 90
+        tempo, rir = "2-1-2", 2
+        notes = "Smooth reps, own the range."
+
+    # Level-based adjustments
+    lo, hi = reps
+    if experience == "Beginner":
+        sets = max(2, sets - 1)
+        rest = max(60, rest - 15)
+        reps = (lo + 1, hi + 2)
+        tempo = "2-0-2"
+        rir = 2
+        notes = (notes + " Leave 2–3 reps in reserve.").strip()
+    elif experience == "Advanced":
+        sets += 1
+        rest += 15
+        reps = (max(3, lo - 1), max(lo, hi - 1))
+        tempo = "3-1-1" if goal_key in ["hypertrophy", "general"] else "2-1-1"
+        rir = 1
+        notes = (notes + " Optionally add a final hard set.").strip()
+
+    # Time-pressure adjustment
+    if bucket == "short":
+        sets = max(2, sets - 1)
+    elif bucket == "long":
+        sets += 1
+
+    return Scheme(
+        type="sets_reps",
+        sets=sets,
+        rep_range=reps,
+        time_sec=None,
+        rest_sec=rest,
+        tempo=tempo,
+        rir=rir,
+        notes=notes
+    )
+
+# equal schemes collapse to one instance, so plan items share them
+_SCHEME_INSTANCES: Dict[Scheme, Scheme] = {}
+
+def _compile_shared(key: tuple) -> Scheme:
+    scheme = _compile_scheme(*key)
+    return _SCHEME_INSTANCES.setdefault(scheme, scheme)
+
+SCHEME_TABLE: Dict[tuple, Scheme] = {
+    key: _compile_shared(key)
+    for key in product(GOAL_KEYS, PATTERNS, EXPERIENCES, MINUTES_BUCKETS)
+}
+
+def scheme_for(goal_key: str, pattern: str, experience: str, minutes: int) -> Scheme:
+    """Table lookup by (goal, pattern, experience, minutes bucket)."""
+    key = (goal_key, pattern, experience, minutes_bucket(minutes))
+    scheme = SCHEME_TABLE.get(key)
+    if scheme is None:  # outside the precompiled vocabularies
+        scheme = SCHEME_TABLE[key] = _compile_shared(key)
+    return scheme
+
+def _rep_range(reps_field) -> Optional[tuple]:
+    if isinstance(reps_field, int):
+        return reps_field, reps_field
+    if isinstance(reps_field, str) and "–" in reps_field:
+        lo, hi = [int(x) for x in reps_field.split("–")]
+        return lo, hi
+    return None
+
+def estimate_exercise_time_sec(item) -> int:
+    """Estimate work + rest + overhead per exercise (precomputed on every Scheme)."""
+    scheme = item.scheme if isinstance(item, PlanItem) else item
+    if isinstance(scheme, Scheme):
+        return scheme.est_sec
+    # plain dict items
+    if item["type"] in ("timed", "hold"):
+        return estimate_sec(item["type"], item["sets"], None, item["time_sec"], item["rest_sec"], DEFAULT_TEMPO)
+    return estimate_sec(item["type"], item["sets"], _rep_range(item["reps"]), None, item.get("rest_sec", 75),
+                        parse_tempo(item.get("tempo", "2-0-2")))
+
+def pick_for_pattern(sampler: PoolSampler, pattern: str, used: set, rng: random.Random) -> Optional[Exercise]:
+    for name in used - sampler.removed:
+        sampler.remove(name)
+    choice = sampler.draw(pattern, rng)
+    if choice is None:
+        return None
+    used.add(choice["name"])
+    sampler.remove(choice["name"])
+    return choice
+
+# Per-level min/max main exercises per day (warm-up not counted)
+LEVEL_CAPS = {
+    "Beginner":      {"min": 4, "max": 6},
+    "Intermediate":  {"min": 5, "max": 7},
+    "Advanced":      {"min": 5, "max": 8},
+}
+DEFAULT_CAP = {"min": 5, "max": 7}
+
+# Goals whose first few lifts go in even when they overrun the time budget
+MUST_HAVE_GOALS = ["strength", "hypertrophy", "general"]
+MUST_HAVE_COUNT = 3
+
+def build_day_plan(candidates: WeightedPool, patterns: List[str], rng: random.Random,
+                   goal_key: str, experience: str, minutes: int, mode: str = "greedy"):
+    """Time-aware builder with per-level min/max exercise caps (warm-up not counted).
+
+    mode="solver" packs the day with the exact knapsack solver in solver.py instead of
+    the greedy cover/fill/ensure-minimum passes (different plans for the same seed).
+    """
+    if mode == "solver":
+        from solver import solve_day
+        return solve_day(candidates, patterns, rng, goal_key, experience, minutes)
+    if mode != "greedy":
+        raise ValueError(f"unknown build mode: {mode!r}")
+
+    sampler = candidates.sampler()
+    used = set()
+    day_exercises = []
+    time_budget = minutes * 60
+    time_used = 0
+
+    cap = LEVEL_CAPS.get(experience, DEFAULT_CAP)
+
+    def count_main(exs):
+        return sum(1 for x in exs if x.get("name") != "Warm-up")
+
+    # Warm-up block (~5 min)
+    warmup = WARMUP
+    time_used += estimate_exercise_time_sec(warmup)
+    day_exercises.append(warmup)
+
+    # Cover core patterns first
+    for p in patterns:
+        if count_main(day_exercises) >= cap["max"]:
+            break
+        ex = pick_for_pattern(sampler, p, used, rng)
+        if not ex:
+            continue
+        item = PlanItem(ex, scheme_for(goal_key, ex["pattern"], experience, minutes))
+        t = estimate_exercise_time_sec(item)
+
+        must_have = (goal_key in MUST_HAVE_GOALS) and \
+                    (sum(1 for x in day_exercises if x.get("type") == "sets_reps") < MUST_HAVE_COUNT)
+
+        if must_have or time_used + t <= time_budget:
+            day_exercises.append(item)
+            time_used += t
+        if count_main(day_exercises) >= cap["max"]:
+            break
+
+    # Fill remaining time up to caps
+    tries = 0
+    while time_used <= time_budget and tries < 30 and count_main(day_exercises) < cap["max"]:
+        ex = pick_for_pattern(sampler, rng.choice(patterns), used, rng)
+        if not ex:
+            break
+        item = PlanItem(ex, scheme_for(goal_key, ex["pattern"], experience, minutes))
+        t = estimate_exercise_time_sec(item)
+        if time_used + t > time_budget:
+            break
+        day_exercises.append(item)
+        time_used += t
+        tries += 1
+    fill_rounds = tries
+
+    # Ensure minimum count if possible
+    tries = 0
+    while count_main(day_exercises) < cap["min"] and tries < 10:
+        ex = pick_for_pattern(sampler, rng.choice(patterns), used, rng)
+        if not ex:
+            break
+        item = PlanItem(ex, scheme_for(goal_key, ex["pattern"], experience, minutes))
+        t = estimate_exercise_time_sec(item)
+        if time_used + t > time_budget and count_main(day_exercises) >= (cap["min"] - 1):
+            day_exercises.append(item)
+            break
+        if time_used + t <= time_budget:
+            day_exercises.append(item)
+            time_used += t
+        tries += 1
+
+    if METRICS.enabled:
+        kept = count_main(day_exercises)
+        METRICS.count("picks", len(used))
+        METRICS.count("picks_rejected", len(used) - kept)
+        METRICS.count("fill_rounds", fill_rounds)
+        METRICS.count("min_rounds", tries)
+    return day_exercises
+
+def goal_key_from_label(lbl: str) -> str:
+    m = {
+        "Build Muscle (Hypertrophy)": "hypertrophy",
+        "Get Stronger (Strength)": "strength",
+        "Fat Loss / Conditioning": "fatloss",
+        "General Fitness / Health": "general",
+        "Mobility / Flexibility": "mobility",
+    }
+    return m[lbl]
+
+def summarize_day(day_items: List[Dict]) -> Dict:
+    total_sets = sum(x["sets"] for x in day_items if x["type"] == "sets_reps")
+    est_time = sum(estimate_exercise_time_sec(x) for x in day_items)
+    patterns = [x["pattern"] for x in day_items if x.get("pattern")]
+    return {"total_sets": total_sets, "est_min": round(est_time/60), "patterns": ", ".join(sorted(set(patterns)))}
+
+
+def pool_key(goal_key: str, equip_norm: List[str], experience: str, avoid: List[str], focus: List[str],
+             compat: bool = True) -> tuple:
+    """Normalized cache key: order and duplicates in the multiselects don't matter."""
+    return (goal_key, frozenset(equip_norm), experience, frozenset(avoid), frozenset(focus), compat)
+
+def plan_fingerprint(goal: str, days: int, minutes: int, experience: str, equipment: List[str],
+                     constraints: List[str], focus: List[str], plan_code, include_videos: bool = False) -> str:
+    """Stable hex digest of everything that determines a rendered plan (multiselect order ignored).
+
+    `plan_code` is the seed or a derived code with edits (see edits.py).
+    """
+    canonical = json.dumps([goal, int(days), int(minutes), experience, sorted(set(equipment)),
+                            sorted(set(constraints)), sorted(set(focus)), str(plan_code), bool(include_videos)],
+                           ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+def candidate_pool(goal_key: str, equip_norm: List[str], experience: str, avoid: List[str], focus: List[str],
+                   compat: bool = True) -> WeightedPool:
+    """Filtered + weighted pool, shared process-wide through POOL_CACHE (may be empty)."""
+    def build():
+        with METRICS.stage("filter"):
+            candidates = filter_exercises(goal_key, equip_norm, experience.lower(), avoid)
+        with METRICS.stage("emphasize"):
+            return emphasize(candidates, focus, experience, compat=compat)
+    return POOL_CACHE.get_or_compute(pool_key(goal_key, equip_norm, experience, avoid, focus, compat), build)
+
+def build_week_day(goal_key: str, days: int, minutes: int, experience: str, equip_norm: List[str],
+                   avoid: List[str], focus: List[str], seed: int, mode: str, streams: int, day: int) -> List[PlanItem]:
+    """Day `day` of `generate_week`'s plan, built on its own (in any process, in any order)."""
+    cand_weighted = candidate_pool(goal_key, equip_norm, experience, avoid, focus)
+    with METRICS.stage("build_day"):
+        return build_day_plan(cand_weighted, patterns_for_week(days, goal_key)[day], day_rng(seed, day, 0, streams),
+                              goal_key, experience, minutes, mode)
+
+def generate_week(goal_key: str, days: int, minutes: int, experience: str, equip_norm: List[str],
+                  avoid: List[str], focus: List[str], seed: int,
+                  mode: str = "greedy", streams: int = LEGACY,
+                  executor: Optional[Executor] = None) -> Optional[Dict[int, List[PlanItem]]]:
+    """Same steps as the Generate button. Returns None when no exercise matches the filters.
+
+    Each day draws from its own stream (streams.py), so with an `executor` the days are
+    built concurrently and the plan is identical to the sequential one.
+    """
+    cand_weighted = candidate_pool(goal_key, equip_norm, experience, avoid, focus)
+    if not cand_weighted:
+        return None
+
+    build = partial(build_week_day, goal_key, days, minutes, experience, list(equip_norm), list(avoid), list(focus),
+                    seed, mode, streams)
+    day_indices = range(len(patterns_for_week(days, goal_key)))
+    if executor is not None:
+        return dict(zip(day_indices, executor.map(build, day_indices)))
+    return {i: build(i) for i in day_indices}
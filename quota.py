@@ -0,0 +1,69 @@
+"""Token-bucket budget for metered API calls (the YouTube search quota).
+
+The YouTube Data API grants a daily unit quota (10,000 by default) and every search
+costs 100 units. `QuotaGovernor` models that as a bucket of `capacity` units refilled
+continuously at `capacity / period` units per second. A call is allowed only if it
+leaves at least `reserve` units in the bucket, so the app degrades to plain search
+links while some budget is still left rather than running the key dry. `exhaust()`
+empties the bucket when the API itself reports that the quota is gone.
+
+The budget is per process; with several app processes, split the quota between them.
+"""
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+DEFAULT_DAILY_UNITS = 10_000
+SEARCH_COST = 100
+DAY_SEC = 24 * 3600
+
+
+class QuotaGovernor:
+    def __init__(self, capacity: float = DEFAULT_DAILY_UNITS, period: float = DAY_SEC,
+                 reserve: float = 0.1 * DEFAULT_DAILY_UNITS, clock: Optional[Callable[[], float]] = None):
+        if capacity <= 0 or period <= 0:
+            raise ValueError("capacity and period must be positive")
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.reserve = min(reserve, capacity)
+        self._clock = clock or time.monotonic
+        self._tokens = float(capacity)
+        self._stamp = self._clock()
+        self._lock = threading.Lock()
+        self.granted = 0
+        self.denied = 0
+        self.units_spent = 0.0
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def try_acquire(self, cost: float = SEARCH_COST) -> bool:
+        """Take `cost` units if that keeps the bucket at or above the reserve."""
+        with self._lock:
+            self._refill()
+            if self._tokens - cost < self.reserve:
+                self.denied += 1
+                return False
+            self._tokens -= cost
+            self.granted += 1
+            self.units_spent += cost
+            return True
+
+    def exhaust(self) -> None:
+        with self._lock:
+            self._refill()
+            self._tokens = 0.0
+
+    @property
+    def available(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            self._refill()
+            return {"available": round(self._tokens, 1), "capacity": self.capacity, "reserve": self.reserve,
+                    "granted": self.granted, "denied": self.denied, "units_spent": self.units_spent}
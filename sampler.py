@@ -0,0 +1,140 @@
+"""Weighted exercise pool with O(log n) draw-without-replacement.
+
+`emphasize` used to build the weighted pool by replicating each exercise `w` times, and
+every pick rebuilt a filtered list over that inflated list. Here each exercise keeps a
+single slot with weight `w` in a Fenwick tree (one for the whole pool, one per pattern);
+drawing is a prefix-sum descent and removing a name zeroes its slots.
+
+Compat mode (the default) draws `rng.randrange(total_weight)` and walks the slots in
+catalog order, which is exactly what `rng.choice` did over the replicated list, so
+existing Plan Codes keep producing the same plans. With `compat=False` the draw is
+`rng.random() * total_weight`, which also allows fractional weights; it is still
+deterministic per seed, but gives different plans than the list-based picker.
+"""
+import random
+from typing import List, Dict, Optional
+
+
+class FenwickTree:
+    """Binary indexed tree over non-negative weights."""
+
+    __slots__ = ("n", "tree", "weights", "total", "_top")
+
+    def __init__(self, weights: List[float]):
+        n = len(weights)
+        tree = [0] + list(weights)
+        for i in range(1, n + 1):
+            j = i + (i & -i)
+            if j <= n:
+                tree[j] += tree[i]
+        self.n = n
+        self.tree = tree
+        self.weights = list(weights)
+        self.total = sum(weights)
+        self._top = 1 << (n.bit_length() - 1) if n else 0
+
+    def copy(self) -> "FenwickTree":
+        other = FenwickTree.__new__(FenwickTree)
+        other.n, other._top, other.total = self.n, self._top, self.total
+        other.tree = self.tree[:]
+        other.weights = self.weights[:]
+        return other
+
+    def set(self, i: int, w: float) -> None:
+        delta = w - self.weights[i]
+        if not delta:
+            return
+        self.weights[i] = w
+        self.total += delta
+        i += 1
+        tree, n = self.tree, self.n
+        while i <= n:
+            tree[i] += delta
+            i += i & -i
+
+    def find(self, x: float) -> int:
+        """Index of the slot covering cumulative position `x` (0 <= x < total)."""
+        pos, tree, n = 0, self.tree, self.n
+        step = self._top
+        while step:
+            nxt = pos + step
+            if nxt <= n and tree[nxt] <= x:
+                pos = nxt
+                x -= tree[nxt]
+            step >>= 1
+        if pos >= n or self.weights[pos] <= 0:
+            # float rounding at the top end; fall back to the last live slot
+            pos = max(i for i, w in enumerate(self.weights) if w > 0)
+        return pos
+
+    def draw(self, rng: random.Random, compat: bool) -> int:
+        x = rng.randrange(self.total) if compat else rng.random() * self.total
+        return self.find(x)
+
+
+class WeightedPool:
+    """Immutable weighted candidate pool; call `sampler()` for a per-day drawing state."""
+
+    def __init__(self, exercises: List[Dict], weights: List[float], compat: bool = True):
+        if compat and any(not isinstance(w, int) for w in weights):
+            raise ValueError("compat mode needs integer weights")
+        self.exercises = exercises
+        self.weights = weights
+        self.compat = compat
+
+        self._all = FenwickTree(weights)
+        self._by_pattern: Dict[str, FenwickTree] = {}
+        self._members: Dict[str, List[int]] = {}     # pattern -> pool positions
+        self._slots: Dict[str, list] = {}            # name -> [(pos, pattern, pattern-local idx)]
+        local: Dict[str, List[float]] = {}
+        for pos, (ex, w) in enumerate(zip(exercises, weights)):
+            p = ex["pattern"]
+            members = self._members.setdefault(p, [])
+            self._slots.setdefault(ex["name"], []).append((pos, p, len(members)))
+            members.append(pos)
+            local.setdefault(p, []).append(w)
+        for p, ws in local.items():
+            self._by_pattern[p] = FenwickTree(ws)
+
+    def __len__(self) -> int:
+        return len(self.exercises)
+
+    def __bool__(self) -> bool:
+        return bool(self.exercises)
+
+    def pattern_counts(self) -> Dict[str, int]:
+        """Distinct exercise names available per pattern."""
+        return {p: len({self.exercises[i]["name"] for i in members}) for p, members in self._members.items()}
+
+    def sampler(self) -> "PoolSampler":
+        return PoolSampler(self)
+
+
+class PoolSampler:
+    """Draw-without-replacement state over a `WeightedPool` (trees are copied, pool untouched)."""
+
+    def __init__(self, pool: WeightedPool):
+        self.pool = pool
+        self.removed: set = set()
+        self._all = pool._all.copy()
+        self._by_pattern = {p: t.copy() for p, t in pool._by_pattern.items()}
+
+    def remove(self, name: str) -> None:
+        if name in self.removed:
+            return
+        self.removed.add(name)
+        for pos, p, local in self.pool._slots.get(name, ()):
+            self._all.set(pos, 0)
+            self._by_pattern[p].set(local, 0)
+
+    def draw(self, pattern: str, rng: random.Random) -> Optional[Dict]:
+        """Weighted draw among remaining exercises of `pattern`, else among all remaining."""
+        pool = self.pool
+        tree = self._by_pattern.get(pattern)
+        if tree is not None and tree.total > 0:
+            pos = pool._members[pattern][tree.draw(rng, pool.compat)]
+        elif self._all.total > 0:
+            pos = self._all.draw(rng, pool.compat)
+        else:
+            return None
+        return pool.exercises[pos]
@@ -0,0 +1,373 @@
+"""Headless HTTP/JSON plan service for the mobile app and coach dashboard (stdlib asyncio).
+
+    python server.py [--host 127.0.0.1] [--port 8080] [--workers 4]
+
+Endpoints (add `?format=csv` or `?format=markdown` to a plan for the app's download files):
+
+    POST /v1/plans          {"goal", "days", "minutes", "experience", "equipment", "limitations",
+                             "focus", "plan_code"} using the sidebar labels (as in batch.py),
+                            or {"code": "<extended Plan Code>"}; with "seed" instead of
+                            "plan_code" (default 42) it is a new plan, on `+v2` streams
+    GET  /v1/plans/<code>   the plan for an extended Plan Code
+    GET  /v1/stats          request, cache and coalescing counters (JSON)
+    GET  /metrics           Prometheus text (see metrics.py)
+    GET  /healthz
+
+Every plan request is reduced to its extended Plan Code (plancode.py). The code pins
+every input, so identical requests get the same code whatever their list order, and
+the plan behind a code never changes. The code is the key for:
+
+* a response cache: an LRU of encoded bodies;
+* request coalescing: concurrent requests for a code that isn't cached yet wait on
+  one build;
+* the build itself, which runs on a process pool (`--workers`) together with the
+  serialization. The planner is pure Python, so threads would serialize on the GIL;
+  the event loop only parses HTTP and writes bytes.
+
+A plan's JSON has the extended code, the plain Plan Code, the inputs, and per day the
+summary and the typed items (exporters.RECORD_FIELDS, without day and video).
+Errors are `{"error": "..."}` with status 400 (bad request), 404, 405, 413 or 422 (no
+exercise matches the filters).
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from cache import LRUCache
+from edits import PlanEdits, PlanSpec, check_edits, format_plan_code, parse_plan_code
+from exporters import RECORD_FIELDS, CsvWriter, markdown_plan, plan_records
+from metrics import METRICS
+from periodization import base_week
+from plancode import decode_plan_code, encode_plan_code
+from planner import (EQUIPMENT_LABELS, EXPERIENCES, FOCUS_LABELS, GOAL_LABELS, LIMITATION_LABELS,
+                     _contra_from_constraints, _norm_equip, goal_key_from_label, summarize_day)
+from streams import CURRENT
+
+DEFAULT_PORT = 8080
+DEFAULT_CACHE_SIZE = 4096
+MAX_BODY = 64 * 1024
+MAX_HEADERS = 100
+MAX_LINE = 8 * 1024        # request line / header line; longer ones get a 400
+KEEPALIVE_SEC = 15
+FORMATS = {"json": "application/json", "csv": "text/csv; charset=utf-8", "markdown": "text/markdown; charset=utf-8"}
+NO_MATCH = "No exercises matched your filters. Try adding more equipment or removing limitations."
+ITEM_FIELDS = RECORD_FIELDS[1:-1]  # day is implied by the list, videos aren't looked up here
+
+_REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 422: "Unprocessable Entity", 500: "Internal Server Error"}
+
+Response = Tuple[int, str, bytes]  # status, content type, body
+
+
+class BadRequest(Exception):
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def _error(status: int, message: str) -> Response:
+    return status, FORMATS["json"], json.dumps({"error": message}).encode("utf-8")
+
+
+def _labels(body: Dict, field: str, options: Tuple[str, ...]) -> List[str]:
+    value = body.get(field, [])
+    if isinstance(value, str):
+        value = [v.strip() for v in value.split(";") if v.strip()]
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+        raise BadRequest(f"{field} must be a list of labels")
+    unknown = [v for v in value if v not in options]
+    if unknown:
+        raise BadRequest(f"unknown {field} {unknown}; expected any of {list(options)}")
+    return value
+
+
+def _integer(body: Dict, field: str) -> int:
+    value = body[field]
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise BadRequest(f"{field} must be an integer, got {value!r}")
+    return value
+
+
+def _check_edit_days(edits: PlanEdits, days: int) -> None:
+    # card numbers are checked against the built plan (render_plan)
+    if edits.steps and max(edits.days()) >= days:
+        raise BadRequest(f"edit on day {max(edits.days()) + 1} of a {days}-day plan")
+
+
+def code_for_request(body: Dict) -> str:
+    """Extended Plan Code for a POST body (sidebar labels, or an extended "code"); raises BadRequest."""
+    if not isinstance(body, dict):
+        raise BadRequest("expected a JSON object")
+    if "code" in body:
+        try:
+            inputs, seed, edits = decode_plan_code(str(body["code"]))
+        except ValueError as e:
+            raise BadRequest(str(e)) from None
+        _check_edit_days(edits, inputs["days"])
+        # re-encoded, so aliases and spacing in a typed code share one cache entry
+        return encode_plan_code(inputs, seed, edits)
+    for field in ("goal", "days", "minutes", "experience"):
+        if field not in body:
+            raise BadRequest(f"missing {field}")
+    if body["goal"] not in GOAL_LABELS:
+        raise BadRequest(f"unknown goal {body['goal']!r}; expected one of {list(GOAL_LABELS)}")
+    if body["experience"] not in EXPERIENCES:
+        raise BadRequest(f"unknown experience {body['experience']!r}; expected one of {EXPERIENCES}")
+    try:
+        if "plan_code" in body:
+            seed, edits = parse_plan_code(str(body["plan_code"]))
+        else:
+            # a new plan: a seed on the current stream scheme
+            seed, edits = _integer(body, "seed") if "seed" in body else 42, PlanEdits(streams=CURRENT)
+        inputs = {
+            "goal": body["goal"], "days": _integer(body, "days"), "minutes": _integer(body, "minutes"),
+            "experience": body["experience"],
+            "equipment": _labels(body, "equipment", EQUIPMENT_LABELS),
+            "constraints": _labels(body, "limitations" if "limitations" in body else "constraints", LIMITATION_LABELS),
+            "focus": _labels(body, "focus", FOCUS_LABELS),
+        }
+        code = encode_plan_code(inputs, seed, edits)
+    except (TypeError, ValueError) as e:
+        raise BadRequest(str(e)) from None
+    _check_edit_days(edits, inputs["days"])
+    return code
+
+
+def render_plan(code: str, fmt: str) -> Response:
+    """Build and serialize the plan for an extended code (runs in a worker process)."""
+    inputs, seed, edits = decode_plan_code(code)
+    spec = PlanSpec(goal_key_from_label(inputs["goal"]), inputs["days"], inputs["minutes"], inputs["experience"],
+                    tuple(_norm_equip(inputs["equipment"])), tuple(_contra_from_constraints(inputs["constraints"])),
+                    tuple(inputs["focus"]), seed, edits.streams)
+    week_plan = base_week(spec, edits)
+    if week_plan is None:
+        return _error(422, NO_MATCH)
+    try:
+        check_edits(week_plan, edits)
+    except ValueError as e:
+        return _error(400, str(e))
+    if fmt == "csv":
+        buf = io.StringIO()
+        CsvWriter(buf).write(week_plan)
+        return 200, FORMATS[fmt], buf.getvalue().encode("utf-8")
+    if fmt == "markdown":
+        return 200, FORMATS[fmt], markdown_plan(week_plan).encode("utf-8")
+    days = [{"day": day + 1, "summary": summarize_day(items), "items": []} for day, items in week_plan.items()]
+    for record in plan_records(week_plan):
+        days[record[0] - 1]["items"].append(dict(zip(ITEM_FIELDS, record[1:-1])))
+    doc = {"code": code, "plan_code": format_plan_code(seed, edits), "inputs": inputs, "days": days}
+    return 200, FORMATS[fmt], json.dumps(doc, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class PlanService:
+    """Response cache + request coalescing in front of an executor that builds plans."""
+
+    def __init__(self, executor: Optional[Executor], cache_size: int = DEFAULT_CACHE_SIZE,
+                 max_body: int = MAX_BODY):
+        self.executor = executor
+        self.max_body = max_body
+        self.cache = LRUCache(cache_size)
+        self._inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+        self.counts = {"requests": 0, "errors": 0, "cache_hits": 0, "coalesced": 0, "builds": 0}
+
+    async def plan(self, code: str, fmt: str) -> Response:
+        key = (code, fmt)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.counts["cache_hits"] += 1
+            return cached
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._inflight[key] = asyncio.get_running_loop().create_task(self._build(key))
+        else:
+            self.counts["coalesced"] += 1
+        # shielded: a client hanging up must not cancel a build others are waiting for
+        return await asyncio.shield(task)
+
+    async def _build(self, key: Tuple[str, str]) -> Response:
+        self.counts["builds"] += 1
+        start = time.perf_counter()
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self.executor, render_plan, *key)
+            self.cache.put(key, result)  # 422s too: a code's plan never changes
+            return result
+        finally:
+            METRICS.observe("service_build", time.perf_counter() - start)
+            del self._inflight[key]
+
+    def stats(self) -> Dict:
+        return {**self.counts, "in_flight": len(self._inflight), "cache": self.cache.stats()}
+
+    # HTTP
+
+    async def route(self, method: str, target: str, body: bytes) -> Tuple[Response, Dict[str, str]]:
+        url = urlsplit(target)
+        path = url.path.rstrip("/") or "/"
+        query = parse_qs(url.query)
+        if path in ("/healthz", "/metrics", "/v1/stats"):
+            if method != "GET":
+                return _error(405, "use GET"), {"Allow": "GET"}
+            if path == "/healthz":
+                return (200, "text/plain; charset=utf-8", b"ok\n"), {}
+            if path == "/metrics":
+                return (200, "text/plain; version=0.0.4; charset=utf-8", METRICS.prometheus().encode("utf-8")), {}
+            return (200, FORMATS["json"], json.dumps(self.stats()).encode("utf-8")), {}
+        if path != "/v1/plans" and not path.startswith("/v1/plans/"):
+            return _error(404, f"no route for {path}"), {}
+
+        fmt = query.get("format", ["json"])[-1]
+        if fmt not in FORMATS:
+            return _error(400, f"format must be one of {list(FORMATS)}"), {}
+        try:
+            if path == "/v1/plans":
+                if method != "POST":
+                    return _error(405, "use POST /v1/plans or GET /v1/plans/<code>"), {"Allow": "POST"}
+                try:
+                    request = json.loads(body or b"null")
+                except ValueError:
+                    raise BadRequest("body is not valid JSON") from None
+                code = code_for_request(request)
+            else:
+                if method != "GET":
+                    return _error(405, "use GET"), {"Allow": "GET"}
+                code = code_for_request({"code": unquote(path[len("/v1/plans/"):])})
+        except BadRequest as e:
+            return _error(e.status, str(e)), {}
+        response = await self.plan(code, fmt)
+        headers = {"ETag": f'"{code}.{fmt}"', "Location": f"/v1/plans/{code}"}
+        if method == "GET":
+            headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response, headers
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """One connection: HTTP/1.1 requests with keep-alive, answered in order."""
+        try:
+            while True:
+                try:
+                    line = await asyncio.wait_for(reader.readline(), KEEPALIVE_SEC)
+                except asyncio.TimeoutError:
+                    break
+                except ValueError:  # over MAX_LINE
+                    await self._send(writer, _error(400, "request line too long"), {}, False)
+                    break
+                if not line.strip():
+                    break
+                start = time.perf_counter()
+                try:
+                    method, target, version = line.decode("latin-1").split()
+                except ValueError:
+                    await self._send(writer, _error(400, "malformed request line"), {}, False)
+                    break
+                try:
+                    headers = await self._read_headers(reader)
+                    length = self._body_length(headers)
+                except BadRequest as e:
+                    # the rest of the request can't be framed: answer and close
+                    await self._send(writer, _error(e.status, str(e)), {}, False)
+                    break
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+                body = await reader.readexactly(length) if length else b""
+
+                self.counts["requests"] += 1
+                try:
+                    response, extra = await self.route(method.upper(), target, body)
+                except Exception as e:  # a bug, not the client's fault
+                    response, extra = _error(500, f"{type(e).__name__}: {e}"), {}
+                if response[0] >= 400:
+                    self.counts["errors"] += 1
+                if response[0] == 200 and "ETag" in extra and headers.get("if-none-match") == extra["ETag"]:
+                    response = (304, response[1], b"")
+                await self._send(writer, response, extra, keep_alive, head_only=method.upper() == "HEAD")
+                METRICS.observe("service_request", time.perf_counter() - start)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    @staticmethod
+    async def _read_headers(reader: asyncio.StreamReader) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        for _ in range(MAX_HEADERS):
+            try:
+                h = await reader.readline()
+            except ValueError:  # line over the stream limit (MAX_LINE)
+                raise BadRequest("header line too long") from None
+            if h in (b"\r\n", b"\n", b""):
+                return headers
+            name, sep, value = h.decode("latin-1").partition(":")
+            if not sep:
+                raise BadRequest(f"malformed header line {h[:64]!r}")
+            headers[name.strip().lower()] = value.strip()
+        raise BadRequest(f"more than {MAX_HEADERS} headers")
+
+    def _body_length(self, headers: Dict[str, str]) -> int:
+        if "transfer-encoding" in headers:
+            raise BadRequest("chunked bodies aren't supported; send Content-Length")
+        raw = headers.get("content-length", "0").strip() or "0"
+        if not (raw.isascii() and raw.isdigit()):  # isdigit alone takes e.g. "²", which int() rejects
+            raise BadRequest(f"invalid Content-Length {raw[:32]!r}")
+        length = int(raw)
+        if length > self.max_body:
+            raise BadRequest(f"body over {self.max_body} bytes", 413)
+        return length
+
+    @staticmethod
+    async def _send(writer: asyncio.StreamWriter, response: Response, headers: Dict[str, str], keep_alive: bool,
+                    head_only: bool = False) -> None:
+        status, content_type, body = response
+        lines = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}", f"Content-Type: {content_type}",
+                 f"Content-Length: {len(body)}", f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        lines += [f"{k}: {v}" for k, v in headers.items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (b"" if head_only else body))
+        await writer.drain()
+
+
+async def serve(host: str, port: int, workers: int, cache_size: int = DEFAULT_CACHE_SIZE,
+                max_body: int = MAX_BODY) -> None:
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+    service = PlanService(executor, cache_size, max_body)
+    METRICS.register("service", service.stats)
+    server = await asyncio.start_server(service.handle, host, port, backlog=1024, limit=MAX_LINE)
+    bound = server.sockets[0].getsockname()
+    # the load test reads this line to find a --port 0 instance
+    print(f"listening on http://{bound[0]}:{bound[1]} ({workers or 'no'} worker processes)", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=int(os.environ.get("PORT", DEFAULT_PORT)), help="0 picks a free port")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                    help="build processes (default: all cores; 0 builds on the loop's thread pool)")
+    ap.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE, help="cached responses")
+    ap.add_argument("--max-body", type=int, default=MAX_BODY, help="largest request body in bytes (413 above)")
+    ap.add_argument("--no-metrics", action="store_true", help="don't record request timings")
+    args = ap.parse_args(argv)
+    METRICS.enable(not args.no_metrics)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.cache_size, args.max_body))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Exact time-budget packing for one training day.
+
+The greedy builder covers the day's patterns, then makes up to 30 random "fill" draws and
+up to 10 "ensure minimum" draws, and can still under- or over-fill `minutes * 60`. Here a
+day is a bounded knapsack instead:
+
+* every candidate of a pattern gets the same scheme, hence the same duration, so the
+  items are pattern groups `p` with duration `t_p` and `n_p` available exercises;
+* choose a count `k_p <= n_p` per group, with the level's min/max main-exercise caps and
+  the warm-up's time taken off the budget first;
+* score solutions by (day patterns covered, seconds used, exercises on day patterns);
+* if the cap minimum doesn't fit, take fewer exercises within budget; only when nothing
+  fits, allow the same one-exercise overrun as the greedy "ensure minimum" pass. The
+  must-have rule still applies: goals in MUST_HAVE_GOALS get MUST_HAVE_COUNT lifts, at
+  the smallest overrun;
+* DP over (exercise count, discretized seconds) with seeded reservoir tie-breaking.
+
+Durations are rounded *up* to `resolution` seconds, so a solution that fits in DP units
+also fits in real seconds. Only after the counts are fixed are the actual exercises
+drawn, pattern by pattern, from the weighted pool. The state space is bounded by
+cap max x (budget / resolution), so latency does not depend on luck with the RNG.
+"""
+import random
+from typing import Dict, List, Tuple
+
+from models import PlanItem, WARMUP
+from planner import (
+    LEVEL_CAPS, DEFAULT_CAP, MUST_HAVE_GOALS, MUST_HAVE_COUNT, estimate_exercise_time_sec, scheme_for,
+)
+from sampler import WeightedPool
+
+DEFAULT_RESOLUTION_SEC = 5
+
+
+def _groups(pool: WeightedPool, patterns: List[str]) -> List[Tuple[str, int, bool]]:
+    """(pattern, available, on-day) groups, day patterns first (the greedy builder also
+    falls back to other patterns once the day's own are used up)."""
+    counts = pool.pattern_counts()
+    on_day = [(p, counts[p], True) for p in dict.fromkeys(patterns) if counts.get(p)]
+    return on_day + [(p, n, False) for p, n in counts.items() if p not in patterns]
+
+
+def solve_counts(durations: List[int], groups: List[Tuple[str, int, bool]], budget: int,
+                 cap_min: int, cap_max: int, must_min: int, rng: random.Random) -> List[int]:
+    """Exercises to take per group. `durations` and `budget` are in DP units."""
+    # state (count, units) -> [(covered, on_day), ties, counts per group so far]
+    states: Dict[Tuple[int, int], list] = {(0, 0): [(0, 0), 1, ()]}
+    for (pattern, available, on_day), units in zip(groups, durations):
+        nxt: Dict[Tuple[int, int], list] = {}
+        for (count, used), (score, _, picks) in states.items():
+            for k in range(0, min(available, cap_max - count) + 1):
+                key = (count + k, used + k * units)
+                new_score = (score[0] + (1 if k and on_day else 0), score[1] + (k if on_day else 0))
+                cur = nxt.get(key)
+                if cur is None or new_score > cur[0]:
+                    nxt[key] = [new_score, 1, picks + (k,)]
+                elif new_score == cur[0]:
+                    cur[1] += 1
+                    if rng.randrange(cur[1]) == 0:
+                        cur[2] = picks + (k,)
+        states = nxt
+
+    def pick_best(keys, rank):
+        best, ties, choice = None, 0, None
+        for key in keys:
+            r = rank(key)
+            if best is None or r > best:
+                best, ties, choice = r, 1, key
+            elif r == best:
+                ties += 1
+                if rng.randrange(ties) == 0:
+                    choice = key
+        return choice
+
+    def fits(count_lo):
+        return [k for k in sorted(states) if k[1] <= budget and count_lo <= k[0] <= cap_max]
+
+    def least_overrun(keys):
+        return pick_best(keys, lambda k: (-k[1], states[k][0][0]))
+
+    floor = max(must_min, 1)
+    longest = max(durations, default=0)
+    at_min = [k for k in sorted(states) if k[0] == cap_min]
+    if fits(cap_min):
+        chosen = pick_best(fits(cap_min), lambda k: (states[k][0][0], k[1], states[k][0][1]))
+    elif fits(floor):
+        # fewer exercises than the cap minimum, but within budget
+        chosen = pick_best(fits(floor), lambda k: (states[k][0][0], k[1], states[k][0][1]))
+    elif at_min and min(k[1] for k in at_min) - budget < longest:
+        # nothing fits: like the greedy "ensure minimum" pass, the last exercise may overrun
+        chosen = least_overrun(at_min)
+    else:
+        # must-have lifts, or as many as the pool has when it holds fewer than `floor`:
+        # within budget if possible, else at the smallest overrun
+        top = max(k[0] for k in states if k[0] <= floor)
+        at_top = [k for k in sorted(states) if k[0] == top]
+        in_budget = [k for k in at_top if k[1] <= budget]
+        if in_budget:
+            chosen = pick_best(in_budget, lambda k: (states[k][0][0], k[1], states[k][0][1]))
+        else:
+            chosen = least_overrun(at_top)
+    return list(states[chosen][2])
+
+
+def solve_day(candidates: WeightedPool, patterns: List[str], rng: random.Random, goal_key: str,
+              experience: str, minutes: int, resolution: int = DEFAULT_RESOLUTION_SEC) -> List[PlanItem]:
+    """Day plan (warm-up first) with the best budget fill the caps allow."""
+    cap = LEVEL_CAPS.get(experience, DEFAULT_CAP)
+    must_min = MUST_HAVE_COUNT if goal_key in MUST_HAVE_GOALS else 0
+    groups = _groups(candidates, patterns)
+    schemes = [scheme_for(goal_key, p, experience, minutes) for p, _, _ in groups]
+
+    budget = (minutes * 60 - estimate_exercise_time_sec(WARMUP)) // resolution
+    durations = [-(-s.est_sec // resolution) for s in schemes]
+    counts = solve_counts(durations, groups, budget, cap["min"], cap["max"], must_min, rng)
+
+    # draw the actual exercises; one per covered pattern first, in day order, then the rest
+    sampler = candidates.sampler()
+    drawn: Dict[str, list] = {}
+    for (pattern, _, _), k in zip(groups, counts):
+        for _ in range(k):
+            ex = sampler.draw(pattern, rng)
+            if ex is None:
+                break
+            sampler.remove(ex["name"])
+            drawn.setdefault(pattern, []).append(ex)
+
+    day = [WARMUP]
+    rounds = max((len(v) for v in drawn.values()), default=0)
+    for r in range(rounds):
+        for pattern, _, _ in groups:
+            exs = drawn.get(pattern, ())
+            if r < len(exs):
+                day.append(PlanItem(exs[r], scheme_for(goal_key, exs[r]["pattern"], experience, minutes)))
+    return day
@@ -0,0 +1,49 @@
+"""Random streams of a plan: one independent `random.Random` per (plan seed, day, use).
+
+Every random choice in a plan comes from the stream of the one day (or swapped card) it
+belongs to, never from a shared generator. So any stream can be created on its own, and
+days can be built on any core, in any order, with identical results. Only week 1 is
+random: later program weeks are derived from it deterministically (periodization.py),
+so they need no streams of their own and can be built in any order too.
+
+Two schemes, chosen by the plan code (see edits.py):
+
+* LEGACY (v1, every code without a `+v2` marker) – the original per-day seeds:
+  `seed * 1000 + day` for a day, "seed:day:r<n>" for its n-th reroll and
+  "seed:day:s<card>:<n>" for the n-th swap of a card. Kept bit for bit so existing codes
+  reproduce their plans.
+* HIERARCHICAL (v2) – every stream is keyed by its full path, e.g. `v2/42/d1/r0`
+  (plan seed 42, day 2, reroll 0) or `v2/42/d1/s3/2` (its 4th card's 2nd swap), hashed
+  with BLAKE2b into a 128-bit seed. Paths never overlap, so streams can't collide across
+  seeds, days or uses.
+
+New plans (the app's default code, a server request without a plan code, a batch
+profile) use CURRENT, i.e. HIERARCHICAL; LEGACY is kept only so that existing codes,
+which have no marker, reproduce their plans.
+"""
+import hashlib
+import random
+
+LEGACY = 1
+HIERARCHICAL = 2
+SCHEMES = (LEGACY, HIERARCHICAL)
+CURRENT = HIERARCHICAL  # for new plans
+
+
+def stream_key(*path) -> int:
+    """128-bit seed for a stream path like ("v2", 42, "d1", "r0")."""
+    return int.from_bytes(hashlib.blake2b("/".join(map(str, path)).encode("ascii"), digest_size=16).digest(), "big")
+
+
+def day_rng(seed: int, day: int, reroll: int = 0, scheme: int = LEGACY) -> random.Random:
+    """Stream that builds `day` (0-based); reroll 0 is the unedited day."""
+    if scheme == HIERARCHICAL:
+        return random.Random(stream_key("v2", seed, f"d{day}", f"r{reroll}"))
+    return random.Random(seed * 1000 + day) if reroll == 0 else random.Random(f"{seed}:{day}:r{reroll}")
+
+
+def swap_rng(seed: int, day: int, slot: int, variant: int, scheme: int = LEGACY) -> random.Random:
+    """Stream for the `variant`-th swap of card `slot` (0-based) on `day`."""
+    if scheme == HIERARCHICAL:
+        return random.Random(stream_key("v2", seed, f"d{day}", f"s{slot}", variant))
+    return random.Random(f"{seed}:{day}:s{slot}:{variant}")
@@ -0,0 +1,127 @@
+"""Substitution graph: ranked same-pattern alternatives for every catalog exercise.
+
+When equipment or limitations change mid-program, the plan doesn't have to be rebuilt:
+each item that no longer passes the new filters is replaced by its best-ranked
+alternative that does, using the catalog's bitmask filter for the check. That is a few
+lookups per item, with no RNG and no time budgeting.
+
+Edges link exercises of the same pattern whose `level_min` is at most one step apart.
+They are ranked by, in order:
+
+1. no contraindication the original doesn't already have,
+2. closest level,
+3. most shared equipment,
+4. most shared goal tags,
+5. catalog order.
+
+Equipment compatibility and the user's limitations are checked against the new filters
+when the plan is adapted, since they depend on the user rather than on the exercise.
+"""
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from catalog import CatalogIndex
+from models import PlanItem
+
+MAX_LEVEL_GAP = 1
+MAX_ALTERNATIVES = 8
+
+
+class SubstitutionIndex:
+    """name -> ranked alternative catalog positions. Built eagerly for small catalogs, else on first use."""
+
+    def __init__(self, index: CatalogIndex, max_alternatives: int = MAX_ALTERNATIVES, eager: bool = True):
+        self.index = index
+        self.max_alternatives = max_alternatives
+        self._alternatives: Dict[int, Tuple[int, ...]] = {}
+        if eager:
+            for pos in range(len(index)):
+                self.alternatives_of(pos)
+
+    def _rank(self, pos: int, other: int) -> tuple:
+        ix = self.index
+        new_contra = bin(ix.contra_mask[other] & ~ix.contra_mask[pos]).count("1")
+        return (new_contra, abs(ix.level[other] - ix.level[pos]),
+                -bin(ix.equip_mask[other] & ix.equip_mask[pos]).count("1"),
+                -bin(ix.goal_mask[other] & ix.goal_mask[pos]).count("1"), other)
+
+    def alternatives_of(self, pos: int) -> Tuple[int, ...]:
+        alts = self._alternatives.get(pos)
+        if alts is None:
+            ix = self.index
+            same = ix.positions(ix.by_pattern[ix.pattern[pos]] & ~(1 << pos))
+            near = [o for o in same if abs(ix.level[o] - ix.level[pos]) <= MAX_LEVEL_GAP]
+            alts = self._alternatives[pos] = tuple(sorted(near, key=lambda o: self._rank(pos, o))[:self.max_alternatives])
+        return alts
+
+    def alternatives(self, name: str) -> List[str]:
+        """Ranked substitute names for a catalog exercise ([] if unknown)."""
+        pos = self.index.position.get(name)
+        if pos is None:
+            return []
+        return [self.index.exercises[o]["name"] for o in self.alternatives_of(pos)]
+
+    def substitute(self, name: str, allowed: int, exclude=()) -> Optional[int]:
+        """Best alternative position inside the `allowed` bitset, skipping names in `exclude`."""
+        pos = self.index.position.get(name)
+        if pos is None:
+            return None
+        for o in self.alternatives_of(pos):
+            if allowed >> o & 1 and self.index.exercises[o]["name"] not in exclude:
+                return o
+        return None
+
+
+@dataclass
+class Adaptation:
+    """Adapted plan plus what changed: (day, card, old, new) swaps, (day, old) removals and rebuilt days."""
+    week_plan: Dict[int, List[PlanItem]]
+    replaced: List[Tuple[int, int, str, str]] = field(default_factory=list)
+    dropped: List[Tuple[int, str]] = field(default_factory=list)
+    rebuilt: List[int] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.replaced or self.dropped or self.rebuilt)
+
+
+def adapt_plan(week_plan: Dict[int, List[PlanItem]], subs: SubstitutionIndex, goal_key: str,
+               equip_norm: List[str], experience: str, avoid: List[str],
+               rebuild_day: Optional[Callable[[int], List[PlanItem]]] = None) -> Adaptation:
+    """Fit an existing plan to new filters with one substitution lookup per affected item.
+
+    Items that still pass are kept as they are (same Exercise and Scheme objects), so a
+    plan the new filters don't affect comes back unchanged, i.e. equal to its original
+    generation. Replacements keep the item's Scheme, since they share its pattern. An
+    item with no allowed alternative is dropped, or, if `rebuild_day` is given (e.g. the
+    day builder for the new filters and the same seed), its whole day is rebuilt with it,
+    which gives exactly the day a fresh generation would. The result is deterministic.
+    """
+    ix = subs.index
+    allowed = ix.filter_mask(goal_key, equip_norm, experience.lower(), avoid)
+    out = Adaptation({})
+    for day, items in week_plan.items():
+        names = {it["name"] for it in items}
+        new_items: List[PlanItem] = []
+        replaced, dropped = [], []
+        for slot, it in enumerate(items):
+            pos = ix.position.get(it["name"])
+            if pos is None or allowed >> pos & 1:  # warm-up, or still allowed
+                new_items.append(it)
+                continue
+            alt = subs.substitute(it["name"], allowed, exclude=names)
+            if alt is None:
+                dropped.append((day, it["name"]))
+                continue
+            ex = ix.exercises[alt]
+            names.add(ex["name"])
+            new_items.append(PlanItem(ex, it.scheme))
+            replaced.append((day, slot, it["name"], ex["name"]))
+
+        if dropped and rebuild_day is not None:
+            out.week_plan[day] = rebuild_day(day)
+            out.rebuilt.append(day)
+        else:
+            out.week_plan[day] = items if new_items == items else new_items
+            out.replaced += replaced
+            out.dropped += dropped
+    return out
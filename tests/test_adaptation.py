@@ -0,0 +1,53 @@
+import pytest
+
+from edits import PlanEdits, PlanSpec, build_day, swap_item
+from periodization import adapt_week, adapted_base_week, base_week
+from plancode import decode_adapted_code, decode_plan_code, encode_adapted_code, encode_plan_code
+from planner import _contra_from_constraints, _norm_equip, goal_key_from_label
+from streams import HIERARCHICAL
+
+INPUTS = {"goal": "Build Muscle (Hypertrophy)", "days": 4, "minutes": 60, "experience": "Intermediate",
+          "equipment": ["Bodyweight", "Dumbbells", "Barbell", "Pull-up Bar", "Kettlebell", "Machines"],
+          "constraints": [], "focus": ["Full Body"]}
+ADAPTED = {**INPUTS, "equipment": ["Bodyweight", "Barbell", "Pull-up Bar", "Machines"], "constraints": ["Wrist pain"]}
+
+
+def spec_for(inputs, seed=42, streams=HIERARCHICAL):
+    return PlanSpec(goal_key_from_label(inputs["goal"]), inputs["days"], inputs["minutes"], inputs["experience"],
+                    tuple(_norm_equip(inputs["equipment"])), tuple(_contra_from_constraints(inputs["constraints"])),
+                    tuple(inputs["focus"]), seed, streams)
+
+
+def test_adapted_code_round_trip():
+    base = encode_plan_code(INPUTS, 42, PlanEdits((("r", 1, 1),), HIERARCHICAL))
+    later = PlanEdits((("r", 0, 1), ("s", 2, 3)), HIERARCHICAL)
+    code = encode_adapted_code(base, ADAPTED, later)
+    inputs, seed, edits, adaptations = decode_adapted_code(code)
+    assert (inputs, seed, edits) == decode_plan_code(base)
+    assert adaptations == [(ADAPTED, later)]
+    assert decode_adapted_code(base)[3] == []
+
+
+@pytest.mark.parametrize("bad", ["+a", "+a00", "+a2013+v2"])
+def test_bad_adaptation_is_rejected(bad):
+    with pytest.raises(ValueError):
+        decode_adapted_code(encode_plan_code(INPUTS, 42) + bad)
+
+
+def test_edits_after_adapting_touch_only_their_day_and_replay_from_the_code():
+    spec, new_spec = spec_for(INPUTS), spec_for(ADAPTED)
+    edits = PlanEdits((("r", 1, 1),), HIERARCHICAL)
+    adapted = adapt_week(base_week(spec, edits), edits, new_spec).week_plan
+
+    # what the app does: one reroll and one swap, each on its own day of the adapted plan
+    later = PlanEdits(streams=HIERARCHICAL).with_reroll(0).with_swap(2, 1)
+    shown = dict(adapted)
+    shown[0] = build_day(new_spec, 0, later.reroll_of(0))
+    shown[2] = swap_item(new_spec, 2, adapted[2], 1, later.swaps_of(2, 1))
+    assert shown[1] == adapted[1] and shown[3] == adapted[3]
+
+    code = encode_adapted_code(encode_plan_code(INPUTS, 42, edits), ADAPTED, later)
+    inputs, seed, base_edits, adaptations = decode_adapted_code(code)
+    replayed, _ = adapted_base_week(spec_for(inputs, seed), base_edits,
+                                    [(spec_for(a_inputs, seed), a_edits) for a_inputs, a_edits in adaptations])
+    assert replayed == shown
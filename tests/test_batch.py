@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from batch import generate_all, normalize_profile, read_profiles
+
+GOOD = {"goal": "Build Muscle (Hypertrophy)", "days": 3, "minutes": 45, "experience": "Intermediate",
+        "equipment": ["Bodyweight", "Dumbbells"], "seed": 1}
+BAD = {
+    "days7": {**GOOD, "days": 7},
+    "goal": {**GOOD, "goal": "Get Huge"},
+    "experience": {**GOOD, "experience": "Expert"},
+    "equipment": {**GOOD, "equipment": ["Jetpack"]},
+    "float": {**GOOD, "minutes": 37.5},
+    "text": {**GOOD, "seed": "abc"},
+    "seed": {**GOOD, "seed": 10_001},
+    "superscript": {**GOOD, "seed": "²"},
+    "minutes": {**GOOD, "minutes": 37},
+}
+
+
+@pytest.fixture
+def roster(tmp_path):
+    lines = [json.dumps({**GOOD, "id": "first"})]
+    lines += [json.dumps({**row, "id": name}) for name, row in BAD.items()]
+    lines += ["{not json", json.dumps({**GOOD, "id": "last"})]
+    path = tmp_path / "roster.jsonl"
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_mixed_roster_reports_bad_profiles_and_keeps_going(roster, jobs):
+    results = list(generate_all(read_profiles(roster), jobs, chunksize=2))
+    by_id = {r["id"]: r for r in results}
+    assert len(results) == len(BAD) + 3
+    assert by_id["first"]["status"] == by_id["last"]["status"] == "ok"
+    assert by_id["first"]["csv"] == by_id["last"]["csv"]
+    for name in BAD:
+        assert by_id[name]["status"] == "error", name
+        assert by_id[name]["error"]
+    assert by_id[str(len(BAD) + 1)]["status"] == "error"  # the unparsable line, by position
+    assert "days" in by_id["days7"]["error"]
+
+
+def test_csv_roster_errors(tmp_path):
+    path = tmp_path / "roster.csv"
+    path.write_text("id,goal,days,minutes,experience,equipment\n"
+                    "a,Build Muscle (Hypertrophy),3,45,Beginner,Bodyweight;Dumbbells\n"
+                    "b,Build Muscle (Hypertrophy),3.7,45,Beginner,Bodyweight\n", encoding="utf-8")
+    results = list(generate_all(read_profiles(str(path)), 1))
+    assert [r["status"] for r in results] == ["ok", "error"]
+
+
+def test_normalize_profile_leaves_the_row_alone():
+    row = {**GOOD, "constraints": ["Wrist pain"]}
+    before = dict(row)
+    assert normalize_profile(row, 0)["limitations"] == ["Wrist pain"]
+    assert row == before
@@ -0,0 +1,33 @@
+import pytest
+
+from catalog import EXERCISES
+from catalog_loader import CatalogError, compile_catalog, write_catalog
+
+HEADER = "name,pattern,equipment,level_min,contra,goal_tags\n"
+ROW = "Goblet Squat,squat,dumbbells|kettlebell,beginner,,hypertrophy|general\n"
+
+
+def test_csv_round_trip(tmp_path):
+    path = tmp_path / "catalog.csv"
+    write_catalog(EXERCISES, str(path))
+    index, _ = compile_catalog(path.read_bytes(), "csv")
+    assert len(index) == len(EXERCISES)
+
+
+def test_csv_unknown_column_is_rejected():
+    data = (HEADER.replace("equipment", "equipement") + ROW).encode()
+    with pytest.raises(CatalogError, match="equipement"):
+        compile_catalog(data, "csv")
+
+
+def test_csv_missing_and_unknown_columns_are_reported_together():
+    with pytest.raises(CatalogError) as e:
+        compile_catalog(b"title,pattern\nGoblet Squat,squat\n", "csv")
+    assert "name" in str(e.value) and "title" in str(e.value)
+    assert len(e.value.problems) == 2
+
+
+def test_json_unknown_field_is_rejected():
+    with pytest.raises(CatalogError, match="unknown field"):
+        compile_catalog(b'[{"name": "Goblet Squat", "pattern": "squat", "equipment": ["dumbbells"], '
+                        b'"goal_tags": ["general"], "equipement": []}]', "json")
@@ -0,0 +1,94 @@
+"""Plan reproduction: every Plan Code must keep producing the same plan.
+
+`golden_plans.json` holds one sha256 per (stream scheme, goal, days) over the Markdown,
+CSV and day summaries of every profile in GRID (12960 profiles per scheme). The legacy
+digests were recorded from the original app (codes without a `+v2` marker); the v2 ones
+pin what every new plan gets, since the app, server and batch tool mint `+v2` codes. A
+change anywhere in filtering, weighting, schemes, day building or export that alters an
+existing plan fails here.
+
+Regenerate (only for an intentional change, e.g. a new stream scheme):
+
+    python tests/test_golden.py --update
+"""
+import hashlib
+import io
+import itertools
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch import normalize_profile, plan_for_profile  # noqa: E402
+from exporters import CsvWriter, markdown_plan  # noqa: E402
+from planner import _contra_from_constraints, _norm_equip, generate_week, goal_key_from_label, summarize_day  # noqa: E402
+from plancode import decode_plan_code  # noqa: E402
+from server import code_for_request  # noqa: E402
+from streams import CURRENT, HIERARCHICAL, LEGACY  # noqa: E402
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden_plans.json")
+SCHEMES = {"legacy": LEGACY, "v2": HIERARCHICAL}
+GOALS = ["Build Muscle (Hypertrophy)", "Get Stronger (Strength)", "Fat Loss / Conditioning",
+         "General Fitness / Health", "Mobility / Flexibility"]
+DAYS = [1, 3, 4, 6]
+EQUIPMENT = [["Bodyweight", "Dumbbells"], ["Bodyweight"],
+             ["Barbell", "Pull-up Bar", "Dumbbells", "Kettlebell", "Resistance Bands", "Bodyweight", "Machines"],
+             ["Kettlebell", "Resistance Bands"]]
+CONSTRAINTS = [[], ["No deep knee flexion", "Wrist pain"], ["Lower back sensitive", "Avoid high impact"]]
+FOCUS = [["Full Body"], ["Upper Body", "Arms"], ["Lower Body", "Glutes", "Core", "Shoulders", "Back", "Chest"]]
+GRID = (DAYS, [20, 45, 90], ["Beginner", "Intermediate", "Advanced"], EQUIPMENT, CONSTRAINTS, FOCUS, [0, 42])
+
+
+def plan_text(goal: str, days: int, minutes: int, experience: str, equipment, constraints, focus, seed: int,
+              streams: int) -> str:
+    week = generate_week(goal_key_from_label(goal), days, minutes, experience, _norm_equip(equipment),
+                         _contra_from_constraints(constraints), focus, seed, streams=streams)
+    if week is None:
+        return "EMPTY\n"
+    buf = io.StringIO()
+    CsvWriter(buf).write(week)
+    summaries = json.dumps([summarize_day(items) for items in week.values()], sort_keys=True)
+    return f"{markdown_plan(week)}\0{buf.getvalue()}\0{summaries}\n"
+
+
+def digests(streams: int) -> dict:
+    out = {}
+    for goal in GOALS:
+        for days in DAYS:
+            h = hashlib.sha256()
+            for _, minutes, exp, equip, cons, focus, seed in itertools.product([days], *GRID[1:]):
+                h.update(plan_text(goal, days, minutes, exp, equip, cons, focus, seed, streams).encode("utf-8"))
+            out[f"{goal} / {days} days"] = h.hexdigest()[:16]
+    return out
+
+
+@pytest.mark.parametrize("scheme", list(SCHEMES))
+def test_plans_match_golden(scheme):
+    with open(FIXTURE, encoding="utf-8") as f:
+        expected = json.load(f)[scheme]
+    actual = digests(SCHEMES[scheme])
+    changed = [k for k in expected if actual.get(k) != expected[k]]
+    assert not changed, f"{scheme} plans changed for: {', '.join(changed)}"
+
+
+def test_new_plans_use_v2_streams():
+    assert CURRENT == HIERARCHICAL
+    inputs = {"goal": GOALS[0], "days": 3, "minutes": 45, "experience": "Beginner", "equipment": EQUIPMENT[0]}
+    plan = plan_for_profile(normalize_profile({**inputs, "seed": 42}, 0))
+    expected = plan_text(GOALS[0], 3, 45, "Beginner", EQUIPMENT[0], [], [], 42, HIERARCHICAL).split("\0")
+    assert [plan["markdown"], plan["csv"]] == expected[:2]
+    assert decode_plan_code(code_for_request({**inputs, "seed": 42}))[2].streams == HIERARCHICAL
+    # a code without the marker is an existing plan and keeps its legacy streams
+    assert decode_plan_code(code_for_request({**inputs, "plan_code": "42"}))[2].streams == LEGACY
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["--update"]:
+        sys.exit(__doc__)
+    with open(FIXTURE, "w", encoding="utf-8") as f:
+        json.dump({name: digests(streams) for name, streams in SCHEMES.items()}, f, indent=1)
+        f.write("\n")
+    print(f"wrote {FIXTURE}")
@@ -0,0 +1,40 @@
+import io
+import logging
+
+import pytest
+
+from metrics import configure_logging, logger
+
+
+@pytest.fixture
+def clean_loggers():
+    app, root = logging.getLogger("workout_planner"), logging.getLogger()
+    saved = app.level, logger.level, list(logger.handlers), list(root.handlers), root.level
+    yield
+    app.setLevel(saved[0])
+    logger.setLevel(saved[1])
+    logger.handlers[:] = saved[2]
+    root.handlers[:] = saved[3]
+    root.setLevel(saved[4])
+
+
+def test_info_lines_reach_the_host_apps_handler(clean_loggers):
+    # e.g. Streamlit: a handler on the root logger, which stays at WARNING
+    root, buf = logging.getLogger(), io.StringIO()
+    root.setLevel(logging.WARNING)
+    root.handlers[:] = [logging.StreamHandler(buf)]
+    logging.getLogger("workout_planner").setLevel(logging.NOTSET)
+    logger.setLevel(logging.NOTSET)
+    configure_logging()
+    logger.info("trace line")
+    assert "trace line" in buf.getvalue()
+    assert not logger.handlers
+
+
+def test_own_handler_without_a_host(clean_loggers):
+    logging.getLogger().handlers[:] = []
+    logger.handlers[:] = []
+    buf = io.StringIO()
+    configure_logging(buf)
+    logger.info("trace line")
+    assert buf.getvalue() == "trace line\n"
@@ -0,0 +1,80 @@
+import asyncio
+import json
+
+import pytest
+
+from server import BadRequest, PlanService, code_for_request, render_plan
+
+BODY = {"goal": "Build Muscle (Hypertrophy)", "days": 3, "minutes": 45, "experience": "Intermediate",
+        "equipment": ["Bodyweight", "Dumbbells"]}
+
+
+def status(code: str) -> int:
+    return render_plan(code, "json")[0]
+
+
+def test_valid_edits_are_accepted():
+    code = code_for_request({**BODY, "plan_code": "1+d2r1+d2s3"})
+    assert status(code) == 200
+    assert json.loads(render_plan(code, "json")[2])["plan_code"] == "1+d2r1+d2s3"
+
+
+@pytest.mark.parametrize("plan_code", ["1+d9s1", "1+d9r1", "1+d4r1"])
+def test_edits_past_the_last_day_are_rejected(plan_code):
+    with pytest.raises(BadRequest, match="day"):
+        code_for_request({**BODY, "plan_code": plan_code})
+
+
+def test_extended_code_with_bad_day_is_rejected():
+    code = code_for_request({**BODY, "plan_code": "1"})
+    with pytest.raises(BadRequest):
+        code_for_request({"code": code + "+d9r1"})
+
+
+@pytest.mark.parametrize("plan_code", ["1+d1s40", "1+d1s1"])
+def test_swaps_of_missing_cards_or_the_warmup_are_rejected(plan_code):
+    assert status(code_for_request({**BODY, "plan_code": plan_code})) == 400
+
+
+@pytest.mark.parametrize("field,value", [("days", 3.7), ("minutes", "45"), ("days", True)])
+def test_non_integer_days_and_minutes_are_rejected(field, value):
+    with pytest.raises(BadRequest, match=field):
+        code_for_request({**BODY, field: value})
+
+
+def exchange(raw: bytes) -> bytes:
+    """Send `raw` to a fresh in-process server (no worker processes) and return everything it answers."""
+    async def run():
+        server = await asyncio.start_server(PlanService(None, max_body=1024).handle, "127.0.0.1", 0, limit=8192)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(raw)
+            await writer.drain()
+            data = await asyncio.wait_for(reader.read(), 10)
+            writer.close()
+            return data
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("length", [b"abc", b"-5", b"1e3", "²".encode("latin-1")])
+def test_malformed_content_length_gets_400(length):
+    reply = exchange(b"POST /v1/plans HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n{}")
+    assert reply.startswith(b"HTTP/1.1 400 ")
+    assert b"Content-Length" in reply
+
+
+def test_body_over_the_cap_gets_413():
+    reply = exchange(b"POST /v1/plans HTTP/1.1\r\nContent-Length: 5000\r\n\r\n")
+    assert reply.startswith(b"HTTP/1.1 413 ")
+
+
+def test_overlong_header_gets_400():
+    reply = exchange(b"GET /healthz HTTP/1.1\r\nX-Pad: " + b"a" * 10000 + b"\r\n\r\n")
+    assert reply.startswith(b"HTTP/1.1 400 ")
+
+
+def test_healthz_over_the_wire():
+    reply = exchange(b"GET /healthz HTTP/1.1\r\nConnection: close\r\n\r\n")
+    assert reply.startswith(b"HTTP/1.1 200 ") and reply.endswith(b"ok\n")
@@ -0,0 +1,35 @@
+import random
+
+from planner import generate_week
+from solver import solve_counts
+
+
+def names(week):
+    return [[it["name"] for it in items] for items in week.values()]
+
+
+def test_solver_fills_day_when_pool_is_smaller_than_must_have_count():
+    # bodyweight-only Beginner hypertrophy has fewer exercises than MUST_HAVE_COUNT:
+    # the solver must take what there is, not fall back to an empty day
+    args = ("hypertrophy", 3, 45, "Beginner", ["bodyweight"], [], ["Full Body"], 1)
+    greedy = names(generate_week(*args))
+    solver = names(generate_week(*args, mode="solver"))
+    assert [len(d) for d in solver] == [len(d) for d in greedy]
+    assert all(len(d) > 1 for d in solver)
+
+
+def test_solver_days_start_with_warmup():
+    week = generate_week("strength", 4, 60, "Intermediate", ["bodyweight", "dumbbells"], [], [], 7, mode="solver")
+    assert all(items[0]["name"] == "Warm-up" and len(items) > 1 for items in week.values())
+
+
+def test_solver_prefers_fewer_exercises_in_budget_to_an_overrun():
+    # the level minimum (3) only fits by overrunning; 2 exercises fit within budget
+    groups = [("squat", 1, True), ("hinge", 1, True), ("push", 1, True)]
+    counts = solve_counts([10, 10, 10], groups, 25, 3, 3, 0, random.Random(0))
+    assert sum(counts) == 2
+
+
+def test_solver_overruns_for_the_minimum_only_when_nothing_fits():
+    groups = [("squat", 2, True)]
+    assert solve_counts([30], groups, 25, 1, 2, 0, random.Random(0)) == [1]
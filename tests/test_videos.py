@@ -0,0 +1,37 @@
+import json
+import logging
+
+from video_cache import VideoCache
+from videos import MANIFEST_VERSION, VideoResolver, load_manifest, write_manifest
+
+
+def test_manifest_round_trip(tmp_path, caplog):
+    path = str(tmp_path / "manifest.json")
+    write_manifest({"Goblet Squat": "abc123"}, path)
+    with caplog.at_level(logging.WARNING, logger="workout_planner.videos"):
+        assert load_manifest(path) == {"Goblet Squat": "abc123"}
+    assert not caplog.records
+
+
+def test_missing_or_outdated_manifest_is_a_warning(tmp_path, caplog):
+    old = tmp_path / "old.json"
+    old.write_text(json.dumps({"version": 0, "videos": {"Goblet Squat": "abc123"}}))
+    with caplog.at_level(logging.INFO, logger="workout_planner.videos"):
+        for path in (old, tmp_path / "missing.json"):
+            assert load_manifest(str(path)) == {}
+    assert [r.levelno for r in caplog.records] == [logging.WARNING] * 2
+    assert all("--build-manifest" in r.getMessage() for r in caplog.records)
+
+
+def test_empty_manifest_is_info(tmp_path, caplog):
+    empty = tmp_path / "empty.json"
+    empty.write_text(json.dumps({"version": MANIFEST_VERSION, "videos": {}}))
+    with caplog.at_level(logging.INFO, logger="workout_planner.videos"):
+        assert load_manifest(str(empty)) == {}
+    assert [r.levelno for r in caplog.records] == [logging.INFO]
+
+
+def test_resolver_reports_manifest_size():
+    resolver = VideoResolver(None, max_workers=1, cache=VideoCache(":memory:"), manifest={"Goblet Squat": "abc123"})
+    assert resolver.resolve("Goblet Squat") == ("abc123", "found")
+    assert resolver.stats()["manifest"] == {"videos": 1}
@@ -0,0 +1,119 @@
+"""Persistent (SQLite) cache of YouTube search results, with per-entry TTL.
+
+Every lookup outcome is stored, not only hits:
+
+* ``found``   – a videoId; kept for `ttl` (30 days by default),
+* ``missing`` – the search had no results; kept for `negative_ttl` (7 days),
+* ``failed``  – the API or network errored; kept for `failure_ttl` (15 minutes), so a
+  quota or network outage isn't hammered on every rerun but recovers quickly.
+
+Entries are keyed by the search query and survive process/container restarts as long as
+the database file does. Expired rows are ignored on read and purged on open.
+Invalidation is targeted: by query, by status, or everything in this cache, and never
+touches other Streamlit caches.
+
+The database path defaults to `.cache/videos.sqlite3` next to the app (override with
+VIDEO_CACHE_PATH); if it can't be created the cache falls back to an in-memory database.
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, NamedTuple, Optional
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "videos.sqlite3")
+DEFAULT_TTL_SEC = 30 * 24 * 3600
+DEFAULT_NEGATIVE_TTL_SEC = 7 * 24 * 3600
+DEFAULT_FAILURE_TTL_SEC = 15 * 60
+
+FOUND, MISSING, FAILED = "found", "missing", "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    query      TEXT PRIMARY KEY,
+    video_id   TEXT,
+    status     TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+)
+"""
+
+
+class CacheEntry(NamedTuple):
+    video_id: Optional[str]
+    status: str
+    expires_at: float
+
+
+class VideoCache:
+    """query -> (videoId | None, status) with per-status TTLs; safe to share between threads."""
+
+    def __init__(self, path: Optional[str] = None, ttl: float = DEFAULT_TTL_SEC,
+                 negative_ttl: float = DEFAULT_NEGATIVE_TTL_SEC, failure_ttl: float = DEFAULT_FAILURE_TTL_SEC):
+        self.path = path or os.environ.get("VIDEO_CACHE_PATH") or DEFAULT_PATH
+        self.ttls = {FOUND: ttl, MISSING: negative_ttl, FAILED: failure_ttl}
+        self._lock = threading.Lock()
+        try:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._db.execute(_SCHEMA)
+        except (OSError, sqlite3.Error):
+            # read-only deploy: keep the cache for the life of the process at least
+            self.path = ":memory:"
+            self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._db.execute(_SCHEMA)
+        self.purge_expired()
+
+    def get(self, query: str, now: Optional[float] = None) -> Optional[CacheEntry]:
+        """Live entry for `query`, or None if there is none (or it has expired)."""
+        now = time.time() if now is None else now
+        with self._lock:
+            row = self._db.execute(
+                "SELECT video_id, status, expires_at FROM videos WHERE query = ? AND expires_at > ?", (query, now),
+            ).fetchone()
+        return CacheEntry(*row) if row else None
+
+    def put(self, query: str, video_id: Optional[str], status: str, now: Optional[float] = None) -> None:
+        if status not in self.ttls:
+            raise ValueError(f"unknown status {status!r}")
+        now = time.time() if now is None else now
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO videos (query, video_id, status, fetched_at, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (query, video_id, status, now, now + self.ttls[status]),
+            )
+
+    def invalidate(self, queries: Optional[Iterable[str]] = None, statuses: Optional[Iterable[str]] = None) -> int:
+        """Drop entries by query and/or status (both None: the whole video cache). Returns rows removed."""
+        sql, args = "DELETE FROM videos", []
+        where = []
+        if queries is not None:
+            queries = list(queries)
+            where.append(f"query IN ({','.join('?' * len(queries))})")
+            args += queries
+        if statuses is not None:
+            statuses = list(statuses)
+            where.append(f"status IN ({','.join('?' * len(statuses))})")
+            args += statuses
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        with self._lock:
+            return self._db.execute(sql, args).rowcount
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        with self._lock:
+            return self._db.execute("DELETE FROM videos WHERE expires_at <= ?", (now,)).rowcount
+
+    def stats(self) -> Dict[str, int]:
+        """Live entries per status."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT status, COUNT(*) FROM videos WHERE expires_at > ? GROUP BY status", (time.time(),),
+            ).fetchall()
+        return {FOUND: 0, MISSING: 0, FAILED: 0, **dict(rows)}
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,325 @@
+"""YouTube demo-video lookups: one reused API client and a concurrent prefetch stage.
+
+The app used to call `googleapiclient.discovery.build(...)` on every cache miss and then
+run one blocking search per exercise, separately for the day tabs, the CSV export and
+the Markdown export. Now a process-wide `VideoResolver` owns a single `YouTubeClient`
+(plain HTTP with per-thread keep-alive connections, no discovery document) and a bounded
+thread pool. After a plan is built, all unique exercise names are submitted at once
+(`submit` returns futures, `prefetch` waits for them); the app renders the plan straight
+away and fills in videos as the lookups finish.
+
+Lookups go manifest -> persistent cache -> API. The manifest (`video_manifest.json`,
+next to the catalog) holds pre-resolved IDs for catalog exercises, so those need no
+network at all; everything else lands in the SQLite `VideoCache` with its TTLs, misses
+and failures included. The repository ships it empty (building it needs an API key);
+build it with
+
+    YT_API_KEY=... python videos.py --build-manifest
+
+The API base URL can be pointed at a local stub server (`base_url=` or the
+YT_API_BASE_URL environment variable), e.g. for benchmarks/video_prefetch.py.
+"""
+import json
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from http.client import HTTPConnection, HTTPSConnection, HTTPException
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+from cache import SingleFlight
+from metrics import METRICS
+from quota import SEARCH_COST, QuotaGovernor
+from video_cache import FAILED, FOUND, MISSING, VideoCache
+
+DEFAULT_API_BASE = "https://www.googleapis.com/youtube/v3"
+DEFAULT_WORKERS = 8
+MANIFEST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "video_manifest.json")
+MANIFEST_VERSION = 1
+# not cached: the quota budget was too low to search, so the UI shows the search link
+THROTTLED = "throttled"
+
+logger = logging.getLogger("workout_planner.videos")
+
+
+def video_query(name: str) -> str:
+    return f"{name} exercise proper form tutorial"
+
+
+def search_url(name: str) -> str:
+    search_q = name.replace(" ", "+") + "+exercise+proper+form+tutorial"
+    return f"https://www.youtube.com/results?search_query={search_q}"
+
+
+def watch_url(video_id: str) -> str:
+    return f"https://www.youtube.com/watch?v={video_id}"
+
+
+class YouTubeError(Exception):
+    """The search API answered with an error status or an unreadable body."""
+
+    def __init__(self, message: str, status: Optional[int] = None, reason: Optional[str] = None):
+        super().__init__(message)
+        self.status = status
+        self.reason = reason
+
+    @property
+    def quota_exceeded(self) -> bool:
+        return self.reason in ("quotaExceeded", "dailyLimitExceeded", "rateLimitExceeded")
+
+
+class YouTubeClient:
+    """Minimal YouTube Data API v3 search client; safe to share between threads."""
+
+    def __init__(self, api_key: str, base_url: Optional[str] = None, timeout: float = 10.0):
+        url = urlsplit(base_url or os.environ.get("YT_API_BASE_URL") or DEFAULT_API_BASE)
+        self.api_key = api_key
+        self.timeout = timeout
+        self._scheme, self._host, self._path = url.scheme, url.netloc, url.path.rstrip("/")
+        self._local = threading.local()
+
+    def _conn(self) -> HTTPConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            cls = HTTPSConnection if self._scheme == "https" else HTTPConnection
+            conn = self._local.conn = cls(self._host, timeout=self.timeout)
+        return conn
+
+    def _drop_conn(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def search_video_id(self, query: str) -> Optional[str]:
+        """First embeddable video for `query`, or None when the search has no results."""
+        params = urlencode({
+            "part": "id", "type": "video", "maxResults": 1, "videoEmbeddable": "true",
+            "q": query, "key": self.api_key,
+        })
+        for attempt in (0, 1):
+            conn = self._conn()
+            try:
+                conn.request("GET", f"{self._path}/search?{params}")
+                resp = conn.getresponse()
+                body = resp.read()
+                break
+            except (HTTPException, OSError):
+                # a kept-alive connection may have been closed by the server; retry once
+                self._drop_conn()
+                if attempt:
+                    raise
+        if resp.status != 200:
+            try:
+                reason = json.loads(body)["error"]["errors"][0]["reason"]
+            except (ValueError, KeyError, IndexError, TypeError):
+                reason = None
+            raise YouTubeError(f"search failed with HTTP {resp.status}", resp.status, reason)
+        try:
+            items = json.loads(body).get("items", [])
+            return items[0]["id"]["videoId"] if items else None
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            raise YouTubeError(f"unexpected search response: {e}") from e
+
+
+def load_manifest(path: str = MANIFEST_PATH) -> Dict[str, str]:
+    """Exercise name -> videoId from the shipped manifest ({} if absent or unreadable).
+
+    A missing or broken manifest is logged as a warning; an empty one, as shipped until
+    someone builds it, only at INFO.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        return _no_manifest(path, f"can't be read ({e})")
+    if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+        return _no_manifest(path, f"is not a version {MANIFEST_VERSION} manifest")
+    videos = {name: vid for name, vid in data.get("videos", {}).items() if vid}
+    if not videos:
+        return _no_manifest(path, "has no videos", logging.INFO)
+    return videos
+
+
+def _no_manifest(path: str, problem: str, level: int = logging.WARNING) -> Dict[str, str]:
+    logger.log(level, "video manifest %s %s; every video lookup needs the cache or the API. "
+               "Build it with: YT_API_KEY=... python videos.py --build-manifest", path, problem)
+    return {}
+
+
+def write_manifest(videos: Dict[str, str], path: str = MANIFEST_PATH) -> None:
+    data = {"version": MANIFEST_VERSION, "videos": dict(sorted(videos.items()))}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+
+@dataclass
+class Prefetch:
+    """Resolved exercise name -> videoId (None when there is no video or the lookup failed)."""
+    ids: Dict[str, Optional[str]] = field(default_factory=dict)
+    failed: List[str] = field(default_factory=list)
+    throttled: List[str] = field(default_factory=list)
+
+    def get(self, name: str) -> Optional[str]:
+        return self.ids.get(name)
+
+    def add(self, name: str, vid: Optional[str], status: str) -> None:
+        self.ids[name] = vid
+        if status == FAILED:
+            self.failed.append(name)
+        elif status == THROTTLED:
+            self.throttled.append(name)
+
+
+class PendingVideos:
+    """Lookups submitted to the resolver's pool; read what has finished without blocking."""
+
+    def __init__(self, futures: Dict[str, Future]):
+        self.futures = futures
+
+    def get(self, name: str) -> Optional[str]:
+        """videoId if the lookup has already finished, else None (never waits)."""
+        fut = self.futures.get(name)
+        return fut.result()[0] if fut is not None and fut.done() else None
+
+    def done(self) -> bool:
+        return all(f.done() for f in self.futures.values())
+
+    def as_completed(self) -> Iterator[Tuple[str, Optional[str], str]]:
+        """(name, videoId, status) in the order the lookups finish."""
+        names = {f: name for name, f in self.futures.items()}
+        for fut in as_completed(names):
+            vid, status = fut.result()
+            yield names[fut], vid, status
+
+    def result(self) -> Prefetch:
+        """Wait for everything; same result as `VideoResolver.prefetch`."""
+        out = Prefetch()
+        for name, fut in self.futures.items():
+            out.add(name, *fut.result())
+        return out
+
+
+class VideoResolver:
+    """Process-wide lookups: manifest and persistent cache in front of one client and one thread pool.
+
+    Cache misses for the same query from concurrent sessions share one in-flight search
+    (`SingleFlight`), and every search must first get its units from the `QuotaGovernor`;
+    when the budget runs low, lookups return THROTTLED and the UI falls back to links.
+    """
+
+    def __init__(self, client: Optional[YouTubeClient], max_workers: int = DEFAULT_WORKERS,
+                 cache: Optional[VideoCache] = None, manifest: Optional[Dict[str, str]] = None,
+                 governor: Optional[QuotaGovernor] = None):
+        self.client = client
+        self.cache = cache if cache is not None else VideoCache()
+        self.manifest = load_manifest() if manifest is None else manifest
+        self.governor = governor if governor is not None else QuotaGovernor()
+        self._flights = SingleFlight()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="yt-lookup")
+        self._counts = {"manifest": 0, "cache": 0, "searches": 0, FOUND: 0, MISSING: 0, FAILED: 0, THROTTLED: 0}
+        self._counts_lock = threading.Lock()
+
+    def _count(self, key: str) -> None:
+        with self._counts_lock:
+            self._counts[key] += 1
+
+    def resolve(self, name: str) -> Tuple[Optional[str], str]:
+        """(videoId, status) for an exercise name; API errors are cached briefly as FAILED."""
+        with METRICS.stage("video_lookup"):
+            return self._resolve(name)
+
+    def _resolve(self, name: str) -> Tuple[Optional[str], str]:
+        vid = self.manifest.get(name)
+        if vid:
+            self._count("manifest")
+            return vid, FOUND
+        query = video_query(name)
+        entry = self.cache.get(query)
+        if entry is not None:
+            self._count("cache")
+            return entry.video_id, entry.status
+        if self.client is None:
+            return None, MISSING
+        return self._flights.do(query, lambda: self._search(query))
+
+    def _search(self, query: str) -> Tuple[Optional[str], str]:
+        # a flight that just landed may have filled the cache between our check and now
+        entry = self.cache.get(query)
+        if entry is not None:
+            self._count("cache")
+            return entry.video_id, entry.status
+        if not self.governor.try_acquire(SEARCH_COST):
+            self._count(THROTTLED)
+            return None, THROTTLED
+        self._count("searches")
+        try:
+            with METRICS.stage("video_search"):
+                vid = self.client.search_video_id(query)
+        except Exception as e:
+            if isinstance(e, YouTubeError) and e.quota_exceeded:
+                self.governor.exhaust()
+            self.cache.put(query, None, FAILED)
+            self._count(FAILED)
+            return None, FAILED
+        status = FOUND if vid else MISSING
+        self.cache.put(query, vid, status)
+        self._count(status)
+        return vid, status
+
+    def lookup(self, name: str) -> Optional[str]:
+        return self.resolve(name)[0]
+
+    def submit(self, names: Iterable[str]) -> PendingVideos:
+        """Start resolving all unique names on the resolver's bounded pool and return at once."""
+        unique = dict.fromkeys(n for n in names if n != "Warm-up")
+        return PendingVideos({name: self._pool.submit(self.resolve, name) for name in unique})
+
+    def prefetch(self, names: Iterable[str]) -> Prefetch:
+        """Resolve all unique names concurrently and wait for them."""
+        return self.submit(names).result()
+
+    def stats(self) -> Dict[str, Dict]:
+        """Counters: lookups by source/outcome, request coalescing, quota, cache and manifest contents."""
+        with self._counts_lock:
+            lookups = dict(self._counts)
+        return {"lookups": lookups, "coalescing": self._flights.stats(), "quota": self.governor.stats(),
+                "cache": self.cache.stats(), "manifest": {"videos": len(self.manifest)}}
+
+    def invalidate(self, names: Optional[Iterable[str]] = None, statuses: Optional[Iterable[str]] = None) -> int:
+        """Forget cached lookups for `names` and/or `statuses` (default: all); the manifest is kept."""
+        queries = None if names is None else [video_query(n) for n in names]
+        return self.cache.invalidate(queries, statuses)
+
+
+def build_manifest(api_key: str, path: str = MANIFEST_PATH, base_url: Optional[str] = None) -> Dict[str, str]:
+    """Resolve every catalog exercise through the API and write the manifest."""
+    from planner import CATALOG
+
+    resolver = VideoResolver(YouTubeClient(api_key, base_url=base_url), cache=VideoCache(":memory:"), manifest={},
+                             governor=QuotaGovernor(reserve=0))
+    got = resolver.prefetch(ex["name"] for ex in CATALOG.exercises)
+    if got.failed or got.throttled:
+        raise YouTubeError(f"lookups failed for: {', '.join(got.failed + got.throttled)}")
+    videos = {name: vid for name, vid in got.ids.items() if vid}
+    write_manifest(videos, path)
+    return videos
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="YouTube video manifest tools")
+    ap.add_argument("--build-manifest", action="store_true", help="resolve all catalog exercises (needs YT_API_KEY)")
+    ap.add_argument("--path", default=MANIFEST_PATH)
+    args = ap.parse_args()
+    if not args.build_manifest:
+        ap.error("nothing to do (use --build-manifest)")
+    key = os.environ.get("YT_API_KEY")
+    if not key:
+        ap.error("YT_API_KEY is not set")
+    found = build_manifest(key, args.path)
+    print(f"wrote {len(found)} video IDs to {args.path}")